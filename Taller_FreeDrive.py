@@ -13,10 +13,11 @@ Propósito: GUI simple para manipular un UR (Freedrive, guardar poses, acciones
 import os
 import sys
 import time
-import socket
+T_ARRANQUE = time.time()            # inicio del módulo, antes de las importaciones pesadas
+import json
 import threading
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, simpledialog, filedialog
 from PIL import Image, ImageTk
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *  # DANGER, etc.
@@ -25,6 +26,22 @@ import rtde.rtde as rtde
 import rtde.rtde_config as rtde_config
 
 import urscripts  # contexto externo: NO modificar
+import ajustes    # ajustes por estación (estacion.ini)
+import rtde_flujo # receta/frecuencia RTDE configurables y consumidores
+import rtde_rapido  # decodificador RTDE por lotes (NumPy)
+import interfaz_secundaria  # conexión persistente 30002 + estado del robot
+import dashboard  # cliente Dashboard Server (29999) con caché
+import poses      # matemática de poses vectorizada (NumPy)
+import paletizado # pasos tipo patrón (grillas N x M x K)
+import motor_async  # motor asyncio para celdas con varios robots
+import proceso_io   # E/S de robots en un proceso aparte (memoria compartida)
+import multiprocessing
+import metricas     # métricas del enlace (Prometheus) y salud
+import trazas       # trazado de caminos calientes (Chrome Trace / Perfetto)
+import vista_tcp    # tira temporal del TCP y vista de la ruta sobre el canvas
+import trayectorias # pasos "trayectoria" importados de CSV / G-code
+import ejecucion_bloques  # rutinas largas en streaming (receptor residente)
+import programa_residente # tabla de la rutina en el robot, actualizada por diferencias
 
 # ▲▲========================================================▲▲
 
@@ -67,6 +84,7 @@ def resource_path(relative_path: str) -> str:
 
 CONFIG_FILE = resource_path("control_loop_configuration.xml")
 FONDO_IMG  = resource_path("fondo.png")
+FONDO_ESCALADO = "fondo_{}x{}.png"  # pre-escalado al tamaño de la ventana (lo genera el .spec)
 
 # ▲▲========================================================▲▲
 
@@ -77,18 +95,47 @@ FONDO_IMG  = resource_path("fondo.png")
 # ▼▼========================================================▼▼
 #   ⮞ 03 Configuración del robot
 # ------------------------------------------------------------
-ROBOT_IP      = "192.168.1.20"
+AJUSTES = ajustes.cargar()
+
+ROBOT_IP      = AJUSTES.get("robot", "ip")
 PORT_URSCRIPT = 30002
 PORT_RTDE     = 30004
+PORT_DASHBOARD = dashboard.PUERTO_DASHBOARD
+
+# RTDE: receta, campos y frecuencia por estación (con respaldo automático)
+RTDE_RECETA     = AJUSTES.get("rtde", "receta")
+RTDE_CAMPOS     = ajustes.lista(AJUSTES.get("rtde", "campos"))
+RTDE_FRECUENCIA = AJUSTES.getfloat("rtde", "frecuencia")
+RTDE_RESPALDO   = AJUSTES.get("rtde", "respaldo")
+GUI_HZ          = AJUSTES.getfloat("rtde", "gui_hz")
+RTDE_RAPIDO     = AJUSTES.get("rtde", "decodificador") == "rapido"
+RTDE_REINTENTO_S = 1.0              # espera entre reconexiones RTDE (un robot, sin motor)
+
+# Celda multi-robot: [(nombre, ip), ...]; con 2 o más se usa motor_async
+CELDA = ajustes.robots(AJUSTES)
+
+# E/S en un proceso aparte: el RTDE no compite por el GIL con Tk/PIL
+IO_PROCESO = AJUSTES.getboolean("io", "proceso")
 
 # Estado RTDE / datos compartidos
 tcp_pos = [0, 0, 0, 0, 0, 0]        # posición TCP (VECTOR6D)
 posiciones_guardadas = []           # histórico de poses guardadas
 gripper_status = True               # True=Abierto / False=Cerrado (para registrar acción)
-lista_instrucciones = []            # secuencia combinada de {tipo:"pose"|"gripper", ...}
+lista_instrucciones = []            # secuencia combinada de {tipo:"pose"|"gripper"|"patron", ...}
 
 con_rtde = None                     # conexión RTDE
 rtde_ok  = False                    # flag de conexión
+rtde_salida = None                  # (receta, nombres, tipos, Hz) aceptados por el controlador
+lector_rtde = None                  # rtde_rapido.LectorRapido (None = receive() de la librería)
+
+distribuidor_rtde = rtde_flujo.DistribuidorRTDE()   # reparte cada paquete a sus consumidores
+_n_registro = AJUSTES.getint("rtde", "registro_muestras")
+registro_rtde = rtde_flujo.RegistroRTDE(_n_registro) if _n_registro > 0 else None
+panel_tcp = None                    # vista_tcp.PanelTCP (se crea con la ventana si [vista] activo)
+emisor_bloques = None               # ejecucion_bloques.EmisorBloques de la última rutina por bloques
+residente = None                    # programa_residente.ProgramaResidente (se crea en la primera ejecución)
+residente_fallido = set()           # IP de robots cuyo residente no se conectó (no se reintenta en la sesión)
+avisos_arranque = []                # fallos de conexión/arranque a mostrar cuando exista la ventana
 
 # ▲▲========================================================▲▲
 
@@ -99,13 +146,76 @@ rtde_ok  = False                    # flag de conexión
 # ▼▼========================================================▼▼
 #   ⮞ 04 Helpers URScripts
 # ------------------------------------------------------------
+def al_evento_robot(evento: dict) -> None:
+    """Reenvía un evento del hilo lector de 30002 al hilo de la GUI."""
+    if "ventana" in globals():
+        ventana.after(0, mostrar_evento_robot, evento)
+
+
+@trazas.trazar("celda.lote", "celda")
+def al_lote_celda(nombre: str, lote) -> None:
+    """Lotes RTDE del motor: métricas de todos; solo el robot activo alimenta a la GUI."""
+    global tcp_pos
+    monitor = metricas.MONITORES.get(nombre) or metricas.MonitorRTDE(nombre)
+    monitor.agregar_lote(lote, getattr(motor_celda, "llegadas", {}).get(nombre))   # ProcesoIO: lecturas del hijo
+    if nombre != robot_activo:
+        return
+    if "actual_TCP_pose" in lote.dtype.names:
+        tcp_pos = lote[-1].actual_TCP_pose.tolist()
+    distribuidor_rtde.publicar_lote(lote)
+
+
+def al_evento_celda(nombre: str, evento: dict) -> None:
+    """Eventos 30002 del motor: excepciones/errores de cualquier robot, modo solo del activo."""
+    if nombre == robot_activo or evento["tipo"] in ("excepcion", "error"):
+        al_evento_robot(dict(evento, robot=nombre))
+
+
+motor_celda = None                  # MotorCelda (2 o más robots) o ProcesoIO ([io] proceso)
+robot_activo = None                 # nombre del robot que muestra/controla la GUI
+
+if len(CELDA) > 1 or IO_PROCESO:
+    if IO_PROCESO:
+        motor_celda = proceso_io.ProcesoIO(al_lote=al_lote_celda, al_evento=al_evento_celda,
+                                           capacidad=max(_n_registro, 1000))
+    else:
+        motor_celda = motor_async.MotorCelda(al_lote=al_lote_celda, al_evento=al_evento_celda)
+    for _nombre, _ip in (CELDA if len(CELDA) > 1 else [(ROBOT_IP, ROBOT_IP)]):
+        motor_celda.agregar(_nombre, _ip, receta=RTDE_RECETA, campos=RTDE_CAMPOS,
+                            frecuencia=RTDE_FRECUENCIA, respaldo=RTDE_RESPALDO,
+                            ruta_recetas=CONFIG_FILE, ttl=AJUSTES.getfloat("dashboard", "ttl"))
+    robot_activo = next(iter(motor_celda.robots))
+    conexion_ur = motor_celda.urscript(robot_activo)
+    cliente_dashboard = motor_celda.dashboard(robot_activo)
+else:
+    conexion_ur = interfaz_secundaria.ConexionSecundaria(ROBOT_IP, PORT_URSCRIPT, al_evento=al_evento_robot)
+    cliente_dashboard = dashboard.ClienteDashboard(ROBOT_IP, PORT_DASHBOARD, ttl=AJUSTES.getfloat("dashboard", "ttl"))
+
+_conexiones_rtde = 0                # conexiones RTDE establecidas (un robot, sin motor)
+
+
+def conexiones_enlaces() -> dict:
+    """Colector de `metricas.CONEXIONES`: {(robot, enlace): conexiones establecidas}."""
+    if motor_celda is not None:
+        return {(n, e): v for n, c in motor_celda.conexiones().items() for e, v in c.items()}
+    return {(ROBOT_IP, "rtde"): _conexiones_rtde,
+            (ROBOT_IP, "urscript"): conexion_ur.reconexiones,
+            (ROBOT_IP, "dashboard"): cliente_dashboard.reconexiones}
+
+
+metricas.CONEXIONES.funcion = conexiones_enlaces
+monitor_rtde = metricas.MonitorRTDE(ROBOT_IP) if motor_celda is None else None   # con motor: uno por robot
+
+
+@trazas.trazar("urscript.enviar", "urscript")
 def send_urscript(command: str) -> None:
     """
     ============================================================
     FUNCIÓN: send_urscript(command)
     ------------------------------------------------------------
-    Envía un comando URScript al robot mediante un socket TCP 
-    en el puerto 30002 (puerto estándar de ejecución directa).
+    Envía un comando URScript al robot por la conexión
+    persistente al puerto 30002 (puerto estándar de ejecución
+    directa), reconectando si es necesario.
 
         Parámetros:
             command (str): texto URScript a ejecutar en el robot.
@@ -115,14 +225,68 @@ def send_urscript(command: str) -> None:
             Muestra un messagebox en caso de fallo de conexión o envío.
     ============================================================
     """
+    t0 = time.perf_counter()
     try:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.connect((ROBOT_IP, PORT_URSCRIPT))
-            s.send((command + "\n").encode("utf-8"))
+        conexion_ur.enviar(command)
+        metricas.URSCRIPT_ENVIO.observar(time.perf_counter() - t0, robot=robot_activo or ROBOT_IP)
     except Exception as e:
         messagebox.showerror("Error URScript", f"No se pudo enviar comando: {e}")
 
 
+def enviar_accion(command: str, comando: int, valor: int = 0) -> None:
+    """Acción directa por el programa residente si está vivo y libre (no lo reemplaza); si no, `send_urscript`."""
+    if residente is not None and residente.vivo and not residente.ejecutando:
+        try:
+            residente.comando(comando, valor)
+            return
+        except OSError:
+            pass
+    send_urscript(command)
+
+
+@trazas.trazar("gui.evento_robot", "gui")
+def mostrar_evento_robot(evento: dict) -> None:
+    """
+    ============================================================
+    FUNCIÓN: mostrar_evento_robot(evento)
+    ------------------------------------------------------------
+    Refleja en la GUI los eventos del flujo de estado de 30002
+    (ver `interfaz_secundaria.ParserSecundario`).
+
+        Parámetros:
+            evento (dict): evento del parser.
+        Retorna:
+            None
+        Notas:
+            - Excepciones de ejecución: etiqueta + messagebox con
+            línea/columna, para saber por qué se detuvo la rutina.
+            - Modo: solo se muestran estados anómalos (parada
+            protectiva, emergencia, robot no en marcha), para no
+            tapar el estado Freedrive.
+    ============================================================
+    """
+    tipo = evento["tipo"]
+    robot = f"{evento['robot']}: " if "robot" in evento else ""
+    if tipo == "excepcion":
+        estadoCobot.configure(text=f" {robot}Excepción línea {evento['linea']} ", bootstyle="inverse-danger")
+        messagebox.showerror("Excepción en el robot",
+                             f"{robot}Línea {evento['linea']}, columna {evento['columna']}:\n{evento['texto']}")
+    elif tipo == "error":
+        estadoCobot.configure(text=f" {robot}Error C{evento['codigo']}A{evento['argumento']} ", bootstyle="inverse-danger")
+        print(f"[30002] {robot}C{evento['codigo']}A{evento['argumento']}: {evento['texto']}")
+    elif tipo == "modo":
+        if evento["emergencia"]:
+            estadoCobot.configure(text=" Parada de emergencia ", bootstyle="inverse-danger")
+        elif evento["parada_protectiva"]:
+            estadoCobot.configure(text=" Parada protectiva ", bootstyle="inverse-danger")
+        elif evento["modo"] != 7:
+            estadoCobot.configure(text=f" Robot {evento['modo_txt'].lower()} ", bootstyle="inverse-warning")
+        elif evento["pausado"]:
+            estadoCobot.configure(text=" Programa en pausa ", bootstyle="inverse-warning")
+    elif tipo in ("texto", "clave"):
+        print(f"[30002] {evento.get('titulo', '')} {evento['texto']}".strip())
+
+
 # Acciones directas
 def activar_freedrive():
     """
@@ -137,10 +301,11 @@ def activar_freedrive():
         Retorna:
             None
         Notas:
-            Envía el comando definido en `urscripts.s_liberar_motores`.
+            Envía el comando definido en `urscripts.s_liberar_motores`
+            (o lo pide al programa residente, ver `enviar_accion`).
     ============================================================
     """
-    send_urscript(urscripts.s_liberar_motores)
+    enviar_accion(urscripts.s_liberar_motores, programa_residente.CMD_FREEDRIVE, 1)
 
 
 def alinear():
@@ -167,18 +332,99 @@ def detener():
     ============================================================
     FUNCIÓN: detener()
     ------------------------------------------------------------
-    Detiene el movimiento actual del robot de forma segura.
+    Detiene el programa en curso del robot.
 
         Parámetros:
             Ninguno
         Retorna:
             None
         Notas:
-            Envía `urscripts.s_detener` al puerto URScript.
+            - Usa `stop` del Dashboard Server (conexión persistente).
+            - Si el Dashboard no responde, envía `urscripts.s_detener`
+            al puerto URScript como antes; si responde sin "Stopped"
+            (rechazado, control local) también lo envía y avisa.
+            - Corta el emisor de la rutina por bloques, si hay uno.
+            - El `stop` termina también el programa residente (la
+            próxima ejecución lo vuelve a subir con la tabla completa).
     ============================================================
     """
 
-    send_urscript(urscripts.s_detener)
+    if residente is not None:
+        residente.soltar()
+    try:
+        respuesta = cliente_dashboard.stop()
+    except OSError:
+        send_urscript(urscripts.s_detener)
+    else:
+        if not respuesta.startswith("Stopped"):
+            send_urscript(urscripts.s_detener)
+            messagebox.showwarning("Detener", f"El Dashboard no detuvo el programa:\n{respuesta}\n\n"
+                                   "Se envió la parada por URScript; verifique que el robot se detuvo.")
+    if emisor_bloques is not None:
+        emisor_bloques.cerrar()
+
+
+def desbloquear_parada():
+    """
+    ============================================================
+    FUNCIÓN: desbloquear_parada()
+    ------------------------------------------------------------
+    Libera una parada protectiva (`unlock protective stop` del
+    Dashboard Server).
+
+        Parámetros:
+            Ninguno
+        Retorna:
+            None
+        Errores:
+            Muestra un messagebox si el Dashboard no responde.
+    ============================================================
+    """
+
+    try:
+        cliente_dashboard.desbloquear_parada()
+    except OSError as e:
+        messagebox.showerror("Dashboard", f"No se pudo desbloquear: {e}")
+
+
+def sondear_dashboard_thread():
+    """
+    ============================================================
+    FUNCIÓN: sondear_dashboard_thread()
+    ------------------------------------------------------------
+    Hilo que consulta programa, modo y seguridad en UN viaje al
+    Dashboard Server y los publica en la GUI.
+
+        Parámetros:
+            Ninguno
+        Retorna:
+            None
+        Notas:
+            - Otros widgets pueden llamar `cliente_dashboard.estado()`
+            sin costo extra: la caché (TTL) sirve la misma respuesta.
+    ============================================================
+    """
+
+    periodo = AJUSTES.getfloat("dashboard", "sondeo")
+    while True:
+        try:
+            estado = cliente_dashboard.estado()
+        except OSError:
+            estado = None
+        ventana.after(0, mostrar_estado_dashboard, estado)
+        time.sleep(periodo)
+
+
+@trazas.trazar("gui.estado_dashboard", "gui")
+def mostrar_estado_dashboard(estado) -> None:
+    """Actualiza la etiqueta de programa/modo/seguridad (None = sin conexión)."""
+    if estado is None:
+        estadoPrograma.configure(text=" Dashboard sin conexión ", bootstyle="inverse-secondary")
+        return
+    normal = estado["seguridad"] == "NORMAL"
+    estadoPrograma.configure(text=f" Programa: {estado['programa']}  |  Robot: {estado['modo']}  |  "
+                                  f"Seguridad: {estado['seguridad']} ",
+                             bootstyle=("inverse-primary" if normal else "inverse-danger"))
 
 
 def abrir_pinza():
@@ -200,7 +446,7 @@ def abrir_pinza():
     """
 
     global gripper_status
-    send_urscript(urscripts.s_abrir_pinza)
+    enviar_accion(urscripts.s_abrir_pinza, programa_residente.CMD_PINZA, ejecucion_bloques.OP_ABRIR)
     estadoGrippper.configure(text="Abierto", bootstyle="inverse-info")
     gripper_status = True
 
@@ -224,7 +470,7 @@ def cerrar_pinza():
     """
 
     global gripper_status
-    send_urscript(urscripts.s_cerrar_pinza)
+    enviar_accion(urscripts.s_cerrar_pinza, programa_residente.CMD_PINZA, ejecucion_bloques.OP_CERRAR)
     estadoGrippper.configure(text="Cerrado", bootstyle="inverse-warning")
     gripper_status = False
 
@@ -239,13 +485,15 @@ def cerrar_pinza():
 # ▼▼========================================================▼▼
 #   ⮞ 05 Conexión RTDE
 # ------------------------------------------------------------
+@trazas.trazar("rtde.conectar", "rtde")
 def rtde_connect() -> bool:
     """
     ============================================================
     FUNCIÓN: rtde_connect()
     ------------------------------------------------------------
     Establece la conexión RTDE con el robot, configurando la 
-    receta 'state' para recibir datos de posición TCP y estado.
+    receta/campos y frecuencia de `estacion.ini` para recibir
+    datos de posición TCP y estado.
 
         Parámetros:
             Ninguno
@@ -253,73 +501,237 @@ def rtde_connect() -> bool:
             bool: True si la conexión fue exitosa, False en caso contrario.
         Errores:
             Muestra un messagebox en caso de fallo de conexión o configuración.
+        Notas:
+            - Si `send_output_setup` rechaza la combinación pedida se
+            prueba a 125 Hz y luego la receta de respaldo.
+            - Si falla, `read_rtde_thread` sigue reintentando en
+            segundo plano (sin diálogos).
     ============================================================
     """
 
-    global con_rtde, rtde_ok
     try:
-        conf = rtde_config.ConfigFile(CONFIG_FILE)
-        state_names, state_types = conf.get_recipe("state")
-
-        con_rtde = rtde.RTDE(ROBOT_IP, PORT_RTDE)
-        con_rtde.connect()
-
-        if not con_rtde.send_output_setup(state_names, state_types, frequency=125):
-            messagebox.showerror("Error", "No se pudo configurar la salida RTDE")
-            con_rtde.disconnect(); con_rtde = None; rtde_ok = False
-            return False
-
-        if not con_rtde.send_start():
-            messagebox.showerror("Error", "No se pudo iniciar la sincronización RTDE")
-            con_rtde.disconnect(); con_rtde = None; rtde_ok = False
-            return False
-
-        rtde_ok = True
+        abrir_rtde()
         return True
-
     except Exception as e:
         messagebox.showerror("Error de conexión", f"No se pudo conectar con el robot:\n{e}")
-        con_rtde = None; rtde_ok = False
         return False
 
 
+def abrir_rtde() -> None:
+    """Abre y configura RTDE (ver `rtde_connect`); lanza la excepción en vez de mostrar un diálogo."""
+    global con_rtde, rtde_ok, rtde_salida, lector_rtde, _conexiones_rtde
+    cerrar_rtde()
+    conf = rtde_config.ConfigFile(CONFIG_FILE)
+    con = rtde.RTDE(ROBOT_IP, PORT_RTDE)
+    con.connect()
+    try:
+        salida = rtde_flujo.configurar_salida(con, conf, RTDE_RECETA, RTDE_CAMPOS,
+                                              RTDE_FRECUENCIA, RTDE_RESPALDO)
+        if salida is None:
+            raise ConnectionError("No se pudo configurar la salida RTDE")
+        if salida[0] != RTDE_RECETA or salida[3] != RTDE_FRECUENCIA:
+            print(f"[RTDE] respaldo: receta '{salida[0]}' a {salida[3]:.0f} Hz "
+                  f"(solicitado '{RTDE_RECETA}' a {RTDE_FRECUENCIA:.0f} Hz)")
+        if not con.send_start():
+            raise ConnectionError("No se pudo iniciar la sincronización RTDE")
+    except Exception:
+        con.disconnect()
+        raise
+
+    lector = None
+    if RTDE_RAPIDO:
+        try:
+            lector = rtde_rapido.desde_conexion(con)
+        except (AttributeError, KeyError) as e:
+            print(f"[RTDE] decodificador rápido no disponible ({e}); se usa receive()")
+
+    con_rtde, rtde_salida, lector_rtde = con, salida, lector
+    rtde_ok = True
+    _conexiones_rtde += 1
+    monitor_rtde.frecuencia = salida[3]
+
+
+def cerrar_rtde() -> None:
+    """Cierra la conexión RTDE actual (si hay) sin avisar."""
+    global con_rtde, rtde_ok, lector_rtde
+    con, con_rtde, lector_rtde, rtde_ok = con_rtde, None, None, False
+    if con is not None:
+        try:
+            con.disconnect()
+        except Exception:
+            pass
+
+
 def read_rtde_thread():
     """
     ============================================================
     FUNCIÓN: read_rtde_thread()
     ------------------------------------------------------------
     Hilo en segundo plano que lee continuamente el estado RTDE 
-    del robot, actualizando posición TCP y estado Freedrive.
+    del robot y lo reparte a los consumidores suscritos.
 
         Parámetros:
             Ninguno
         Retorna:
             None
         Notas:
-            - Ejecuta en bucle con retardo corto (0.01 s).
-            - Actualiza visualmente el color del botón Freedrive 
-            y la etiqueta de estado del cobot.
+            - `receive()` bloquea hasta el siguiente paquete: no se
+            duerme entre lecturas para no acumular atraso a 500 Hz.
+            - Con `lector_rtde` se drenan todos los paquetes
+            encolados por despertar y se decodifican en un lote.
+            - `tcp_pos` y el registro reciben la tasa completa; la
+            GUI se actualiza decimada a `GUI_HZ`.
+            - Cada iteración traza por separado la espera
+            ("rtde.recibir") y el reparto ("rtde.publicar").
+            - Si la conexión se cae (o no se pudo abrir) reintenta
+            `abrir_rtde()` cada RTDE_REINTENTO_S.
     ============================================================
     """
 
     global tcp_pos
+    avisado = False                     # un aviso por caída, no uno por reintento
     while True:
         if con_rtde is None:
-            time.sleep(0.2)
+            try:
+                abrir_rtde()
+                print(f"[RTDE] conectado a {ROBOT_IP}")
+                avisado = False
+            except Exception as e:
+                if not avisado:
+                    print(f"[RTDE] sin conexión ({e}); reintento cada {RTDE_REINTENTO_S:g} s")
+                    avisado = True
+                time.sleep(RTDE_REINTENTO_S)
             continue
 
-        state = con_rtde.receive()
+        try:
+            if lector_rtde is not None:
+                with trazas.tramo("rtde.recibir", "rtde"):
+                    lote = lector_rtde.recibir_lote(1.0)
+                if lote is not None and len(lote):
+                    with trazas.tramo("rtde.publicar", "rtde", n=len(lote)):
+                        if "actual_TCP_pose" in lote.dtype.names:
+                            tcp_pos = lote[-1].actual_TCP_pose.tolist()
+                        distribuidor_rtde.publicar_lote(lote)
+                continue
+
+            with trazas.tramo("rtde.recibir", "rtde"):
+                state = con_rtde.receive()
+            if state is None and not con_rtde.is_connected():
+                raise ConnectionError("RTDE: conexión cerrada por el robot")
+        except Exception as e:          # conexión cerrada, error de socket, paquete corrupto
+            print(f"[RTDE] {e}; reconectando")
+            cerrar_rtde()
+            time.sleep(RTDE_REINTENTO_S)
+            continue
         if state:
-            tcp_pos = state.actual_TCP_pose
-            s = state.robot_status_bits
-            # 1/3 -> freedrive off ; 5/7 -> freedrive on (heurística simple)
-            if (s == 1 or s == 3):
-                estadoCobot.configure(text="   Freedrive desactivado ", bootstyle="inverse-danger")
-                style.configure("Free.TButton", font=("Arial", font1, "bold"), foreground="#404040", background="#ffffff", borderwidth=0)
-            if (s == 7 or s == 5):
-                estadoCobot.configure(text="   Freedrive activado    ", bootstyle="inverse-info")
-                style.configure("Free.TButton", font=("Arial", font1, "bold"), foreground="#404040", background="#6cc3d5", borderwidth=0)
-        time.sleep(0.01)  # evitar saturar CPU
+            with trazas.tramo("rtde.publicar", "rtde", n=1):
+                tcp_pos = getattr(state, "actual_TCP_pose", tcp_pos)
+                distribuidor_rtde.publicar(state)
+
+
+_ultimo_status_bits = None
+
+
+@trazas.trazar("gui.estado_rtde", "gui")
+def actualizar_estado_gui(state):
+    """
+    ============================================================
+    FUNCIÓN: actualizar_estado_gui(state)
+    ------------------------------------------------------------
+    Consumidor decimado (GUI_HZ) que refleja el estado Freedrive
+    en la etiqueta del cobot y en el estilo del botón.
+
+        Parámetros:
+            state: paquete RTDE recibido.
+        Retorna:
+            None
+        Notas:
+            - Solo reconfigura widgets cuando cambia el estado.
+    ============================================================
+    """
+
+    global _ultimo_status_bits
+    s = getattr(state, "robot_status_bits", None)
+    if s is None or s == _ultimo_status_bits:
+        return
+    _ultimo_status_bits = s
+    # 1/3 -> freedrive off ; 5/7 -> freedrive on (heurística simple)
+    if (s == 1 or s == 3):
+        estadoCobot.configure(text="   Freedrive desactivado ", bootstyle="inverse-danger")
+        style.configure("Free.TButton", font=("Arial", font1, "bold"), foreground="#404040", background="#ffffff", borderwidth=0)
+    if (s == 7 or s == 5):
+        estadoCobot.configure(text="   Freedrive activado    ", bootstyle="inverse-info")
+        style.configure("Free.TButton", font=("Arial", font1, "bold"), foreground="#404040", background="#6cc3d5", borderwidth=0)
+
+
+@trazas.trazar("gui.enlace", "gui")
+def refrescar_enlace() -> None:
+    """
+    ============================================================
+    FUNCIÓN: refrescar_enlace()
+    ------------------------------------------------------------
+    Cada 1 s (con `after`, aunque no lleguen paquetes) refleja en
+    `estadoConexion` la salud del flujo RTDE del robot activo.
+
+        Parámetros:
+            Ninguno
+        Retorna:
+            None
+        Notas:
+            - Verde: tasa real >= 90 % de la pedida; amarillo: menor,
+            con pérdidas recientes o en respaldo; rojo: sin datos o
+            sin conexión.
+            - Respaldo (otra receta, menos Hz o `receive()` en vez
+            del decodificador rápido): "respaldo" en la etiqueta y un
+            aviso la primera vez (el ejecutable no tiene consola).
+            - Actualiza también la frecuencia de cada monitor.
+    ============================================================
+    """
+
+    global _perdidos_previos
+    if motor_celda is not None:
+        for nombre in motor_celda.robots:
+            salida = motor_celda.salida(nombre)
+            monitor = metricas.MONITORES.get(nombre) or metricas.MonitorRTDE(nombre)
+            monitor.frecuencia = salida[3] if salida else 0.0
+        salida = motor_celda.salida(robot_activo)
+        monitor = metricas.MONITORES[robot_activo]
+    else:
+        salida, monitor = rtde_salida, monitor_rtde
+
+    perdidos = metricas.RTDE_PERDIDOS.valor(robot=monitor.robot)
+    nuevos_perdidos, _perdidos_previos = perdidos - _perdidos_previos, perdidos
+    tasa = monitor.tasa()
+    if salida is None or (motor_celda is None and not rtde_ok):
+        estadoConexion.configure(text=" Desconectado ", bootstyle="inverse-danger")
+    elif tasa == 0.0:
+        estadoConexion.configure(text=" Sin datos RTDE ", bootstyle="inverse-danger")
+    else:
+        pedida = salida[3]
+        respaldo = respaldo_rtde(salida)
+        texto = (f" {tasa:.0f}/{pedida:.0f} Hz" + (" respaldo" if respaldo else "")
+                 + (f"  -{nuevos_perdidos:.0f} paq " if nuevos_perdidos else " "))
+        estadoConexion.configure(text=texto, bootstyle=("inverse-success" if tasa >= 0.9 * pedida and not nuevos_perdidos
+                                                        and not respaldo else "inverse-warning"))
+        if respaldo and (monitor.robot, respaldo) not in _respaldos_avisados:
+            _respaldos_avisados.add((monitor.robot, respaldo))
+            messagebox.showwarning("RTDE", f"{monitor.robot}: {respaldo}")
+    ventana.after(1000, refrescar_enlace)
+
+
+def respaldo_rtde(salida) -> str:
+    """Descripción del respaldo RTDE en uso ("" si se obtuvo lo pedido en `estacion.ini`)."""
+    avisos = []
+    if salida[0] != RTDE_RECETA or salida[3] != RTDE_FRECUENCIA:
+        avisos.append(f"receta '{salida[0]}' a {salida[3]:.0f} Hz (solicitado '{RTDE_RECETA}' "
+                      f"a {RTDE_FRECUENCIA:.0f} Hz)")
+    if motor_celda is None and RTDE_RAPIDO and con_rtde is not None and lector_rtde is None:
+        avisos.append("decodificador rápido no disponible; se usa receive()")
+    return "; ".join(avisos)
+
+
+_perdidos_previos = 0
+_respaldos_avisados = set()             # (robot, aviso) ya mostrados en un messagebox
 
 # ▲▲========================================================▲▲
 
@@ -331,6 +743,65 @@ def read_rtde_thread():
 # ▼▼========================================================▼▼
 #   ⮞ 06 Gestión de poses y acciones
 # ------------------------------------------------------------
+def formatear_paso(paso: dict) -> str:
+    """
+    ============================================================
+    FUNCIÓN: formatear_paso(paso)
+    ------------------------------------------------------------
+    Devuelve la línea de texto con la que un paso se muestra en
+    el cuadro de rutina.
+
+        Parámetros:
+            paso (dict): elemento de `lista_instrucciones`.
+        Retorna:
+            str: línea formateada (poses en mm y rad).
+    ============================================================
+    """
+    if paso.get("tipo") == "pose":
+        pose = paso["pose"]
+        pos_fmt = [round(pose[0]*1000, 1),
+                   round(pose[1]*1000, 1),
+                   round(pose[2]*1000, 1),
+                   round(pose[3], 3),
+                   round(pose[4], 3),
+                   round(pose[5], 3)]
+        return f". -> {pos_fmt}"
+    if paso.get("tipo") == "patron":
+        n_x, n_y, n_z = paso["n"]
+        return f". -> Patrón {n_x}x{n_y}x{n_z} ({n_x * n_y * n_z} celdas)"
+    if paso.get("tipo") == "trayectoria":
+        return f". -> Trayectoria {paso['origen']} ({len(paso['poses'])} puntos)"
+    return f". -> {paso.get('accion')} gripper"
+
+
+@trazas.trazar("gui.txt_posiciones", "gui")
+def refrescar_txt_posiciones():
+    """Reconstruye el cuadro de rutina a partir de `lista_instrucciones`."""
+    txt_posiciones.delete("1.0", tk.END)
+    if lista_instrucciones:
+        txt_posiciones.insert(tk.END, "\n".join(formatear_paso(p) for p in lista_instrucciones) + "\n")
+    txt_posiciones.see(tk.END)
+    refrescar_vista_ruta()
+
+
+def refrescar_vista_ruta() -> None:
+    """Redibuja la ruta proyectada del panel TCP tras modificar `lista_instrucciones`."""
+    if panel_tcp is not None:
+        panel_tcp.fijar_ruta(lista_instrucciones)
+
+
+def pose_actual() -> list:
+    """Pose TCP más reciente (con E/S en otro proceso, leída en el lugar de la memoria compartida)."""
+    if isinstance(motor_celda, proceso_io.ProcesoIO):
+        try:
+            pose = motor_celda.leer(robot_activo, lambda fila: fila.actual_TCP_pose.tolist())
+        except AttributeError:
+            pose = None                 # la receta no trae actual_TCP_pose
+        if pose is not None:
+            return pose
+    return list(tcp_pos)
+
+
 def guardar_posicion():
     """
     ============================================================
@@ -350,22 +821,16 @@ def guardar_posicion():
     """
 
     global tcp_pos, posiciones_guardadas, lista_instrucciones
-    send_urscript(urscripts.s_no_liberar)
+    enviar_accion(urscripts.s_no_liberar, programa_residente.CMD_FREEDRIVE, 0)
 
     # Guardado interno
-    pos_actual = list(tcp_pos)
+    pos_actual = pose_actual()
     posiciones_guardadas.append(pos_actual)
     lista_instrucciones.append({"tipo": "pose", "pose": pos_actual})
 
-    # Formateo para mostrar (mm y rad)
-    pos_fmt = [round(pos_actual[0]*1000, 1),
-               round(pos_actual[1]*1000, 1),
-               round(pos_actual[2]*1000, 1),
-               round(pos_actual[3], 3),
-               round(pos_actual[4], 3),
-               round(pos_actual[5], 3)]
-    txt_posiciones.insert(tk.END, f". -> {pos_fmt}\n")
+    txt_posiciones.insert(tk.END, formatear_paso(lista_instrucciones[-1]) + "\n")
     txt_posiciones.see(tk.END)
+    refrescar_vista_ruta()
 
 
 def guardar_accion_gripper():
@@ -391,35 +856,39 @@ def guardar_accion_gripper():
     estadoCobot.configure(text=("Abierto" if accion == "Abrir" else "Cerrado"),
                           bootstyle=("inverse-info" if accion == "Abrir" else "inverse-warning"))
     lista_instrucciones.append({"tipo": "gripper", "accion": accion})
-    txt_posiciones.insert(tk.END, f". -> {accion} gripper\n")
+    txt_posiciones.insert(tk.END, formatear_paso(lista_instrucciones[-1]) + "\n")
     txt_posiciones.see(tk.END)
 
 
-def ejecutar_rutina():
+@trazas.trazar("rutina.construir", "rutina")
+def construir_script_rutina():
     """
     ============================================================
-    FUNCIÓN: ejecutar_rutina()
+    FUNCIÓN: construir_script_rutina()
     ------------------------------------------------------------
     Construye un programa URScript completo a partir de la lista 
-    de instrucciones (poses + acciones) y lo envía al robot.
+    de instrucciones (poses + acciones + patrones).
 
         Parámetros:
             Ninguno
         Retorna:
-            None
+            str | None: programa, o None si no hay pasos (avisa).
         Notas:
+            - Registra tamaño y tiempo de construcción en `metricas`.
             - Cada pose genera un bloque `movej()`.
             - Cada acción de gripper genera un comando `rq_*()`.
+            - Cada trayectoria importada genera un `movel` por punto.
             - Inserta pausas cortas entre pasos.
     ============================================================
     """
 
     if not lista_instrucciones:
         messagebox.showwarning("Atención", "No hay pasos guardados (poses/acciones)." )
-        return
+        return None
 
+    t0 = time.perf_counter()
     script_lines = []
-    for paso in lista_instrucciones:
+    for indice, paso in enumerate(lista_instrucciones):
         if paso.get("tipo") == "pose":
             x, y, z, Rx, Ry, Rz = paso["pose"]
                                     # Modificar aqui  si se quiere que los moviemientos sean movej o movel
@@ -431,12 +900,455 @@ def ejecutar_rutina():
             else:
                 script_lines.append("    rq_close_and_classify()")
             script_lines.append("    sleep(0.05)")
+        elif paso.get("tipo") == "patron":
+            script_lines.extend(paletizado.compilar_patron(paso, indice))
+            script_lines.append("    sleep(0.05)")
+        elif paso.get("tipo") == "trayectoria":
+            script_lines.extend(trayectorias.compilar_trayectoria(paso))
+            script_lines.append("    sleep(0.05)")
 
     script_lines.append("end")
     script_lines.append("cearInacap()")
 
     full_script = urscripts.s_cobotStart + "\n" + "\n".join(script_lines)
-    send_urscript(full_script)
+    metricas.RUTINA_CONSTRUCCION.observar(time.perf_counter() - t0)
+    metricas.RUTINA_BYTES.fijar(len(full_script.encode("utf-8")))
+    return full_script
+
+
+def usar_bloques() -> bool:
+    """True si la rutina va por bloques: [bloques] modo = si, o auto y más de `umbral` registros."""
+    modo = AJUSTES.get("bloques", "modo")
+    if modo == "auto":
+        return ejecucion_bloques.contar_registros(lista_instrucciones) > AJUSTES.getint("bloques", "umbral")
+    return AJUSTES.getboolean("bloques", "modo")
+
+
+@trazas.trazar("rutina.bloques", "rutina")
+def preparar_rutina_bloques(ips: list):
+    """
+    ============================================================
+    FUNCIÓN: preparar_rutina_bloques(ips)
+    ------------------------------------------------------------
+    Ejecución por bloques: levanta el emisor con una copia de la
+    rutina y construye el programa receptor (tamaño constante).
+
+        Parámetros:
+            ips (list[str]): robots que van a conectarse (celda); el
+            emisor rechaza conexiones de otras direcciones. El primero
+            elige la IP del PC.
+        Retorna:
+            str | None: programa a enviar, o None si no hay pasos o
+            no se pudo abrir el puerto (avisa).
+        Notas:
+            - Los bloques se calculan y envían mientras el robot se
+            mueve (ver `ejecucion_bloques.py`); la GUI puede seguir
+            editando la rutina sin afectar la ejecución en curso.
+            - Ajustes en la sección [bloques] de `estacion.ini`.
+    ============================================================
+    """
+
+    global emisor_bloques
+    if not lista_instrucciones:
+        messagebox.showwarning("Atención", "No hay pasos guardados (poses/acciones)." )
+        return None
+
+    conf = AJUSTES["bloques"]
+    tamano = conf.getint("tamano")
+    pasos = list(lista_instrucciones)
+    if emisor_bloques is not None:
+        emisor_bloques.cerrar()
+    try:
+        emisor_bloques = ejecucion_bloques.EmisorBloques(
+            lambda: ejecucion_bloques.bloques(pasos, tamano), puerto=conf.getint("puerto"),
+            ventana=conf.getint("ventana"), conexiones=len(ips), permitidos=ips, al_terminar=al_terminar_bloques)
+        host = conf.get("host") or ejecucion_bloques.host_local(ips[0])
+    except OSError as e:
+        emisor_bloques = None
+        messagebox.showerror("Rutina por bloques", f"No se pudo abrir el puerto {conf.get('puerto')}:\n{e}")
+        return None
+
+    lineas = ejecucion_bloques.compilar_receptor(host, emisor_bloques.puerto, tamano)
+    full_script = urscripts.s_cobotStart + "\n" + "\n".join(lineas + ["end", "cearInacap()"])
+    metricas.RUTINA_BYTES.fijar(len(full_script.encode("utf-8")))
+    return full_script
+
+
+def al_terminar_bloques(ip: str, error) -> None:
+    """Fin de la rutina por bloques en un robot (hilo del emisor)."""
+    if error is None:
+        print(f"[bloques] {ip}: rutina completa")
+    elif "ventana" in globals():
+        ventana.after(0, lambda: messagebox.showerror("Rutina por bloques", f"{ip or 'robot'}: {error}"))
+
+
+def usar_residente() -> bool:
+    """True si la rutina va por el programa residente: [residente] activo, el robot no falló antes
+    en esta sesión, cabe en `capacidad_max` y [bloques] modo no fuerza los bloques."""
+    if not AJUSTES.getboolean("residente", "activo") or AJUSTES.get("bloques", "modo") != "auto" and usar_bloques():
+        return False
+    if dict(CELDA).get(robot_activo, ROBOT_IP) in residente_fallido:
+        return False
+    return 0 < ejecucion_bloques.contar_registros(lista_instrucciones) <= AJUSTES.getint("residente", "capacidad_max")
+
+
+@trazas.trazar("rutina.residente", "rutina")
+def ejecutar_rutina_residente() -> None:
+    """
+    ============================================================
+    FUNCIÓN: ejecutar_rutina_residente()
+    ------------------------------------------------------------
+    Ejecuta la rutina con el programa residente: lo sube solo si
+    no está vivo (o la tabla no cabe) y después envía únicamente
+    las entradas de la tabla que cambiaron desde la última vez.
+
+        Parámetros:
+            Ninguno
+        Retorna:
+            None
+        Notas:
+            - La subida y la sincronización corren en un hilo; si el
+            residente no se conecta (firewall, `[bloques] host`
+            incorrecto) se envía el programa completo como antes y
+            ese robot no vuelve a intentarlo en la sesión
+            (`residente_fallido`), para no esperar ESPERA_S en cada
+            Ejecutar.
+            - Entre ejecuciones el residente queda en espera: el
+            controlador lo muestra como programa en marcha.
+            - Ajustes en la sección [residente] de `estacion.ini`.
+    ============================================================
+    """
+
+    global residente
+    conf = AJUSTES["residente"]
+    try:
+        if residente is None:
+            residente = programa_residente.ProgramaResidente(conf.getint("puerto"), al_terminar=al_terminar_residente)
+        ip = dict(CELDA).get(robot_activo, ROBOT_IP)
+        residente.permitir([ip])        # solo el robot activo puede conectarse
+        host = AJUSTES.get("bloques", "host") or ejecucion_bloques.host_local(ip)
+    except OSError as e:
+        messagebox.showerror("Programa residente", f"No se pudo abrir el puerto {conf.get('puerto')}:\n{e}")
+        return
+
+    t0 = time.perf_counter()
+    tabla, inicios = programa_residente.construir_tabla(lista_instrucciones)
+    metricas.RUTINA_CONSTRUCCION.observar(time.perf_counter() - t0)
+
+    full_script = None
+    if residente.ejecutando or not residente.vivo or residente.capacidad < len(tabla):
+        residente.soltar()
+        capacidad = min(max(2 * len(tabla), programa_residente.CAPACIDAD_MIN), conf.getint("capacidad_max"))
+        lineas = programa_residente.compilar_residente(host, residente.puerto, capacidad)
+        full_script = urscripts.s_cobotStart + "\n" + "\n".join(lineas + ["end", "cearInacap()"])
+    threading.Thread(target=ejecutar_residente_thread, args=(tabla, inicios, full_script, ip), daemon=True).start()
+
+
+def ejecutar_residente_thread(tabla, inicios, full_script, ip) -> None:
+    """Hilo de `ejecutar_rutina_residente`: sube el residente si hace falta, sincroniza la tabla y ejecuta."""
+    try:
+        if full_script is not None:
+            previas = residente.conexiones
+            ventana.after(0, send_urscript, full_script)
+            if not residente.esperar(previas, programa_residente.ESPERA_S):
+                print(f"[residente] {ip} no se conectó; se envía el programa completo (sin residente el resto de la sesión)")
+                residente_fallido.add(ip)
+                ventana.after(0, ejecutar_rutina_completa)
+                return
+        tramos = residente.sincronizar(tabla)
+        pasos = programa_residente.pasos_cambiados(inicios, tramos)
+        metricas.RUTINA_BYTES.fijar(residente.ultimo_envio + len((full_script or "").encode("utf-8")))
+        print(f"[residente] {len(pasos)} paso(s) actualizados, {residente.ultimo_envio} bytes")
+        residente.ejecutar()
+    except (OSError, ValueError) as e:
+        mensaje = str(e)
+        ventana.after(0, lambda: messagebox.showerror("Programa residente", mensaje))
+
+
+def al_terminar_residente(error) -> None:
+    """Fin de una ejecución del programa residente (hilo lector)."""
+    if error is None:
+        print("[residente] rutina completa")
+    elif "ventana" in globals():
+        ventana.after(0, lambda: messagebox.showerror("Programa residente", str(error)))
+
+
+@trazas.trazar("rutina.ejecutar", "rutina")
+def ejecutar_rutina():
+    """Ejecuta la rutina en el robot (el activo, en una celda): con el programa residente si `usar_residente()`."""
+    if usar_residente():
+        ejecutar_rutina_residente()
+    else:
+        ejecutar_rutina_completa()
+
+
+def ejecutar_rutina_completa():
+    """Envía la rutina como programa (por bloques si `usar_bloques()`)."""
+    if usar_bloques():
+        full_script = preparar_rutina_bloques([dict(CELDA).get(robot_activo, ROBOT_IP)])
+    else:
+        full_script = construir_script_rutina()
+    if full_script is not None:
+        send_urscript(full_script)
+
+
+@trazas.trazar("rutina.difundir", "rutina")
+def difundir_rutina():
+    """
+    ============================================================
+    FUNCIÓN: difundir_rutina()
+    ------------------------------------------------------------
+    Envía la misma rutina a todos los robots de la celda en
+    paralelo (un único viaje por robot desde el motor).
+
+        Parámetros:
+            Ninguno
+        Retorna:
+            None
+        Errores:
+            Muestra un messagebox con los robots que fallaron.
+        Notas:
+            - Por bloques, un solo emisor atiende a todos los robots
+            (cada uno con su propio avance).
+    ============================================================
+    """
+
+    if usar_bloques():
+        full_script = preparar_rutina_bloques([dict(CELDA).get(n, ROBOT_IP) for n in motor_celda.robots])
+    else:
+        full_script = construir_script_rutina()
+    if full_script is None:
+        return
+    t0 = time.perf_counter()
+    resultados = motor_celda.difundir(full_script)
+    metricas.URSCRIPT_ENVIO.observar(time.perf_counter() - t0, robot="todos")
+    fallos = [f"{nombre}: {error}" for nombre, error in resultados.items() if error is not None]
+    if fallos:
+        messagebox.showerror("Error URScript", "No se pudo enviar a:\n" + "\n".join(fallos))
+
+
+def seleccionar_robot(event=None) -> None:
+    """Cambia el robot que muestra y controla la GUI (celda multi-robot)."""
+    global robot_activo, conexion_ur, cliente_dashboard, _ultimo_status_bits
+    robot_activo = selector_robot.get()
+    conexion_ur = motor_celda.urscript(robot_activo)
+    cliente_dashboard = motor_celda.dashboard(robot_activo)
+    _ultimo_status_bits = None          # forzar refresco del estado Freedrive
+    if residente is not None:
+        residente.soltar()              # el residente quedó en el robot anterior
+    if panel_tcp is not None:
+        panel_tcp.limpiar()             # la tira muestra solo al robot activo
+    estadoCobot.configure(text=f" {robot_activo} ", bootstyle="inverse-primary")
+
+
+def alinear_rutina():
+    """
+    ============================================================
+    FUNCIÓN: alinear_rutina()
+    ------------------------------------------------------------
+    Alinea el eje Z de la herramienta de TODAS las poses guardadas
+    en una sola operación local (sin viajes al robot), antes de
+    ejecutar la rutina.
+
+        Parámetros:
+            Ninguno
+        Retorna:
+            None
+        Notas:
+            - Usa `poses.alinear_z` (rotación mínima hacia el eje ±Z
+            de la base más cercano), por lo que conserva el giro.
+            - Incluye las poses de esquina/recogida de los patrones
+            y todos los puntos de las trayectorias importadas.
+            - Actualiza `lista_instrucciones` y el cuadro de rutina.
+    ============================================================
+    """
+
+    # Referencias (paso, clave) a todas las poses de la rutina, incluidas las de patrones
+    refs = []
+    importadas = []
+    for paso in lista_instrucciones:
+        if paso.get("tipo") == "pose":
+            refs.append((paso, "pose"))
+        elif paso.get("tipo") == "patron":
+            refs += [(paso, clave) for clave in ("origen", "esq_x", "esq_y", "recoger") if paso.get(clave) is not None]
+        elif paso.get("tipo") == "trayectoria":
+            importadas.append(paso)
+    if not refs and not importadas:
+        messagebox.showwarning("Atención", "No hay poses guardadas para alinear.")
+        return
+
+    if refs:
+        alineadas = poses.alinear_z([paso[clave] for paso, clave in refs])
+        for (paso, clave), pose in zip(refs, alineadas):
+            paso[clave] = pose.tolist()
+    for paso in importadas:
+        paso["poses"] = poses.alinear_z(paso["poses"]).reshape(-1, 6)
+    refrescar_txt_posiciones()
+
+
+def guardar_patron():
+    """
+    ============================================================
+    FUNCIÓN: guardar_patron()
+    ------------------------------------------------------------
+    Convierte las últimas poses guardadas en un paso "patron"
+    (grilla N x M x K) que el robot recorre con un bucle.
+
+        Parámetros:
+            Ninguno
+        Retorna:
+            None
+        Notas:
+            - Usa las 3 últimas poses: origen, esquina X, esquina Y.
+            - Si la pose anterior también es pose, puede usarse como
+            pose de recogida (recoger → cerrar → dejar → abrir).
+            - Cantidades, altura de capa y aproximación se piden
+            por diálogo (mm). Cantidades: 2 o 3 enteros >= 1
+            (N x M o N x M x K); cualquier otra cosa se rechaza.
+    ============================================================
+    """
+
+    global lista_instrucciones
+    cola = 0
+    while cola < len(lista_instrucciones) and lista_instrucciones[-1 - cola].get("tipo") == "pose":
+        cola += 1
+    if cola < 3:
+        messagebox.showwarning("Atención", "Guarde 3 poses seguidas: origen, esquina X y esquina Y.")
+        return
+
+    texto = simpledialog.askstring("Patrón", "Cantidades N x M x K (ej. 4x3x1):", parent=ventana)
+    if not texto:
+        return
+    try:
+        n = [int(v) for v in texto.lower().replace(" ", "").split("x")]
+        if len(n) not in (2, 3) or min(n) < 1:
+            raise ValueError(texto)
+        n_x, n_y, n_z = (n + [1])[:3]
+    except ValueError:
+        messagebox.showerror("Error", f"Cantidades no válidas: {texto}")
+        return
+
+    altura_capa = 0.0
+    if n_z > 1:
+        altura_capa = simpledialog.askfloat("Patrón", "Altura de capa (mm):", parent=ventana) or 0.0
+    aproximacion = simpledialog.askfloat("Patrón", "Aproximación / retiro (mm):",
+                                         initialvalue=50.0, parent=ventana) or 0.0
+
+    origen, esq_x, esq_y = (p["pose"] for p in lista_instrucciones[-3:])
+    usa_recoger = cola >= 4 and messagebox.askyesno("Patrón", "¿Usar la pose anterior como pose de recogida?")
+    recoger = lista_instrucciones[-4]["pose"] if usa_recoger else None
+
+    try:
+        paso = paletizado.crear_patron(origen, esq_x, esq_y, n_x, n_y, n_z,
+                                       altura_capa=altura_capa / 1000, aproximacion=aproximacion / 1000,
+                                       recoger=recoger, accion=("Abrir" if gripper_status else "Cerrar"))
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return
+
+    lista_instrucciones = lista_instrucciones[:-(4 if usa_recoger else 3)] + [paso]
+    refrescar_txt_posiciones()
+
+
+def vista_previa_patron():
+    """
+    ============================================================
+    FUNCIÓN: vista_previa_patron()
+    ------------------------------------------------------------
+    Muestra en una ventana las poses generadas localmente por
+    los pasos "patron" de la rutina (mismo orden que el robot).
+
+        Parámetros:
+            Ninguno
+        Retorna:
+            None
+    ============================================================
+    """
+
+    patrones = [p for p in lista_instrucciones if p.get("tipo") == "patron"]
+    if not patrones:
+        messagebox.showinfo("Vista previa", "La rutina no tiene patrones.")
+        return
+
+    top = tb.Toplevel(ventana)
+    top.title("Vista previa de patrones")
+    txt = tk.Text(top, width=70, height=30)
+    txt.pack(fill="both", expand=True)
+    for paso in patrones:
+        txt.insert(tk.END, formatear_paso(paso) + "\n")
+        txt.insert(tk.END, "\n".join(paletizado.vista_previa(paso)) + "\n\n")
+    txt.configure(state="disabled")
+
+
+_importando = False                 # hay una importación en curso
+
+
+def importar_ruta():
+    """
+    ============================================================
+    FUNCIÓN: importar_ruta()
+    ------------------------------------------------------------
+    Agrega al final de la rutina una trayectoria generada fuera de
+    línea (CSV o G-code), leída y convertida en un hilo para no
+    congelar la GUI.
+
+        Parámetros:
+            Ninguno
+        Retorna:
+            None
+        Notas:
+            - El cero de pieza del G-code es la pose TCP actual:
+            llevar el TCP al cero de la pieza antes de importar.
+            - Unidades, alcance, velocidades y M-códigos en la
+            sección [importar] de `estacion.ini`.
+    ============================================================
+    """
+
+    global _importando
+    if _importando:
+        return
+    ruta = filedialog.askopenfilename(parent=ventana, title="Importar ruta",
+                                      filetypes=[("CSV / G-code", "*.csv *.txt *.nc *.ngc *.gcode *.tap"),
+                                                 ("Todos", "*.*")])
+    if not ruta:
+        return
+    _importando = True
+    btn_importar.configure(state="disabled")
+    threading.Thread(target=importar_ruta_thread, args=(ruta, pose_actual()), daemon=True).start()
+
+
+def importar_ruta_thread(ruta: str, origen: list) -> None:
+    """Hilo de `importar_ruta`: recorre la tubería de `trayectorias` y entrega los pasos a la GUI."""
+    conf = AJUSTES["importar"]
+
+    def progreso(lineas):
+        ventana.after(0, lambda: btn_importar.configure(text=f"Importando... {lineas:,} líneas"))
+
+    try:
+        pasos = list(trayectorias.importar(
+            ruta, origen=origen, unidades=conf.get("unidades"), angulos=conf.get("angulos"),
+            alcance=conf.getfloat("alcance"), mcodigos=ajustes.pares(conf.get("mcodigos")),
+            vel=conf.getfloat("vel"), vel_g0=conf.getfloat("vel_g0"), acel=conf.getfloat("acel"),
+            radio=conf.getfloat("radio"), tamano=conf.getint("bloque"), progreso=progreso))
+        error = None
+    except (OSError, ValueError) as e:
+        pasos, error = [], e
+    ventana.after(0, terminar_importacion, ruta, pasos, error)
+
+
+@trazas.trazar("rutina.importar", "rutina")
+def terminar_importacion(ruta: str, pasos: list, error) -> None:
+    """Agrega los pasos importados a la rutina (hilo de la GUI)."""
+    global _importando
+    _importando = False
+    btn_importar.configure(text="Importar ruta", state="normal")
+    if error is not None:
+        messagebox.showerror("Importar ruta", f"{os.path.basename(ruta)}:\n{error}")
+        return
+    lista_instrucciones.extend(pasos)
+    txt_posiciones.insert(tk.END, "".join(formatear_paso(p) + "\n" for p in pasos))
+    txt_posiciones.see(tk.END)
+    refrescar_vista_ruta()
 
 
 def borrar_posiciones():
@@ -458,6 +1370,7 @@ def borrar_posiciones():
     posiciones_guardadas.clear()
     lista_instrucciones.clear()
     txt_posiciones.delete("1.0", tk.END)
+    refrescar_vista_ruta()
 
 
 def borrar_ultimalinea():
@@ -484,6 +1397,7 @@ def borrar_ultimalinea():
         lines = lines[:-1]
         txt_posiciones.delete("1.0", tk.END)
         txt_posiciones.insert(tk.END, "\n".join(lines) + "\n")
+    refrescar_vista_ruta()
 
 
 # ▲▲========================================================▲▲
@@ -496,6 +1410,64 @@ def borrar_ultimalinea():
 # ▼▼========================================================▼▼
 #   ⮞ 07 Utilidades GUI
 # ------------------------------------------------------------
+def cargar_fondo(ancho: int, alto: int):
+    """
+    ============================================================
+    FUNCIÓN: cargar_fondo(ancho, alto)
+    ------------------------------------------------------------
+    Imagen de fondo al tamaño de la ventana.
+
+        Parámetros:
+            ancho, alto (int): tamaño de la ventana en píxeles.
+        Retorna:
+            PhotoImage: imagen lista para el canvas.
+        Notas:
+            - Si existe `fondo_<ancho>x<alto>.png` la decodifica Tk
+            directamente (~10 ms); si no, abre `fondo.png` y la
+            reescala con PIL (~0,4 s por el tamaño del original).
+    ============================================================
+    """
+    ruta = resource_path(FONDO_ESCALADO.format(ancho, alto))
+    if os.path.exists(ruta):
+        return tk.PhotoImage(file=ruta)
+    img = Image.open(os.path.join(BASE_DIR, FONDO_IMG)).resize((ancho, alto))
+    return ImageTk.PhotoImage(img)
+
+
+def medir_arranque(ruta: str, marcas: dict) -> None:
+    """
+    ============================================================
+    FUNCIÓN: medir_arranque(ruta, marcas)
+    ------------------------------------------------------------
+    Modo de medición del arranque (variable TALLER_ARRANQUE):
+    espera a que la ventana sea visible, escribe los tiempos en
+    `ruta` (JSON) y cierra la app.
+
+        Parámetros:
+            ruta (str): archivo JSON de salida.
+            marcas (dict): {etapa: time.time()} ya registradas.
+        Retorna:
+            None
+        Notas:
+            - Tiempos en s desde TALLER_ARRANQUE_T0 (epoch fijado
+            por quien lanza el proceso, ver
+            benchmarks/bench_arranque.py); sin ella, desde el
+            inicio del módulo.
+            - "modulo" incluye el arranque del intérprete (y del
+            bootloader en el ejecutable congelado).
+    ============================================================
+    """
+    ventana.wait_visibility()
+    ventana.update_idletasks()
+    marcas["visible"] = time.time()
+    t0 = float(os.environ.get("TALLER_ARRANQUE_T0", T_ARRANQUE))
+    datos = {"congelado": bool(getattr(sys, "frozen", False)), "modulo": round(T_ARRANQUE - t0, 4)}
+    datos.update((etapa, round(t - t0, 4)) for etapa, t in marcas.items())
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(datos, f)
+    ventana.destroy()
+
+
 def obtener_factor_escala(ventana) -> float:
     """
     ============================================================
@@ -514,8 +1486,42 @@ def obtener_factor_escala(ventana) -> float:
     return dpi / 96
 
 
+def alternar_trazas(event=None) -> None:
+    """F8: activa/desactiva el trazado en caliente."""
+    estado = trazas.alternar()
+    print(f"[trazas] {'activado' if estado else 'desactivado'} ({trazas.cantidad()} eventos en buffer)")
+    mostrar_trazas()
+
+
+def mostrar_trazas() -> None:
+    """`estadoTrazas` visible solo mientras se traza (el ejecutable no tiene consola)."""
+    if trazas.activo():
+        estadoTrazas.place(x=845, y=48, height=28, width=180)
+    else:
+        estadoTrazas.place_forget()
+
+
+def exportar_trazas(event=None) -> None:
+    """F9: guarda el buffer de trazas como JSON de Chrome Trace junto a estacion.ini."""
+    ruta = os.path.join(os.path.dirname(ajustes.ruta_ajustes()), time.strftime("trazas_%Y%m%d_%H%M%S.json"))
+    try:
+        n = trazas.exportar(ruta)
+    except OSError as e:
+        messagebox.showerror("Trazas", f"No se pudo guardar:\n{e}")
+        return
+    messagebox.showinfo("Trazas", f"{n} eventos guardados en:\n{ruta}\n\nAbrir en ui.perfetto.dev o chrome://tracing")
+
+
 def al_cerrar():
     """Cerrar ventana limpiamente."""
+    conexion_ur.cerrar()
+    cliente_dashboard.cerrar()
+    if emisor_bloques is not None:
+        emisor_bloques.cerrar()
+    if residente is not None:
+        residente.cerrar()
+    if motor_celda is not None:
+        motor_celda.detener()
     ventana.destroy()
     sys.exit()
 
@@ -530,97 +1536,207 @@ def al_cerrar():
 # ▼▼========================================================▼▼
 #   ⮞ 08 Arranque de la app y GUI
 # ------------------------------------------------------------
-# Conectar RTDE y activar gripper
-rtde_connect()
-send_urscript(urscripts.s_activar_gripper)
-
-# Ventana
-ventana = tb.Window(themename="lumen")
-ventana.title("Cliente")
-ventana.resizable(False, False)
-ventana.bind("<Escape>", lambda e: ventana.destroy())
-
-ANCHO, ALTO = 1100, 820
-ventana.geometry(f"{ANCHO}x{ALTO}")
-
-# Escalas / tipografías dependientes de DPI
-fe = obtener_factor_escala(ventana)
-font1 = max(8, int(16 / fe))
-font2 = max(8, int(12 / fe))
-font3 = max(8, int(10 / fe))
-
-# Fondo
-img = Image.open(os.path.join(BASE_DIR, FONDO_IMG)).resize((ANCHO, ALTO))
-fondo_D = ImageTk.PhotoImage(img)
-canvas = tk.Canvas(ventana, width=ANCHO, height=ALTO, bg="white", highlightthickness=0)
-canvas.pack()
-canvas.create_image(0, 0, anchor=tk.NW, image=fondo_D)
-
-# Estilos
-global style, estadoCobot, estadoGrippper, txt_posiciones  # widgets usados por funciones
-style = tb.Style()
-style.configure("Btn1.TButton", font=("Arial", font1, "bold"), foreground="#404040", background="#ffffff", borderwidth=0)
-style.configure("Free.TButton", font=("Arial", font1, "bold"), foreground="#404040", background="#ffffff", borderwidth=0)
-style.configure("Btn2.TButton", font=("Arial", font2, "bold"), foreground="#404040", background="#ffffff", borderwidth=0)
-style.configure("Btn3.TButton", font=("Arial", font3, "bold"), foreground="#404040", background="#dedede", borderwidth=0)
-style.map("Btn1.TButton", background=[("active", "#e6e6e6"), ("pressed", "#cccccc")], foreground=[("disabled", "#a0a0a0")])
-style.map("Btn2.TButton", background=[("active", "#e6e6e6"), ("pressed", "#cccccc")], foreground=[("disabled", "#a0a0a0")])
-style.map("Btn3.TButton", background=[("active", "#e6e6e6"), ("pressed", "#cccccc")], foreground=[("disabled", "#a0a0a0")])
-style.map("Free.TButton", background=[("active", "#e6e6e6"), ("pressed", "#cccccc")], foreground=[("disabled", "#a0a0a0")])
-
-# --- Botones de movimiento / freedrive / poses ---
-btn_freedrive = tb.Button(ventana, text="Freedrive", command=activar_freedrive, style="Free.TButton")
-btn_freedrive.place(x=100, y=200, width=160, height=60)
-
-btn_alinear = tb.Button(ventana, text="Alinear", command=alinear, bootstyle=DANGER, style="Btn1.TButton")
-btn_alinear.place(x=295, y=200, width=160, height=60)
-
-btn_guardar_pose = tb.Button(ventana, text="Guardar\nPosición", command=guardar_posicion, bootstyle=DANGER, style="Btn2.TButton")
-btn_guardar_pose.place(x=490, y=200, width=160, height=60)
-
-# --- Botones de gripper ---
-btn_abrir = tb.Button(ventana, text="Abrir pinza", command=abrir_pinza, style="Btn1.TButton")
-btn_abrir.place(x=100, y=370, width=160, height=60)
-
-btn_cerrar = tb.Button(ventana, text="Cerrar pinza", command=cerrar_pinza, bootstyle=DANGER, style="Btn1.TButton")
-btn_cerrar.place(x=295, y=370, width=160, height=60)
-
-btn_guardar_accion = tb.Button(ventana, text="Guardar\n Acción", command=guardar_accion_gripper, bootstyle=DANGER, style="Btn2.TButton")
-btn_guardar_accion.place(x=490, y=370, width=160, height=60)
-
-# --- Ejecución y utilitarios ---
-btn_ejecutar = tb.Button(ventana, text="Ejecutar", command=ejecutar_rutina, bootstyle=DANGER, style="Btn1.TButton")
-btn_ejecutar.place(x=731, y=550, width=300, height=60)
-
-btn_detener = tb.Button(ventana, text="Detener", command=detener, bootstyle=DANGER, style="Btn1.TButton")
-btn_detener.place(x=730, y=621, width=300, height=60)
-
-btn_borrar_todo = tb.Button(ventana, text="Borrar Todo", command=borrar_posiciones, bootstyle=DANGER, style="Btn3.TButton")
-btn_borrar_todo.place(x=875, y=506, width=150, height=32)
-
-btn_borrar_ultima = tb.Button(ventana, text="Borrar ultima linea", command=borrar_ultimalinea, bootstyle=DANGER, style="Btn3.TButton")
-btn_borrar_ultima.place(x=725, y=506, width=150, height=32)
-
-# Cuadro principal de la rutina
-txt_posiciones = tk.Text(ventana, width=44, height=20)
-txt_posiciones.place(x=743, y=170)
-
-# Estados
-estadoConexion = tb.Label(ventana, text=" Conectado ", font=("Arial", font3, "bold"), style="inverse-success", anchor="center")
-estadoConexion.place(x=74, y=511, height=28, width=180)
-
-estadoCobot = tb.Label(ventana, text=" Cobot Normal ", font=("Arial", font3, "bold"), style="inverse-primary", anchor="center")
-estadoCobot.place(x=285, y=511, height=28, width=180)
-
-estadoGrippper = tb.Label(ventana, text=" Abierto ", font=("Arial", font3, "bold"), style="inverse-primary", anchor="center")
-estadoGrippper.place(x=496, y=511, height=28, width=180)
-
-# Thread de actualización RTDE
-threading.Thread(target=read_rtde_thread, daemon=True).start()
-
-# Cierre seguro
-ventana.protocol("WM_DELETE_WINDOW", al_cerrar)
-ventana.mainloop()
+# El arranque va protegido: el proceso de E/S (spawn) re-importa este módulo.
+# Las etapas son funciones para que benchmarks/soak_taller.py levante el
+# mismo núcleo sin mainloop.
+def conectar_robot() -> None:
+    """Conecta RTDE (o el motor de la celda) y activa el gripper; los fallos quedan en `avisos_arranque`."""
+    if motor_celda is not None:
+        motor_celda.iniciar()
+        for _nombre, _error in motor_celda.difundir(urscripts.s_activar_gripper).items():
+            if _error is not None:
+                print(f"[celda] {_nombre}: no se pudo activar el gripper ({_error})")
+                avisos_arranque.append(f"{_nombre}: no se pudo activar el gripper ({_error})")
+    else:
+        rtde_connect()
+        send_urscript(urscripts.s_activar_gripper)
+
+
+def construir_ventana() -> None:
+    """Crea la ventana, estilos, botones, cuadro de rutina y etiquetas de estado."""
+    global ventana, ANCHO, ALTO, fe, font1, font2, font3, fondo_D, canvas, style
+    global estadoConexion, estadoCobot, estadoGrippper, estadoPrograma, estadoTrazas, txt_posiciones, selector_robot, panel_tcp
+    global btn_importar
+
+    # Ventana
+    ventana = tb.Window(themename="lumen")
+    ventana.title("Cliente")
+    ventana.resizable(False, False)
+    ventana.bind("<Escape>", lambda e: ventana.destroy())
+    ventana.bind("<F8>", alternar_trazas)
+    ventana.bind("<F9>", exportar_trazas)
+
+    ANCHO, ALTO = 1100, 820
+    ventana.geometry(f"{ANCHO}x{ALTO}")
+
+    # Escalas / tipografías dependientes de DPI
+    fe = obtener_factor_escala(ventana)
+    font1 = max(8, int(16 / fe))
+    font2 = max(8, int(12 / fe))
+    font3 = max(8, int(10 / fe))
+
+    # Fondo
+    fondo_D = cargar_fondo(ANCHO, ALTO)
+    canvas = tk.Canvas(ventana, width=ANCHO, height=ALTO, bg="white", highlightthickness=0)
+    canvas.pack()
+    canvas.create_image(0, 0, anchor=tk.NW, image=fondo_D)
+
+    # Estilos
+    style = tb.Style()
+    style.configure("Btn1.TButton", font=("Arial", font1, "bold"), foreground="#404040", background="#ffffff", borderwidth=0)
+    style.configure("Free.TButton", font=("Arial", font1, "bold"), foreground="#404040", background="#ffffff", borderwidth=0)
+    style.configure("Btn2.TButton", font=("Arial", font2, "bold"), foreground="#404040", background="#ffffff", borderwidth=0)
+    style.configure("Btn3.TButton", font=("Arial", font3, "bold"), foreground="#404040", background="#dedede", borderwidth=0)
+    style.map("Btn1.TButton", background=[("active", "#e6e6e6"), ("pressed", "#cccccc")], foreground=[("disabled", "#a0a0a0")])
+    style.map("Btn2.TButton", background=[("active", "#e6e6e6"), ("pressed", "#cccccc")], foreground=[("disabled", "#a0a0a0")])
+    style.map("Btn3.TButton", background=[("active", "#e6e6e6"), ("pressed", "#cccccc")], foreground=[("disabled", "#a0a0a0")])
+    style.map("Free.TButton", background=[("active", "#e6e6e6"), ("pressed", "#cccccc")], foreground=[("disabled", "#a0a0a0")])
+
+    # --- Botones de movimiento / freedrive / poses ---
+    btn_freedrive = tb.Button(ventana, text="Freedrive", command=activar_freedrive, style="Free.TButton")
+    btn_freedrive.place(x=100, y=200, width=160, height=60)
+
+    btn_alinear = tb.Button(ventana, text="Alinear", command=alinear, bootstyle=DANGER, style="Btn1.TButton")
+    btn_alinear.place(x=295, y=200, width=160, height=60)
+
+    btn_guardar_pose = tb.Button(ventana, text="Guardar\nPosición", command=guardar_posicion, bootstyle=DANGER, style="Btn2.TButton")
+    btn_guardar_pose.place(x=490, y=200, width=160, height=60)
+
+    # --- Botones de gripper ---
+    btn_abrir = tb.Button(ventana, text="Abrir pinza", command=abrir_pinza, style="Btn1.TButton")
+    btn_abrir.place(x=100, y=370, width=160, height=60)
+
+    btn_cerrar = tb.Button(ventana, text="Cerrar pinza", command=cerrar_pinza, bootstyle=DANGER, style="Btn1.TButton")
+    btn_cerrar.place(x=295, y=370, width=160, height=60)
+
+    btn_guardar_accion = tb.Button(ventana, text="Guardar\n Acción", command=guardar_accion_gripper, bootstyle=DANGER, style="Btn2.TButton")
+    btn_guardar_accion.place(x=490, y=370, width=160, height=60)
+
+    # --- Ejecución y utilitarios ---
+    btn_ejecutar = tb.Button(ventana, text="Ejecutar", command=ejecutar_rutina, bootstyle=DANGER, style="Btn1.TButton")
+    btn_ejecutar.place(x=731, y=550, width=300, height=60)
+
+    btn_detener = tb.Button(ventana, text="Detener", command=detener, bootstyle=DANGER, style="Btn1.TButton")
+    btn_detener.place(x=730, y=621, width=300, height=60)
+
+    btn_borrar_todo = tb.Button(ventana, text="Borrar Todo", command=borrar_posiciones, bootstyle=DANGER, style="Btn3.TButton")
+    btn_borrar_todo.place(x=875, y=506, width=150, height=32)
+
+    btn_borrar_ultima = tb.Button(ventana, text="Borrar ultima linea", command=borrar_ultimalinea, bootstyle=DANGER, style="Btn3.TButton")
+    btn_borrar_ultima.place(x=725, y=506, width=150, height=32)
+
+    btn_alinear_rutina = tb.Button(ventana, text="Alinear rutina", command=alinear_rutina, bootstyle=DANGER, style="Btn3.TButton")
+    btn_alinear_rutina.place(x=725, y=692, width=150, height=32)
+
+    btn_guardar_patron = tb.Button(ventana, text="Guardar patrón", command=guardar_patron, bootstyle=DANGER, style="Btn3.TButton")
+    btn_guardar_patron.place(x=875, y=692, width=150, height=32)
+
+    btn_vista_previa = tb.Button(ventana, text="Vista previa", command=vista_previa_patron, bootstyle=DANGER, style="Btn3.TButton")
+    btn_vista_previa.place(x=725, y=728, width=150, height=32)
+
+    btn_desbloquear = tb.Button(ventana, text="Desbloquear", command=desbloquear_parada, bootstyle=DANGER, style="Btn3.TButton")
+    btn_desbloquear.place(x=875, y=728, width=150, height=32)
+
+    btn_importar = tb.Button(ventana, text="Importar ruta", command=importar_ruta, bootstyle=DANGER, style="Btn3.TButton")
+    btn_importar.place(x=725, y=764, width=300, height=28)
+
+    # Cuadro principal de la rutina
+    txt_posiciones = tk.Text(ventana, width=44, height=20)
+    txt_posiciones.place(x=743, y=170)
+
+    # Estados
+    estadoConexion = tb.Label(ventana, text=" Conectando... ", font=("Arial", font3, "bold"), style="inverse-secondary", anchor="center")
+    estadoConexion.place(x=74, y=511, height=28, width=180)
+
+    estadoCobot = tb.Label(ventana, text=" Cobot Normal ", font=("Arial", font3, "bold"), style="inverse-primary", anchor="center")
+    estadoCobot.place(x=285, y=511, height=28, width=180)
+
+    estadoGrippper = tb.Label(ventana, text=" Abierto ", font=("Arial", font3, "bold"), style="inverse-primary", anchor="center")
+    estadoGrippper.place(x=496, y=511, height=28, width=180)
+
+    estadoPrograma = tb.Label(ventana, text=" Dashboard ", font=("Arial", font3, "bold"), style="inverse-secondary", anchor="center")
+    estadoPrograma.place(x=74, y=547, height=28, width=602)
+
+    # Trazado activo (F8): solo visible mientras se traza
+    estadoTrazas = tb.Label(ventana, text=" Trazando (F9 guarda) ", font=("Arial", font3, "bold"), style="inverse-warning", anchor="center")
+    mostrar_trazas()
+
+    # Celda multi-robot: selector del robot activo y envío a todos
+    if len(CELDA) > 1:
+        selector_robot = tb.Combobox(ventana, values=[n for n, _ in CELDA], state="readonly", font=("Arial", font3, "bold"))
+        selector_robot.set(robot_activo)
+        selector_robot.bind("<<ComboboxSelected>>", seleccionar_robot)
+        selector_robot.place(x=74, y=583, height=28, width=290)
+
+        btn_difundir = tb.Button(ventana, text="Ejecutar en todos", command=difundir_rutina, bootstyle=DANGER, style="Btn3.TButton")
+        btn_difundir.place(x=386, y=583, width=290, height=28)
+
+    # Panel TCP: tira temporal X/Y/Z + ruta en planta y alzado (zona libre del fondo)
+    if AJUSTES.getboolean("vista", "activo"):
+        panel_tcp = vista_tcp.PanelTCP(canvas, 74, 620, 602, 148, muestras=AJUSTES.getint("vista", "muestras"))
+
+
+def iniciar_nucleo() -> None:
+    """Suscribe los consumidores RTDE y arranca métricas e hilos de E/S (requiere la ventana)."""
+    # Consumidores RTDE: registro a tasa completa, GUI decimada
+    if registro_rtde is not None:
+        if lector_rtde is not None or motor_celda is not None:
+            distribuidor_rtde.suscribir(registro_rtde.agregar_lote, lote=True)
+        else:
+            distribuidor_rtde.suscribir(registro_rtde)
+    distribuidor_rtde.suscribir(actualizar_estado_gui, hz=GUI_HZ)
+    if panel_tcp is not None:
+        if lector_rtde is not None or motor_celda is not None:
+            distribuidor_rtde.suscribir(panel_tcp.agregar_lote, lote=True)
+        else:
+            distribuidor_rtde.suscribir(panel_tcp)
+        panel_tcp.animar(ventana, AJUSTES.getfloat("vista", "fps"))
+    if motor_celda is None:
+        distribuidor_rtde.suscribir(monitor_rtde.agregar_lote if lector_rtde is not None else monitor_rtde, lote=lector_rtde is not None)
+    ventana.after(1000, refrescar_enlace)
+
+    # Endpoint de métricas (Prometheus) y salud del enlace
+    if AJUSTES.getint("metricas", "puerto"):
+        try:
+            metricas.servir(AJUSTES.getint("metricas", "puerto"), AJUSTES.get("metricas", "host"))
+        except OSError as e:
+            print(f"[metricas] no se pudo abrir el puerto: {e}")
+            avisos_arranque.append(f"Métricas: no se pudo abrir el puerto {AJUSTES.get('metricas', 'puerto')} ({e})")
+    if avisos_arranque:                 # después de construir la ventana (conectar_robot corre antes)
+        messagebox.showwarning("Arranque", "\n".join(avisos_arranque))
+
+    # Thread de actualización RTDE (en una celda, el motor entrega los lotes)
+    if motor_celda is None:
+        threading.Thread(target=read_rtde_thread, daemon=True).start()
+
+    # Lector del flujo de estado de 30002 (excepciones / modo del robot)
+    conexion_ur.iniciar()
+
+    # Sondeo del Dashboard Server (programa / modo / seguridad)
+    threading.Thread(target=sondear_dashboard_thread, daemon=True).start()
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()      # ejecutable PyInstaller
+    marcas = {"importaciones": time.time()}
+
+    # Medición del arranque: solo ventana, sin conexión al robot (ver medir_arranque)
+    if os.environ.get("TALLER_ARRANQUE"):
+        construir_ventana()
+        marcas["ventana"] = time.time()
+        medir_arranque(os.environ["TALLER_ARRANQUE"], marcas)
+        sys.exit()
+
+    if AJUSTES.getboolean("trazas", "activo"):
+        trazas.activar(AJUSTES.getint("trazas", "capacidad"))
+
+    conectar_robot()
+    construir_ventana()
+    iniciar_nucleo()
+
+    # Cierre seguro
+    ventana.protocol("WM_DELETE_WINDOW", al_cerrar)
+    ventana.mainloop()
 
 
 
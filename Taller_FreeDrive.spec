@@ -2,43 +2,99 @@
 # -*- mode: python ; coding: utf-8 -*-
 # PyInstaller spec for Taller_FreeDrive (GUI + UR RTDE)
 # Usage:
-#   pyinstaller Taller_FreeDrive.spec
+#   pyinstaller Taller_FreeDrive.spec                          (lean profile, default)
+#   TALLER_PERFIL=completo pyinstaller Taller_FreeDrive.spec   (collect_all as before)
 #
 # Output:
 #   dist/Taller_FreeDrive/  (one-folder build)
 #
 # Notes:
-# - Includes data files: fondo.png, control_loop_configuration.xml
-# - Collects package data/binaries for: rtde, ttkbootstrap, PIL
+# - Includes data files: fondo_1100x820.png (pre-scaled background, regenerated
+#   from fondo.png when missing or older), control_loop_configuration.xml
+# - Lean profile:
+#   * PIL: only the PNG plugin (other format plugins and their binaries excluded;
+#     PIL skips missing plugins when identifying files).
+#   * ttkbootstrap: modules found by analysis + data files; the theme creator is
+#     excluded and rthook_temas.py keeps only the themes in TEMAS at runtime.
+#   * rtde: pure Python, found by analysis (no collect_all).
+#   * UPX never touches the interpreter, Tcl/Tk, NumPy, PIL or the stdlib
+#     extension modules loaded at startup (UPX_EXCLUIR); they would be
+#     decompressed on every start.
+# - One-folder EXE (exclude_binaries=True): binaries are not embedded in the
+#   executable and extracted at startup.
 # - Windowed build (no console). Change 'console=True' if you want a console.
+# - Cold start: python benchmarks/bench_arranque.py compares this build with the
+#   source run.
 
+import os
 import sys
-from PyInstaller.utils.hooks import collect_all
+from PyInstaller.utils.hooks import collect_all, collect_data_files, collect_submodules
 
-# Collect package data/binaries/hidden imports
-rtde_datas, rtde_binaries, rtde_hidden = collect_all('rtde')
-ttk_datas, ttk_binaries, ttk_hidden = collect_all('ttkbootstrap')
-pil_datas, pil_binaries, pil_hidden = collect_all('PIL')
+PERFIL = os.environ.get('TALLER_PERFIL', 'liviano')
+ANCHO, ALTO = 1100, 820                 # window size (construir_ventana)
+FONDO = 'fondo_%dx%d.png' % (ANCHO, ALTO)
+
+# Pre-scaled background (the app only resizes fondo.png when this file is missing)
+if not os.path.exists(FONDO) or os.path.getmtime(FONDO) < os.path.getmtime('fondo.png'):
+    from PIL import Image
+    Image.open('fondo.png').resize((ANCHO, ALTO), Image.Resampling.BICUBIC).save(FONDO, optimize=True)
+
+UPX_EXCLUIR = [
+    # interpreter / C runtime
+    'python3*.dll', 'libpython3*.so*', 'vcruntime*.dll', 'msvcp*.dll', 'ucrtbase.dll', 'api-ms-win-*.dll',
+    # Tcl/Tk
+    'tcl8*.dll', 'tk8*.dll', 'libtcl8*.so*', 'libtk8*.so*', '_tkinter*',
+    # NumPy
+    '_multiarray_umath*', '_umath_linalg*', 'libopenblas*', 'libscipy_openblas*', 'libgfortran*', 'libquadmath*',
+    # PIL
+    '_imaging.*', '_imagingtk*', 'libpng*', 'zlib*', 'libz.*',
+    # stdlib extensions imported at startup
+    '_socket*', 'select*', '_asyncio*', '_multiprocessing*', '_overlapped*', '_ctypes*', 'libffi*',
+    'unicodedata*', '_queue*', '_struct*', 'math*', '_json*',
+]
+
+if PERFIL == 'completo':
+    rtde_datas, rtde_binaries, rtde_hidden = collect_all('rtde')
+    ttk_datas, ttk_binaries, ttk_hidden = collect_all('ttkbootstrap')
+    pil_datas, pil_binaries, pil_hidden = collect_all('PIL')
+    binaries = rtde_binaries + ttk_binaries + pil_binaries
+    datas = rtde_datas + ttk_datas + pil_datas + [('fondo.png', '.')]
+    hiddenimports = rtde_hidden + ttk_hidden + pil_hidden
+    excludes, runtime_hooks, upx_exclude = [], [], []
+else:
+    pil_plugins = collect_submodules('PIL', filter=lambda nombre: nombre.endswith('ImagePlugin'))
+    binaries = []
+    datas = collect_data_files('ttkbootstrap')
+    hiddenimports = ['PIL.PngImagePlugin']
+    excludes = [p for p in pil_plugins if p != 'PIL.PngImagePlugin'] + [
+        'PIL.ImageQt', 'PIL.ImageCms', 'PIL.ImageShow',
+        'ttkbootstrap.ttkcreator',
+        'unittest', 'doctest', 'pydoc', 'pydoc_data', 'lib2to3', 'tkinter.test', 'idlelib', 'turtle',
+        'turtledemo', 'sqlite3', 'xmlrpc', 'ensurepip', 'venv', 'distutils', 'setuptools', 'pkg_resources',
+        'numpy.f2py', 'numpy.distutils', 'pytest', 'IPython', 'matplotlib',
+    ]
+    runtime_hooks = ['rthook_temas.py']
+    upx_exclude = UPX_EXCLUIR
 
 block_cipher = None
 
 a = Analysis(
     ['Taller_FreeDrive.py'],
     pathex=[],
-    binaries=rtde_binaries + ttk_binaries + pil_binaries,
-    datas=rtde_datas + ttk_datas + pil_datas + [
-        ('fondo.png', '.'),
+    binaries=binaries,
+    datas=datas + [
+        (FONDO, '.'),
         ('control_loop_configuration.xml', '.'),
         # If you have other static assets, add them here as ('src_path','dest_relpath')
     ],
-    hiddenimports=rtde_hidden + ttk_hidden + pil_hidden + [
+    hiddenimports=hiddenimports + [
         'ttkbootstrap.constants',
         'PIL.ImageTk',
     ],
     hookspath=[],
     hooksconfig={},
-    runtime_hooks=[],
-    excludes=[],
+    runtime_hooks=runtime_hooks,
+    excludes=excludes,
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
@@ -50,14 +106,14 @@ pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
+    [],
+    exclude_binaries=True,
     name='Taller_FreeDrive',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
     upx=True,
+    upx_exclude=upx_exclude,
     console=False,   # GUI app
     disable_windowed_traceback=False,
     target_arch=None,
@@ -73,5 +129,6 @@ coll = COLLECT(
     a.datas,
     strip=False,
     upx=True,
+    upx_exclude=upx_exclude,
     name='Taller_FreeDrive'
 )
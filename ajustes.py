@@ -0,0 +1,158 @@
+"""
+ajustes.py
+------------------------------------------------
+Propósito: ajustes por estación (IP del robot o robots de la celda,
+receta/frecuencia RTDE, tasas de consumo) leídos desde `estacion.ini`, sin tocar el código.
+
+El archivo se busca junto al ejecutable (PyInstaller) o junto al script;
+la variable de entorno TALLER_ESTACION permite indicar otra ruta.
+Cualquier clave ausente toma el valor de `DEFECTOS`.
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y valores por defecto
+# ------------------------------------------------------------
+
+import os
+import sys
+import configparser
+
+DEFECTOS = {
+    "robot": {
+        "ip": "192.168.1.20",
+    },
+    "rtde": {
+        "receta": "state",          # receta de control_loop_configuration.xml
+        "campos": "",               # lista opcional "a, b, c" que reemplaza a la receta
+        "frecuencia": "125",        # Hz solicitados (e-Series admite hasta 500)
+        "respaldo": "state",        # receta si la solicitada es rechazada
+        "decodificador": "rapido",  # rapido (rtde_rapido, por lotes) | libreria (receive())
+        "gui_hz": "20",             # tasa de refresco de la GUI (decimada)
+        "registro_muestras": "20000",  # historial a tasa completa (0 = desactivado)
+    },
+    "dashboard": {
+        "ttl": "0.5",               # vigencia de la caché de consultas (s)
+        "sondeo": "1.0",            # periodo de sondeo del estado (s)
+    },
+    "celda": {
+        "robots": "",               # "r1=192.168.1.20, r2=192.168.1.21" (2 o más → motor_async)
+    },
+    "io": {
+        "proceso": "no",            # si → E/S de robots en otro proceso (proceso_io.py)
+    },
+    "metricas": {
+        "puerto": "9109",           # endpoint Prometheus /metrics y /health (0 = desactivado)
+        "host": "127.0.0.1",        # 0.0.0.0 para que lo lea un Prometheus remoto
+    },
+    "vista": {
+        "activo": "si",             # panel con la tira del TCP y la ruta en planta/alzado
+        "fps": "30",                # cuadros por segundo (sin datos nuevos no redibuja)
+        "muestras": "100000",       # muestras RTDE que cubre la tira (nivel de detalle por píxel)
+    },
+    "importar": {
+        "unidades": "mm",           # x, y, z del CSV: m | mm | in (el G-code usa G20/G21)
+        "angulos": "rad",           # rx, ry, rz del CSV: rad | deg
+        "alcance": "1.3",           # m desde la base; puntos más lejanos se rechazan
+        "vel": "0.05",              # m/s si el archivo no trae F (y para todo el CSV)
+        "vel_g0": "0.25",           # m/s de los G0
+        "acel": "0.5",              # m/s² de los movel
+        "radio": "0.001",           # m de mezcla máxima entre puntos
+        "mcodigos": "M3=Cerrar, M5=Abrir",   # M-códigos → acción de pinza
+        "bloque": "50000",          # líneas por bloque (memoria de trabajo)
+    },
+    "bloques": {
+        "modo": "auto",             # si | no | auto (por bloques si supera `umbral` registros)
+        "umbral": "5000",           # registros (≈ movimientos) de la rutina para el modo auto
+        "tamano": "500",            # registros por bloque
+        "ventana": "2",             # bloques en cola detrás del que se ejecuta
+        "puerto": "50010",          # puerto del PC al que se conecta el receptor
+        "host": "",                 # IP del PC vista desde el robot (vacío = automática)
+    },
+    "residente": {
+        "activo": "si",             # tabla de la rutina en el robot, actualizada por diferencias
+        "puerto": "50011",          # puerto del PC al que se conecta el residente
+        "capacidad_max": "20000",   # registros; rutinas más largas → [bloques] / programa completo
+    },
+    "trazas": {
+        "activo": "no",             # trazar desde el arranque (F8 alterna, F9 exporta)
+        "capacidad": "200000",      # eventos en memoria (los más viejos se descartan)
+    },
+}
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Carga
+# ------------------------------------------------------------
+def ruta_ajustes() -> str:
+    """
+    ============================================================
+    FUNCIÓN: ruta_ajustes()
+    ------------------------------------------------------------
+    Devuelve la ruta de `estacion.ini` de esta instalación.
+
+        Parámetros:
+            Ninguno
+        Retorna:
+            str: ruta absoluta (el archivo puede no existir).
+        Notas:
+            - Empaquetado: carpeta del ejecutable (no sys._MEIPASS),
+            para que cada estación edite su propia copia.
+    ============================================================
+    """
+    if os.environ.get("TALLER_ESTACION"):
+        return os.path.abspath(os.environ["TALLER_ESTACION"])
+    if getattr(sys, "frozen", False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base, "estacion.ini")
+
+
+def cargar(ruta: str = None) -> configparser.ConfigParser:
+    """
+    ============================================================
+    FUNCIÓN: cargar(ruta=None)
+    ------------------------------------------------------------
+    Lee los ajustes de la estación sobre los valores por defecto.
+
+        Parámetros:
+            ruta (str | None): archivo .ini; None usa `ruta_ajustes()`.
+        Retorna:
+            ConfigParser: ajustes (siempre con todas las claves).
+        Notas:
+            - `getboolean` acepta también "si"/"sí".
+    ============================================================
+    """
+    conf = configparser.ConfigParser()
+    conf.BOOLEAN_STATES = dict(conf.BOOLEAN_STATES, si=True, sí=True)
+    conf.read_dict(DEFECTOS)
+    conf.read(ruta or ruta_ajustes(), encoding="utf-8")
+    return conf
+
+
+def lista(valor: str) -> list:
+    """Convierte "a, b, c" en ["a", "b", "c"] (cadena vacía -> [])."""
+    return [v.strip() for v in valor.split(",") if v.strip()]
+
+
+def pares(valor: str) -> dict:
+    """Convierte "a=b, c=d" en {"a": "b", "c": "d"}."""
+    return {k.strip(): v.strip() for k, _, v in (e.partition("=") for e in lista(valor))}
+
+
+def robots(conf: configparser.ConfigParser) -> list:
+    """Robots de la celda: "r1=ip1, ip2" -> [("r1", "ip1"), ("ip2", "ip2")]."""
+    celda = []
+    for entrada in lista(conf.get("celda", "robots")):
+        nombre, _, ip = entrada.partition("=")
+        celda.append((nombre.strip(), ip.strip()) if ip else (nombre.strip(), nombre.strip()))
+    return celda
+
+# ▲▲========================================================▲▲
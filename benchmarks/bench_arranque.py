@@ -0,0 +1,99 @@
+"""
+bench_arranque.py
+------------------------------------------------
+Arranque de la app desde el código fuente y desde el ejecutable
+congelado (dist/Taller_FreeDrive, ver Taller_FreeDrive.spec), hasta
+que la ventana es visible. Usa el modo de medición de la app
+(TALLER_ARRANQUE, `medir_arranque`): sin conexión al robot.
+
+Etapas (s desde el lanzamiento del proceso):
+- modulo: intérprete (y bootloader) hasta la primera línea de la app;
+- importaciones: fin de las importaciones y del estado global;
+- ventana: `construir_ventana()` terminada;
+- visible: la ventana se mapeó y dibujó.
+
+La primera corrida de cada variante es la más cercana a un arranque en
+frío (para uno real, reiniciar o vaciar la caché de disco antes); el
+resto se resume con la mediana. `--csv` agrega una fila por variante,
+para seguir la evolución entre builds.
+
+Uso:
+    python benchmarks/bench_arranque.py [--veces 5] [--exe RUTA] [--csv arranque.csv]
+"""
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ETAPAS = ("modulo", "importaciones", "ventana", "visible")
+
+
+def exe_por_defecto() -> str:
+    nombre = "Taller_FreeDrive.exe" if sys.platform == "win32" else "Taller_FreeDrive"
+    return os.path.join(RAIZ, "dist", "Taller_FreeDrive", nombre)
+
+
+def correr(comando: list, cwd: str) -> dict:
+    """Lanza la app en modo medición y devuelve sus etapas + el total hasta que terminó."""
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "arranque.json")
+        entorno = dict(os.environ, TALLER_ARRANQUE=ruta)
+        entorno["TALLER_ARRANQUE_T0"] = repr(time.time())
+        t0 = time.perf_counter()
+        proceso = subprocess.run(comando, cwd=cwd, env=entorno, capture_output=True, text=True, timeout=120)
+        total = time.perf_counter() - t0
+        if not os.path.exists(ruta):
+            raise RuntimeError(f"{comando[0]} no escribió la medición (código {proceso.returncode}):\n"
+                               f"{proceso.stderr[-2000:]}")
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+    datos["total"] = total
+    return datos
+
+
+def medir(nombre: str, comando: list, cwd: str, veces: int) -> dict:
+    corridas = [correr(comando, cwd) for _ in range(veces)]
+    claves = ETAPAS + ("total",)
+    primera = corridas[0]
+    mediana = {k: float(np.median([c[k] for c in corridas[1:] or corridas])) for k in claves}
+    print(f"{nombre:9s} {'':10s}" + "".join(f"{k:>14s}" for k in claves))
+    print(f"{'':9s} {'primera':10s}" + "".join(f"{primera[k]:14.3f}" for k in claves))
+    print(f"{'':9s} {'mediana':10s}" + "".join(f"{mediana[k]:14.3f}" for k in claves))
+    return {"variante": nombre, "primera": primera["visible"], **mediana}
+
+
+def main():
+    opciones = argparse.ArgumentParser(description=__doc__.split("\n")[3])
+    opciones.add_argument("--veces", type=int, default=5, help="corridas por variante")
+    opciones.add_argument("--exe", default=exe_por_defecto(), help="ejecutable congelado")
+    opciones.add_argument("--csv", help="agrega los resultados a este CSV")
+    args = opciones.parse_args()
+
+    filas = [medir("fuente", [sys.executable, os.path.join(RAIZ, "Taller_FreeDrive.py")], RAIZ, args.veces)]
+    if os.path.exists(args.exe):
+        filas.append(medir("congelado", [args.exe], os.path.dirname(args.exe), args.veces))
+    else:
+        print(f"sin ejecutable en {args.exe} (pyinstaller Taller_FreeDrive.spec); solo se midió el fuente")
+
+    if args.csv:
+        nuevo = not os.path.exists(args.csv)
+        with open(args.csv, "a", newline="", encoding="utf-8") as f:
+            escritor = csv.DictWriter(f, ["fecha", "variante", "primera", *ETAPAS, "total"])
+            if nuevo:
+                escritor.writeheader()
+            for fila in filas:
+                escritor.writerow({"fecha": time.strftime("%Y-%m-%d %H:%M"),
+                                   **{k: (round(v, 4) if isinstance(v, float) else v) for k, v in fila.items()}})
+
+
+if __name__ == "__main__":
+    main()
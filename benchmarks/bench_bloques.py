@@ -0,0 +1,131 @@
+"""
+bench_bloques.py
+------------------------------------------------
+Tiempo hasta el primer movimiento de una trayectoria de N puntos
+(1 000 000 por defecto):
+
+- programa completo: construir el URScript (un movel por punto) y
+  transmitirlo a un socket local; el controlador además tendría que
+  compilarlo antes de moverse (no medido aquí);
+- por bloques: levantar ejecucion_bloques.EmisorBloques, construir el
+  receptor y recibir el primer registro en un robot falso (Python) que
+  confirma bloques como el receptor URScript.
+
+También mide el caudal del flujo completo (registros/s con el robot
+falso sin demoras) y los bytes transmitidos en cada caso.
+
+Uso:
+    python benchmarks/bench_bloques.py [puntos] [tamano_bloque]
+"""
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import socket
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import urscripts          # noqa: E402
+import trayectorias       # noqa: E402
+import ejecucion_bloques  # noqa: E402
+
+
+def rutina(n: int) -> list:
+    t = np.linspace(0, 50, n)
+    puntos = np.column_stack([0.4 + 0.1 * np.cos(t), 0.1 * np.sin(t), np.full(n, 0.2),
+                              np.zeros(n), np.full(n, np.pi), np.zeros(n)])
+    return [{"tipo": "gripper", "accion": "Cerrar"},
+            {"tipo": "trayectoria", "poses": puntos, "vel": np.full(n, 0.05), "acel": 0.5,
+             "radio": 0.001, "origen": "bench"}]
+
+
+def sumidero():
+    """Servidor que descarta lo recibido; devuelve (puerto, evento del primer byte, total)."""
+    servidor = socket.create_server(("127.0.0.1", 0))
+    primero, total = threading.Event(), [0]
+
+    def leer():
+        conexion, _ = servidor.accept()
+        while True:
+            datos = conexion.recv(1 << 16)
+            if not datos:
+                return
+            primero.set()
+            total[0] += len(datos)
+
+    threading.Thread(target=leer, daemon=True).start()
+    return servidor.getsockname()[1], primero, total
+
+
+def programa_completo(pasos: list):
+    puerto, _, total = sumidero()
+    t0 = time.perf_counter()
+    lineas = []
+    for paso in pasos:
+        if paso["tipo"] == "trayectoria":
+            lineas += trayectorias.compilar_trayectoria(paso)
+        else:
+            lineas.append("    rq_close_and_classify()")
+    programa = (urscripts.s_cobotStart + "\n" + "\n".join(lineas + ["end", "cearInacap()"])).encode()
+    construir = time.perf_counter() - t0
+    with socket.create_connection(("127.0.0.1", puerto)) as s:
+        s.sendall(programa)
+    return construir, time.perf_counter() - t0, len(programa)
+
+
+def robot_falso(puerto: int, tamano: int, t0: float, resultado: dict) -> None:
+    """Lee registros de 40 bytes y confirma el inicio de cada bloque, como el receptor URScript."""
+    with socket.create_connection(("127.0.0.1", puerto)) as s:
+        lector = s.makefile("rb")
+        n = 0
+        while True:
+            registro = np.frombuffer(lector.read(4 * ejecucion_bloques.CAMPOS), ">i4")
+            if n == 0:
+                resultado["primero"] = time.perf_counter() - t0
+            if n % tamano == 0:
+                s.sendall(b"%d\r\n" % (n // tamano))
+            n += 1
+            if registro[0] == ejecucion_bloques.OP_FIN:
+                break
+        s.sendall(b"fin\r\n")
+        resultado["registros"] = n
+        resultado["total"] = time.perf_counter() - t0
+
+
+def por_bloques(pasos: list, tamano: int):
+    fin = threading.Event()
+    t0 = time.perf_counter()
+    emisor = ejecucion_bloques.EmisorBloques(lambda: ejecucion_bloques.bloques(pasos, tamano), puerto=0,
+                                             al_terminar=lambda ip, error: fin.set())
+    programa = urscripts.s_cobotStart + "\n".join(ejecucion_bloques.compilar_receptor("127.0.0.1", emisor.puerto,
+                                                                                     tamano))
+    resultado = {}
+    threading.Thread(target=robot_falso, args=(emisor.puerto, tamano, t0, resultado), daemon=True).start()
+    fin.wait(600)
+    return resultado, len(programa.encode()), emisor.enviados
+
+
+def main():
+    puntos = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tamano = int(sys.argv[2]) if len(sys.argv) > 2 else ejecucion_bloques.TAMANO
+    pasos = rutina(puntos)
+
+    construir, total, bytes_programa = programa_completo(pasos)
+    print(f"trayectoria de {puntos} puntos")
+    print(f"  programa completo: construir {construir:7.2f} s, construir + enviar {total:7.2f} s "
+          f"({bytes_programa / 1e6:.1f} MB), primer movimiento > {total:.2f} s + compilación en el robot")
+
+    resultado, bytes_receptor, enviados = por_bloques(pasos, tamano)
+    registros = resultado["registros"]
+    print(f"  por bloques ({tamano} registros): primer registro en {resultado['primero'] * 1e3:7.1f} ms, "
+          f"receptor de {bytes_receptor / 1e3:.1f} kB")
+    print(f"  flujo completo: {registros} registros en {enviados} bloques, {resultado['total']:.2f} s "
+          f"({registros / resultado['total'] / 1e3:.0f} k registros/s, "
+          f"{registros * 4 * ejecucion_bloques.CAMPOS / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+bench_importar.py
+------------------------------------------------
+Importación en streaming de trayectorias (trayectorias.importar) con
+archivos sintéticos de N líneas (1 000 000 por defecto):
+
+- CSV x, y, z, rx, ry, rz en mm;
+- G-code G1 X Y Z F con un M3/M5 cada 10 000 líneas;
+
+y el costo de compilar el resultado a URScript (un movel por punto).
+Informa segundos, líneas/s y el pico de memoria de Python (tracemalloc,
+en una segunda pasada que descarta los pasos) durante la importación.
+
+Uso:
+    python benchmarks/bench_importar.py [lineas]
+"""
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import trayectorias  # noqa: E402
+
+
+def escribir_csv(ruta: str, n: int) -> None:
+    t = np.arange(n) * 1e-3
+    datos = np.column_stack([400 + 100 * np.cos(t), 100 * np.sin(t), 200 + 5 * np.sin(7 * t),
+                             np.zeros(n), np.full(n, np.pi), np.zeros(n)])
+    np.savetxt(ruta, datos, fmt="%.3f", delimiter=",", header="x,y,z,rx,ry,rz", comments="")
+
+
+def escribir_gcode(ruta: str, n: int) -> None:
+    with open(ruta, "w") as f:
+        f.write("G21 G90\n")
+        for i in range(0, n, 10_000):
+            t = np.arange(i, min(n, i + 10_000)) * 1e-3
+            x, y = 100 * np.cos(t), 100 * np.sin(t)
+            f.write("M3\n")
+            f.writelines(f"G1 X{a:.3f} Y{b:.3f} Z-2.000 F600\n" for a, b in zip(x, y))
+            f.write("M5\n")
+
+
+def medir(ruta: str, **opciones):
+    t = time.perf_counter()
+    pasos = list(trayectorias.importar(ruta, **opciones))
+    segundos = time.perf_counter() - t
+    tracemalloc.start()                 # segunda pasada: tracemalloc distorsiona el tiempo
+    for _ in trayectorias.importar(ruta, **opciones):
+        pass
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return pasos, segundos, pico
+
+
+def main():
+    lineas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as carpeta:
+        for nombre, escribir, opciones in (
+                ("csv", escribir_csv, {"unidades": "mm"}),
+                ("gcode", escribir_gcode, {"origen": [0.4, 0.0, 0.2, 0.0, np.pi, 0.0]})):
+            ruta = os.path.join(carpeta, "ruta." + nombre)
+            escribir(ruta, lineas)
+            megas = os.path.getsize(ruta) / 1e6
+            pasos, segundos, pico = medir(ruta, **opciones)
+            puntos = sum(len(p["poses"]) for p in pasos if p["tipo"] == "trayectoria")
+            resultado = sum(p["poses"].nbytes + p["vel"].nbytes for p in pasos if p["tipo"] == "trayectoria")
+            print(f"{nombre:6s} {lineas} líneas ({megas:.1f} MB) → {len(pasos)} pasos, {puntos} puntos")
+            print(f"  importar  {segundos:7.2f} s  ({lineas / segundos / 1e3:.0f} k líneas/s)")
+            print(f"  memoria   {pico / 1e6:7.1f} MB pico de Python (sin retener pasos; el resultado ocupa {resultado / 1e6:.1f} MB)")
+
+            t = time.perf_counter()
+            script = 0
+            for paso in pasos:
+                if paso["tipo"] == "trayectoria":
+                    script += sum(len(linea) + 1 for linea in trayectorias.compilar_trayectoria(paso))
+            print(f"  compilar  {time.perf_counter() - t:7.2f} s  ({script / 1e6:.1f} MB de URScript)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+bench_motor_async.py
+------------------------------------------------
+CPU y latencia del motor asyncio (motor_async.MotorCelda) con 1, 4 y 16
+robots simulados. Los simuladores (simulador.SimuladorUR) corren en
+procesos hijos para que la CPU medida sea solo la del motor.
+
+Latencia RTDE = reloj de llegada del lote - `timestamp` del paquete (el
+simulador lo llena con time.time() al emitir). Se mide además la latencia
+de `difundir()` (mismo script a todos los robots) y de `estado()` del
+Dashboard con la caché vencida.
+
+Uso:
+    python benchmarks/bench_motor_async.py [segundos] [hz] [robots...]
+    python benchmarks/bench_motor_async.py 5 500 1 4 16
+"""
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import multiprocessing as mp
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import motor_async  # noqa: E402
+import simulador    # noqa: E402
+
+ROBOTS_POR_PROCESO = 4
+
+
+def _servir(n: int, hz: float, cola, parar) -> None:
+    """Proceso hijo: n simuladores en un loop; publica sus puertos."""
+    sims = [simulador.SimuladorUR(frecuencia_max=max(hz, 500)).iniciar_en_hilo() for _ in range(n)]
+    cola.put([s.puertos for s in sims])
+    parar.wait()
+    for s in sims:
+        s.detener_hilo()
+
+
+def medir(n: int, segundos: float, hz: float) -> dict:
+    parar = mp.Event()
+    cola = mp.Queue()
+    procesos = []
+    for inicio in range(0, n, ROBOTS_POR_PROCESO):
+        p = mp.Process(target=_servir, args=(min(ROBOTS_POR_PROCESO, n - inicio), hz, cola, parar), daemon=True)
+        p.start()
+        procesos.append(p)
+    puertos = [pu for _ in procesos for pu in cola.get(timeout=10)]
+
+    latencias = []
+
+    def al_lote(nombre, lote):
+        latencias.append(time.time() - lote["timestamp"])
+
+    motor = motor_async.MotorCelda(al_lote=al_lote)
+    for i, pu in enumerate(puertos):
+        motor.agregar(f"r{i}", "127.0.0.1", puertos=pu, receta="registro", frecuencia=hz, ttl=0.0)
+    motor.iniciar()
+
+    # Esperar a que todos los flujos estén arriba
+    limite = time.monotonic() + 10
+    while not all(r.rtde_conectado for r in motor.robots.values()) and time.monotonic() < limite:
+        time.sleep(0.05)
+    time.sleep(0.5)
+    latencias.clear()
+    paquetes0 = sum(r.paquetes for r in motor.robots.values())
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    time.sleep(segundos)
+    cpu1, t1 = time.process_time(), time.perf_counter()
+    paquetes = sum(r.paquetes for r in motor.robots.values()) - paquetes0
+    lat = np.concatenate(latencias) * 1e3 if latencias else np.zeros(1)
+
+    difusion = []
+    for _ in range(20):
+        t = time.perf_counter()
+        motor.difundir("textmsg(\"bench\")")
+        difusion.append(time.perf_counter() - t)
+    consulta = []
+    for _ in range(20):
+        t = time.perf_counter()
+        motor.estado("r0")
+        consulta.append(time.perf_counter() - t)
+
+    motor.detener()
+    parar.set()
+    for p in procesos:
+        p.join(5)
+
+    return {"robots": n, "cpu": 100 * (cpu1 - cpu0) / (t1 - t0),
+            "tasa": paquetes / (t1 - t0), "esperada": n * hz,
+            "lat50": np.percentile(lat, 50), "lat99": np.percentile(lat, 99), "latmax": lat.max(),
+            "difundir": 1e3 * np.median(difusion), "estado": 1e3 * np.median(consulta)}
+
+
+def main():
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    hz = float(sys.argv[2]) if len(sys.argv) > 2 else 500.0
+    cantidades = [int(a) for a in sys.argv[3:]] or [1, 4, 16]
+
+    print(f"{segundos:.0f} s por caso, RTDE a {hz:.0f} Hz por robot (receta 'registro')")
+    print(f"{'robots':>6} {'CPU %':>7} {'paq/s':>9} {'esperado':>9} "
+          f"{'lat p50':>8} {'lat p99':>8} {'lat max':>8} {'difundir':>9} {'estado':>7}  (ms)")
+    for n in cantidades:
+        r = medir(n, segundos, hz)
+        print(f"{r['robots']:>6} {r['cpu']:>7.1f} {r['tasa']:>9.0f} {r['esperada']:>9.0f} "
+              f"{r['lat50']:>8.2f} {r['lat99']:>8.2f} {r['latmax']:>8.2f} "
+              f"{r['difundir']:>9.2f} {r['estado']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
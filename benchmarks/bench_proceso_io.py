@@ -0,0 +1,94 @@
+"""
+bench_proceso_io.py
+------------------------------------------------
+Frescura del estado RTDE visible para la GUI mientras el hilo principal
+está ocupado (carga de CPU en Python, como un redibujado largo de Tk o la
+construcción de una rutina grande), con la E/S en el mismo proceso
+(motor_async.MotorCelda) y en un proceso aparte (proceso_io.ProcesoIO).
+
+Edad = time.time() - `timestamp` del último paquete visible, muestreada
+por el hilo principal entre bloques de carga. El simulador corre en un
+proceso hijo.
+
+Uso:
+    python benchmarks/bench_proceso_io.py [segundos] [hz] [ms_por_bloque]
+"""
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import multiprocessing as mp
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import motor_async  # noqa: E402
+import proceso_io   # noqa: E402
+import simulador    # noqa: E402
+
+
+def _servir(cola, parar) -> None:
+    sim = simulador.SimuladorUR().iniciar_en_hilo()
+    cola.put(sim.puertos)
+    parar.wait()
+    sim.detener_hilo()
+
+
+def carga(ms: float) -> None:
+    """Bloque de trabajo en Python puro que retiene el GIL ~ms."""
+    fin = time.perf_counter() + ms / 1e3
+    while time.perf_counter() < fin:
+        "".join(str(i) for i in range(200))
+
+
+def medir(motor, segundos: float, ms: float, edad) -> np.ndarray:
+    limite = time.monotonic() + 10
+    while motor.salida("r1") is None and time.monotonic() < limite:
+        time.sleep(0.05)
+    time.sleep(0.5)
+    edades = []
+    fin = time.monotonic() + segundos
+    while time.monotonic() < fin:
+        carga(ms)
+        e = edad()
+        if e is not None:
+            edades.append(e)
+    return 1e3 * np.array(edades)
+
+
+def main():
+    segundos = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    hz = float(sys.argv[2]) if len(sys.argv) > 2 else 500.0
+    ms = float(sys.argv[3]) if len(sys.argv) > 3 else 20.0
+
+    parar, cola = mp.Event(), mp.Queue()
+    servidor = mp.Process(target=_servir, args=(cola, parar), daemon=True)
+    servidor.start()
+    puertos = cola.get(timeout=10)
+    opciones = dict(puertos=puertos, receta="registro", frecuencia=hz)
+
+    print(f"RTDE a {hz:.0f} Hz; hilo principal ocupado en bloques de {ms:.0f} ms")
+    print(f"{'E/S':>10} {'edad p50':>9} {'p99':>8} {'max':>8}  (ms)")
+
+    motor = motor_async.MotorCelda()
+    motor.agregar("r1", "127.0.0.1", **opciones)
+    motor.iniciar()
+    r = motor.robots["r1"]
+    edades = medir(motor, segundos, ms, lambda: time.time() - r.ultimo.timestamp if r.ultimo is not None else None)
+    motor.detener()
+    print(f"{'mismo':>10} {np.percentile(edades, 50):>9.2f} {np.percentile(edades, 99):>8.2f} {edades.max():>8.2f}")
+
+    io = proceso_io.ProcesoIO()
+    io.agregar("r1", "127.0.0.1", **opciones)
+    io.iniciar()
+    edades = medir(io, segundos, ms, lambda: io.leer("r1", lambda f: time.time() - f.timestamp))
+    io.detener()
+    print(f"{'aparte':>10} {np.percentile(edades, 50):>9.2f} {np.percentile(edades, 99):>8.2f} {edades.max():>8.2f}")
+
+    parar.set()
+    servidor.join(5)
+
+
+if __name__ == "__main__":
+    main()
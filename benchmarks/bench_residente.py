@@ -0,0 +1,116 @@
+"""
+bench_residente.py
+------------------------------------------------
+Costo de volver a ejecutar una rutina de N poses (5 000 por defecto)
+después de editar un punto, la situación típica de la puesta en marcha:
+
+- programa completo: el URScript que arma construir_script_rutina()
+  (un movej + sleep por pose) se reenvía entero en cada ejecución;
+- programa residente: la primera ejecución sube el residente y la tabla
+  completa; las siguientes envían solo los tramos que cambiaron
+  (programa_residente.ProgramaResidente.sincronizar), contra un robot
+  falso (Python) que responde como el residente URScript.
+
+Mide bytes enviados y tiempo de sincronización, y comprueba que la
+tabla del robot falso quede igual a la del PC.
+
+Uso:
+    python benchmarks/bench_residente.py [poses]
+"""
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import socket
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import urscripts           # noqa: E402
+import ejecucion_bloques   # noqa: E402
+import programa_residente  # noqa: E402
+
+
+def rutina(n: int) -> list:
+    rng = np.random.default_rng(0)
+    poses = np.column_stack([rng.uniform(0.2, 0.6, (n, 3)), rng.normal(0, 0.1, (n, 3))])
+    return [{"tipo": "pose", "pose": p.tolist()} for p in poses]
+
+
+def programa_completo(pasos: list) -> int:
+    lineas = []
+    for paso in pasos:
+        lineas.append("    movej(p[{:.4f}, {:.4f}, {:.4f}, {:.4f}, {:.4f}, {:.4f}], a=0.6, v=0.6)".format(*paso["pose"]))
+        lineas.append("    sleep(0.05)")
+    return len((urscripts.s_cobotStart + "\n" + "\n".join(lineas + ["end", "cearInacap()"])).encode())
+
+
+def robot_falso(puerto: int, capacidad: int, estado: dict) -> None:
+    """Atiende los comandos del residente sobre una tabla en memoria."""
+    with socket.create_connection(("127.0.0.1", puerto)) as s:
+        lector = s.makefile("rb")
+        tabla, n, version = np.zeros((capacidad, ejecucion_bloques.CAMPOS), ">i4"), 0, (0, 0)
+        s.sendall(b"hola %d\r\n" % capacidad)
+        while True:
+            encabezado = lector.read(16)
+            if len(encabezado) < 16:
+                return
+            cmd, a, b, _ = np.frombuffer(encabezado, ">i4")
+            if cmd == programa_residente.CMD_ESCRIBIR:
+                datos = lector.read(4 * ejecucion_bloques.CAMPOS * b)
+                tabla[a:a + b] = np.frombuffer(datos, ">i4").reshape(b, -1)
+            elif cmd == programa_residente.CMD_LARGO:
+                n = a
+            elif cmd == programa_residente.CMD_VERSION:
+                version = (a, b)
+                s.sendall(b"v %d %d\r\n" % version)
+            elif cmd == programa_residente.CMD_CONSULTAR:
+                s.sendall(b"h %d %d %d\r\n" % (*version, n))
+            elif cmd == programa_residente.CMD_EJECUTAR:
+                estado["tabla"] = tabla[:n].copy()
+                s.sendall(b"fin\r\n")
+            elif cmd == programa_residente.CMD_SALIR:
+                return
+
+
+def ejecutar(residente, fin: threading.Event, estado: dict, pasos: list, nombre: str) -> None:
+    t0 = time.perf_counter()
+    tabla, inicios = programa_residente.construir_tabla(pasos)
+    tramos = residente.sincronizar(tabla)
+    dt = time.perf_counter() - t0
+    fin.clear()
+    residente.ejecutar()
+    fin.wait(10)
+    assert np.array_equal(estado["tabla"], tabla), "la tabla del robot no coincide"
+    cambiados = programa_residente.pasos_cambiados(inicios, tramos)
+    print(f"  {nombre:22s} {residente.ultimo_envio:9d} bytes, {len(cambiados):5d} paso(s), {dt * 1e3:6.1f} ms")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    pasos = rutina(n)
+    print(f"rutina de {n} poses")
+    print(f"  programa completo: {programa_completo(pasos):9d} bytes en cada ejecución")
+
+    fin, estado = threading.Event(), {}
+    residente = programa_residente.ProgramaResidente(puerto=0, al_terminar=lambda error: fin.set())
+    capacidad = max(2 * len(programa_residente.construir_tabla(pasos)[0]), programa_residente.CAPACIDAD_MIN)
+    lineas = programa_residente.compilar_residente("127.0.0.1", residente.puerto, capacidad)
+    programa = len((urscripts.s_cobotStart + "\n" + "\n".join(lineas + ["end", "cearInacap()"])).encode())
+    threading.Thread(target=robot_falso, args=(residente.puerto, capacidad, estado), daemon=True).start()
+    assert residente.esperar(0, 5), "el robot falso no se conectó"
+    print(f"  programa residente:  {programa:9d} bytes (una vez)")
+
+    ejecutar(residente, fin, estado, pasos, "tabla completa")
+    pasos[n // 2] = {"tipo": "pose", "pose": [0.3, 0.2, 0.3, 0.0, 3.1, 0.0]}
+    ejecutar(residente, fin, estado, pasos, "tras editar un punto")
+    ejecutar(residente, fin, estado, pasos, "sin cambios")
+    del pasos[n // 10]
+    ejecutar(residente, fin, estado, pasos, "tras borrar un paso")
+    residente.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+bench_rtde_decoder.py
+------------------------------------------------
+Compara el costo de recibir y decodificar paquetes RTDE DATA_PACKAGE:
+
+  1) ruta actual: `receive()` de la librería `rtde` (una lectura de
+     cabecera + una de payload por paquete y un objeto por estado),
+  2) `rtde_rapido` con `struct.Struct` por paquete,
+  3) `rtde_rapido.LectorRapido` (drenado por lotes + dtype NumPy).
+
+Uso:
+    python benchmarks/bench_rtde_decoder.py [receta] [paquetes]
+
+Si la librería `rtde` no está instalada, la ruta 1 se emula con el mismo
+esquema (struct.unpack_from + setattr por campo).
+"""
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import socket
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rtde_rapido  # noqa: E402
+
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "control_loop_configuration.xml")
+
+
+def _recv_exacto(sock, n: int) -> bytes:
+    datos = b""
+    while len(datos) < n:
+        trozo = sock.recv(n - len(datos))
+        if not trozo:
+            raise ConnectionError("cerrado")
+        datos += trozo
+    return datos
+
+
+def _decodificador_libreria(nombres, tipos):
+    """Decodificador de la ruta actual (librería `rtde` o emulación equivalente)."""
+    try:
+        from rtde import serialize
+        config = serialize.DataConfig()
+        config.id, config.names, config.types = 1, nombres, tipos
+        config.fmt = ">B" + "".join(rtde_rapido.TIPOS[t][0] for t in tipos)
+        return config.unpack, "rtde.serialize"
+    except ImportError:
+        pass
+
+    fmt = ">B" + "".join(rtde_rapido.TIPOS[t][0] for t in tipos)
+    anchos = [rtde_rapido.TIPOS[t][2][0] if rtde_rapido.TIPOS[t][2] else 1 for t in tipos]
+
+    class Estado:
+        pass
+
+    def unpack(payload):
+        valores = rtde_rapido.struct.unpack_from(fmt, payload)
+        obj, i = Estado(), 1
+        obj.recipe_id = valores[0]
+        for nombre, ancho in zip(nombres, anchos):
+            setattr(obj, nombre, list(valores[i:i + ancho]) if ancho > 1 else valores[i])
+            i += ancho
+        return obj
+
+    return unpack, "emulada"
+
+
+def _emisor(sock, datos: bytes):
+    sock.sendall(datos)
+    sock.shutdown(socket.SHUT_WR)
+
+
+def _medir(nombre, funcion, datos, n):
+    a, b = socket.socketpair()
+    hilo = threading.Thread(target=_emisor, args=(a, datos), daemon=True)
+    t0, c0 = time.perf_counter(), time.process_time()
+    hilo.start()
+    recibidos = funcion(b, n)
+    t1, c1 = time.perf_counter(), time.process_time()
+    hilo.join()
+    a.close(); b.close()
+    assert recibidos == n, (nombre, recibidos, n)
+    print(f"{nombre:<34} {1e6 * (t1 - t0) / n:8.2f} µs/paquete   "
+          f"{n / (t1 - t0):10.0f} paq/s   CPU {1e6 * (c1 - c0) / n:6.2f} µs/paquete")
+
+
+def main():
+    clave = sys.argv[1] if len(sys.argv) > 1 else "registro"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    nombres, tipos = rtde_rapido.receta_desde_xml(CONFIG_FILE, clave)
+    dec = rtde_rapido.DecodificadorRTDE(nombres, tipos)
+
+    valores = {nom: ([0.1] * rtde_rapido.TIPOS[t][2][0] if rtde_rapido.TIPOS[t][2] else 1)
+               for nom, t in zip(nombres, tipos)}
+    paquete = dec.codificar(1, valores)
+    datos = paquete * n
+    unpack_lib, origen = _decodificador_libreria(nombres, tipos)
+    print(f"receta '{clave}': {len(nombres)} campos, {dec.tam_paquete} B/paquete, {n} paquetes\n")
+
+    def ruta_actual(sock, total):
+        k = 0
+        while k < total:
+            tam, _ = rtde_rapido.CABECERA.unpack(_recv_exacto(sock, 3))
+            unpack_lib(_recv_exacto(sock, tam - 3))
+            k += 1
+        return k
+
+    def ruta_struct(sock, total):
+        k, buf = 0, bytearray(dec.tam_paquete)
+        vista = memoryview(buf)
+        while k < total:
+            leidos = 0
+            while leidos < dec.tam_paquete:
+                leidos += sock.recv_into(vista[leidos:])
+            dec.tupla(buf)
+            k += 1
+        return k
+
+    def ruta_lotes(sock, total):
+        lector = rtde_rapido.LectorRapido(sock, dec, 1)
+        k = 0
+        while k < total:
+            lote = lector.recibir_lote(1.0)
+            if lote is not None:
+                k += len(lote)
+        return k
+
+    _medir(f"actual ({origen})", ruta_actual, datos, n)
+    _medir("struct.Struct por paquete", ruta_struct, datos, n)
+    _medir("LectorRapido (lotes + NumPy)", ruta_lotes, datos, n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+bench_secundaria.py
+------------------------------------------------
+Costo por paquete del parser de la interfaz secundaria (puerto 30002)
+con paquetes ROBOT_STATE de tamaño realista (~1.2 kB, solo se decodifica
+el sub-paquete de modo) intercalados con mensajes de texto/excepción.
+
+Uso:
+    python benchmarks/bench_secundaria.py [paquetes]
+"""
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import interfaz_secundaria as sec  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    bloque = (sec.codificar_estado(7, programa=True, relleno=1150) +
+              sec.codificar_estado(7, programa=False, relleno=1150) +
+              sec.codificar_texto("mensaje de prueba") +
+              sec.codificar_excepcion(42, 7, "compile_error_name_not_found:x"))
+    datos = bytearray(bloque * (n // 4))
+    paquetes = 4 * (n // 4)
+
+    parser = sec.ParserSecundario()
+    t0 = time.perf_counter()
+    consumidos, eventos = parser.procesar(memoryview(datos), len(datos))
+    t1 = time.perf_counter()
+    assert consumidos == len(datos) and parser.paquetes == paquetes
+    print(f"{paquetes} paquetes ({len(datos) / 1e6:.1f} MB), {len(eventos)} eventos")
+    print(f"{1e6 * (t1 - t0) / paquetes:.2f} µs/paquete "
+          f"({(len(datos) / 1e6) / (t1 - t0):.0f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
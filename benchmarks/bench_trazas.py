@@ -0,0 +1,59 @@
+"""
+bench_trazas.py
+------------------------------------------------
+Costo por llamada de los puntos de trazado (trazas.py) desactivados y
+activados, frente a la llamada sin instrumentar.
+
+Uso:
+    python benchmarks/bench_trazas.py [llamadas]
+"""
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import trazas  # noqa: E402
+
+
+def nada(x):
+    return x
+
+
+@trazas.trazar("bench.decorada")
+def decorada(x):
+    return x
+
+
+def con_tramo(x):
+    with trazas.tramo("bench.tramo"):
+        return x
+
+
+def medir(funcion, n: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(n):
+        funcion(i)
+    return 1e9 * (time.perf_counter() - t0) / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    base = medir(nada, n)
+    print(f"{'caso':<24} {'ns/llamada':>11} {'extra':>8}")
+    print(f"{'sin instrumentar':<24} {base:>11.0f}")
+    for estado in (False, True):
+        trazas.activar(n) if estado else trazas.desactivar()
+        for nombre, f in (("decorador", decorada), ("tramo()", con_tramo)):
+            t = medir(f, n)
+            print(f"{nombre + (' activo' if estado else ' inactivo'):<24} {t:>11.0f} {t - base:>8.0f}")
+    ruta = os.path.join(tempfile.gettempdir(), "bench_trazas.json")
+    t0 = time.perf_counter()
+    eventos = trazas.exportar(ruta)
+    print(f"exportar: {eventos} eventos en {time.perf_counter() - t0:.2f} s -> {ruta}")
+
+
+if __name__ == "__main__":
+    main()
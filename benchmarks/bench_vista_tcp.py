@@ -0,0 +1,110 @@
+"""
+bench_vista_tcp.py
+------------------------------------------------
+Costo del panel TCP (vista_tcp.PanelTCP) con la tira llena (100 000
+muestras por defecto):
+
+- ingesta: µs por muestra con lotes como los del lector a 500 Hz;
+- geometría: ms por cuadro (decimación mín/máx ya agregada);
+- ruta: ms para proyectar y reducir una ruta de N puntos;
+- con pantalla: % de CPU del proceso animando a 30 fps sobre un canvas
+  real (ventana oculta) mientras un hilo alimenta RTDE a 500 Hz.
+
+Uso:
+    python benchmarks/bench_vista_tcp.py [muestras] [segundos] [puntos_ruta]
+"""
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import vista_tcp  # noqa: E402
+
+DTYPE = np.dtype([("timestamp", "f8"), ("actual_TCP_pose", "f8", 6)])
+LOTE = 4                                # paquetes por despertar del lector a 500 Hz
+
+
+def trayectoria(n: int, t0: float = 0.0) -> np.ndarray:
+    lote = np.zeros(n, DTYPE)
+    t = t0 + np.arange(n) / 500.0
+    lote["timestamp"] = t
+    lote["actual_TCP_pose"][:, 0] = 0.3 + 0.1 * np.cos(t)
+    lote["actual_TCP_pose"][:, 1] = 0.1 * np.sin(t)
+    lote["actual_TCP_pose"][:, 2] = 0.2 + 0.02 * np.sin(5 * t)
+    return lote
+
+
+def main():
+    muestras = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    puntos = int(sys.argv[3]) if len(sys.argv) > 3 else 100_000
+
+    tira = vista_tcp.TiraTCP(None, 0, 0, 301, 148, muestras)
+    datos = trayectoria(muestras)
+    t = time.perf_counter()
+    for i in range(0, muestras, LOTE):
+        tira.agregar_lote(datos[i:i + LOTE])
+    ingesta = (time.perf_counter() - t) / muestras * 1e6
+
+    t = time.perf_counter()
+    for _ in range(200):
+        tira.geometria()
+    geometria = (time.perf_counter() - t) / 200 * 1e3
+
+    ruta = np.cumsum(np.random.default_rng(1).normal(0, 1e-3, (puntos, 3)), axis=0)
+    t = time.perf_counter()
+    vista_tcp.reducir_ruta(ruta[:, :2] * 2000)
+    reducir = (time.perf_counter() - t) * 1e3
+
+    print(f"tira de {muestras} muestras en {tira.ancho} columnas ({tira.por_columna} por columna)")
+    print(f"  ingesta   {ingesta:8.2f} µs/muestra  ({ingesta * 500 / 1e4:.2f} % de CPU a 500 Hz)")
+    print(f"  geometría {geometria:8.3f} ms/cuadro   ({geometria * 30 / 10:.2f} % de CPU a 30 fps)")
+    print(f"  ruta      {reducir:8.1f} ms para {puntos} puntos")
+
+    try:
+        import tkinter as tk
+        raiz = tk.Tk()
+    except Exception as e:              # sin pantalla (usar xvfb-run)
+        print(f"sin Tk ({e}); se omite la medición sobre canvas")
+        return
+    raiz.withdraw()
+    canvas = tk.Canvas(raiz, width=620, height=160)
+    canvas.pack()
+    panel = vista_tcp.PanelTCP(canvas, 10, 6, 602, 148, muestras)
+    panel.fijar_ruta([{"tipo": "pose", "pose": list(p) + [0, 3.14, 0]} for p in ruta[:5000]])
+    panel.agregar_lote(datos)
+
+    activo = True
+
+    def alimentar():
+        t0, n = time.perf_counter(), 0
+        while activo:
+            panel.agregar_lote(trayectoria(LOTE, n / 500.0))
+            n += LOTE
+            time.sleep(max(0.0, t0 + n / 500.0 - time.perf_counter()))
+
+    threading.Thread(target=alimentar, daemon=True).start()
+    cuadros = [0]
+    original = panel.cuadro
+
+    def contar():
+        cuadros[0] += original()
+
+    panel.cuadro = contar
+    panel.animar(raiz, 30)
+    raiz.after(int(segundos * 1000), raiz.quit)
+    cpu, t = time.process_time(), time.perf_counter()
+    raiz.mainloop()
+    cpu, t = time.process_time() - cpu, time.perf_counter() - t
+    activo = False
+    print(f"  canvas    {100 * cpu / t:8.2f} % de CPU total ({cuadros[0] / t:.1f} cuadros/s redibujados, "
+          f"incluye la alimentación a 500 Hz)")
+
+
+if __name__ == "__main__":
+    main()
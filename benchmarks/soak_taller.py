@@ -0,0 +1,450 @@
+"""
+soak_taller.py
+------------------------------------------------
+Prueba de larga duración (un turno) del núcleo de la app contra
+simuladores locales (simulador.SimuladorUR), para detectar fugas de
+memoria, hilos, sockets o widgets/estilos de Tk y latencias que se
+degradan con las horas.
+
+- Importa Taller_FreeDrive sin su mainloop: conecta el motor, construye
+  la ventana real (oculta) y suscribe los mismos consumidores RTDE.
+- Carga cíclica como en el taller: enseñar poses y acciones de pinza,
+  `borrar_ultimalinea`, `alinear_rutina`, `ejecutar_rutina`,
+  `borrar_posiciones` (y en la celda, `difundir_rutina` y cambio de robot).
+- Cada `--corte` s el simulador cierra todas las conexiones; la app
+  (read_rtde_thread o el motor) debe reconectar sola.
+- Cada `--muestreo` s registra RSS, hilos, descriptores y sockets (app
+  y proceso de E/S), widgets, comandos Tcl, `after` pendientes,
+  imágenes, elementos de estilo ttk, objetos Python y percentiles de
+  latencia (llegada RTDE, retraso del event loop de Tk, acciones).
+- Al final ajusta una recta a cada serie (descartando el calentamiento)
+  y sale con código 1 si alguna crece más que su límite por hora, si el
+  flujo RTDE no se recupera de un corte o si apareció un diálogo de
+  error lejos de un corte.
+
+Modos:
+    robot    1 robot (127.0.0.2) con read_rtde_thread (instalación habitual)
+    celda    2 robots (127.0.0.2, 127.0.0.3) con motor_async.MotorCelda
+    proceso  1 robot (127.0.0.2) con proceso_io.ProcesoIO
+
+Los simuladores usan los puertos estándar en direcciones de loopback
+propias (Linux y Windows aceptan todo 127.0.0.0/8). En Linux sin
+pantalla, correr bajo xvfb-run. psutil es opcional (sin él, /proc).
+
+Uso:
+    python benchmarks/soak_taller.py --horas 8 --hz 500 --modo robot --csv soak.csv
+    xvfb-run python benchmarks/soak_taller.py --horas 0.25 --corte 60 --calentamiento 3
+"""
+# -*- coding: utf-8 -*-
+
+import os
+import gc
+import sys
+import csv
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import configparser
+import tracemalloc
+import multiprocessing as mp
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+import motor_async  # noqa: E402
+import simulador    # noqa: E402
+
+HOSTS = {"robot": ["127.0.0.2"], "celda": ["127.0.0.2", "127.0.0.3"], "proceso": ["127.0.0.2"]}
+
+# Crecimiento tolerado: (pendiente por hora, diferencia mínima entre el
+# primer y el último cuarto de la serie). Ambas deben superarse para fallar.
+LIMITES = {
+    "rss_mb":         (8.0, 4.0),
+    "hilos":          (0.5, 1),
+    "fds":            (1.0, 2),
+    "sockets":        (0.5, 1),
+    "io_rss_mb":      (8.0, 4.0),
+    "io_hilos":       (0.5, 1),
+    "io_sockets":     (0.5, 1),
+    "widgets":        (0.5, 1),
+    "tcl_comandos":   (5.0, 10),
+    "tk_after":       (1.0, 3),
+    "tk_imagenes":    (0.5, 1),
+    "estilos":        (0.5, 1),
+    "objetos_py":     (5000, 5000),
+    "rtde_p99_ms":    (2.0, 2.0),
+    "tk_lag_p99_ms":  (5.0, 5.0),
+    "accion_p99_ms":  (5.0, 5.0),
+}
+DIALOGO_TRAS_CORTE_S = 5.0          # un diálogo de error dentro de esta ventana es esperable
+
+
+def _servir(hosts, hz, ordenes, listo) -> None:
+    """Proceso hijo: un simulador por host; "cortar" cierra sus conexiones."""
+    sims = [simulador.SimuladorUR(host=h, puertos=dict(motor_async.PUERTOS),
+                                  frecuencia_max=max(hz, 500)).iniciar_en_hilo() for h in hosts]
+    listo.set()
+    while ordenes.get() == "cortar":
+        for s in sims:
+            s.llamar(s.cortar_enlaces)
+    for s in sims:
+        s.detener_hilo()
+
+
+def escribir_ajustes(carpeta: str, modo: str, hz: float) -> str:
+    """estacion.ini temporal que apunta la app a los simuladores."""
+    hosts = HOSTS[modo]
+    conf = configparser.ConfigParser()
+    conf.read_dict({"robot": {"ip": hosts[0]},
+                    "rtde": {"frecuencia": f"{hz:g}"},
+                    "metricas": {"puerto": "0"},
+                    "residente": {"activo": "no"}})     # los simuladores no ejecutan URScript
+    if modo == "celda":
+        conf["celda"] = {"robots": ", ".join(f"r{i + 1}={h}" for i, h in enumerate(hosts))}
+    elif modo == "proceso":
+        conf["io"] = {"proceso": "si"}
+    ruta = os.path.join(carpeta, "estacion.ini")
+    with open(ruta, "w", encoding="utf-8") as f:
+        conf.write(f)
+    return ruta
+
+
+class Serie:
+    """Valores de latencia acumulados entre dos muestras (append es atómico con el GIL)."""
+
+    def __init__(self):
+        self.datos = []
+
+    def agregar(self, valor) -> None:
+        self.datos.append(valor)
+
+    def vaciar(self) -> np.ndarray:
+        datos, self.datos = self.datos, []
+        return np.concatenate([np.atleast_1d(d) for d in datos]) if datos else np.zeros(0)
+
+
+class Dialogos:
+    """
+    ============================================================
+    CLASE: Dialogos()
+    ------------------------------------------------------------
+    Reemplaza a `messagebox` en la app: una prueba desatendida
+    no puede quedar esperando un clic. Registra cada diálogo.
+
+        Atributos:
+            registro (list): (t_monotonic, tipo, título, mensaje).
+        Notas:
+            - Las preguntas (askyesno, ...) responden "no".
+    ============================================================
+    """
+
+    def __init__(self):
+        self.registro = []
+
+    def __getattr__(self, tipo):
+        def mostrar(titulo="", mensaje="", **opciones):
+            self.registro.append((time.monotonic(), tipo, titulo, mensaje))
+            return False if tipo.startswith("ask") else "ok"
+        return mostrar
+
+
+def recursos(pid: int) -> dict:
+    """RSS (MB), hilos, descriptores y sockets de un proceso (psutil o /proc)."""
+    if psutil is not None:
+        p = psutil.Process(pid)
+        conexiones = getattr(p, "net_connections", None) or p.connections
+        return {"rss_mb": p.memory_info().rss / 2**20, "hilos": p.num_threads(),
+                "fds": p.num_fds() if hasattr(p, "num_fds") else p.num_handles(),
+                "sockets": len(conexiones(kind="inet"))}
+    with open(f"/proc/{pid}/status", encoding="ascii") as f:
+        campos = dict(linea.split(":", 1) for linea in f if ":" in linea)
+    fds = sockets = 0
+    for fd in os.listdir(f"/proc/{pid}/fd"):
+        try:
+            destino = os.readlink(f"/proc/{pid}/fd/{fd}")
+        except OSError:
+            continue
+        fds += 1
+        sockets += destino.startswith("socket:")
+    return {"rss_mb": int(campos["VmRSS"].split()[0]) / 1024, "hilos": int(campos["Threads"]),
+            "fds": fds, "sockets": sockets}
+
+
+def recursos_tk(ventana, style) -> dict:
+    """Widgets, comandos Tcl (callbacks registrados), `after` pendientes, imágenes y elementos ttk."""
+    def contar(w):
+        return 1 + sum(contar(h) for h in w.winfo_children())
+    return {"widgets": contar(ventana),
+            "tcl_comandos": len(ventana.tk.splitlist(ventana.tk.call("info", "commands"))),
+            "tk_after": len(ventana.tk.splitlist(ventana.tk.call("after", "info"))),
+            "tk_imagenes": len(ventana.tk.splitlist(ventana.tk.call("image", "names"))),
+            "estilos": len(style.element_names())}
+
+
+def percentiles(fila: dict, nombre: str, datos_s: np.ndarray) -> None:
+    datos = datos_s * 1e3
+    fila[f"{nombre}_p50_ms"] = float(np.percentile(datos, 50)) if len(datos) else float("nan")
+    fila[f"{nombre}_p99_ms"] = float(np.percentile(datos, 99)) if len(datos) else float("nan")
+
+
+def ciclo_taller(app, rnd: random.Random, modo: str, medir) -> None:
+    """
+    ============================================================
+    FUNCIÓN: ciclo_taller(app, rnd, modo, medir)
+    ------------------------------------------------------------
+    Un ciclo de uso: enseñar, corregir, ejecutar y a veces borrar.
+
+        Parámetros:
+            app (module): Taller_FreeDrive ya arrancado.
+            rnd (random.Random): generador con semilla fija.
+            modo (str): "robot" | "celda" | "proceso".
+            medir (callable): medir(funcion) la llama y registra su duración.
+        Retorna:
+            None
+        Notas:
+            - Nunca borra todas las líneas recién enseñadas, para que
+            `ejecutar_rutina` no avise "No hay pasos".
+    ============================================================
+    """
+    poses = rnd.randint(2, 6)
+    for _ in range(poses):
+        medir(app.guardar_posicion)
+        if rnd.random() < 0.3:
+            medir(app.cerrar_pinza if app.gripper_status else app.abrir_pinza)
+            medir(app.guardar_accion_gripper)
+    for _ in range(rnd.randint(0, min(2, poses - 1))):
+        medir(app.borrar_ultimalinea)
+    if rnd.random() < 0.2:
+        medir(app.alinear_rutina)
+    medir(app.ejecutar_rutina)
+
+    if modo == "celda":
+        if rnd.random() < 0.2:
+            medir(app.difundir_rutina)
+        if rnd.random() < 0.05:
+            nombres = list(app.motor_celda.robots)
+            app.selector_robot.set(nombres[(nombres.index(app.robot_activo) + 1) % len(nombres)])
+            medir(app.seleccionar_robot)
+
+    if len(app.lista_instrucciones) > 40 or rnd.random() < 0.25:
+        medir(app.borrar_posiciones)
+
+
+def tendencias(muestras: list, calentamiento_h: float) -> list:
+    """
+    ============================================================
+    FUNCIÓN: tendencias(muestras, calentamiento_h)
+    ------------------------------------------------------------
+    Pendiente por hora (mínimos cuadrados) de cada serie vigilada.
+
+        Parámetros:
+            muestras (list[dict]): filas de muestreo (clave "t_h").
+            calentamiento_h (float): horas iniciales descartadas
+            (buffers y cachés que se llenan al arrancar).
+        Retorna:
+            list[tuple]: (serie, inicio, fin, pendiente/h, límite/h, falla).
+        Notas:
+            - inicio/fin son medianas del primer y último cuarto.
+            - Falla solo si la pendiente y la diferencia superan su
+            límite: un escalón aislado no es una fuga.
+    ============================================================
+    """
+    t = np.array([m["t_h"] for m in muestras])
+    resultado = []
+    for clave, (por_hora, minimo) in LIMITES.items():
+        if clave not in muestras[0]:
+            continue
+        y = np.array([m[clave] for m in muestras], dtype=float)
+        ok = (t >= calentamiento_h) & np.isfinite(y)
+        if ok.sum() < 8:
+            resultado.append((clave, float("nan"), float("nan"), float("nan"), por_hora, False))
+            continue
+        pendiente = np.polyfit(t[ok], y[ok], 1)[0]
+        cuarto = max(1, ok.sum() // 4)
+        inicio, fin = np.median(y[ok][:cuarto]), np.median(y[ok][-cuarto:])
+        resultado.append((clave, inicio, fin, pendiente, por_hora, pendiente > por_hora and fin - inicio > minimo))
+    return resultado
+
+
+def main():
+    opciones = argparse.ArgumentParser(description="Prueba de larga duración del núcleo de Taller_FreeDrive")
+    opciones.add_argument("--horas", type=float, default=8.0)
+    opciones.add_argument("--hz", type=float, default=500.0, choices=[125.0, 500.0])
+    opciones.add_argument("--modo", default="robot", choices=sorted(HOSTS))
+    opciones.add_argument("--ciclo", type=float, default=2.0, help="s entre ciclos de carga")
+    opciones.add_argument("--corte", type=float, default=300.0, help="s entre cortes de enlace (0 = sin cortes)")
+    opciones.add_argument("--muestreo", type=float, default=30.0, help="s entre muestras")
+    opciones.add_argument("--calentamiento", type=float, default=10.0, help="min descartados del ajuste")
+    opciones.add_argument("--hueco", type=float, default=10.0, help="s máximos sin RTDE tras un corte")
+    opciones.add_argument("--csv", help="archivo de muestras (se escribe fila a fila)")
+    opciones.add_argument("--tracemalloc", action="store_true", help="al final, líneas con más memoria nueva")
+    opciones.add_argument("--semilla", type=int, default=1)
+    args = opciones.parse_args()
+
+    # Simuladores en un proceso aparte: su CPU y memoria no cuentan
+    ctx = mp.get_context("spawn")
+    ordenes, listo = ctx.Queue(), ctx.Event()
+    servidor = ctx.Process(target=_servir, args=(HOSTS[args.modo], args.hz, ordenes, listo), daemon=True)
+    servidor.start()
+    if not listo.wait(15):
+        sys.exit("Los simuladores no arrancaron")
+
+    carpeta = tempfile.mkdtemp(prefix="soak_taller_")
+    os.environ["TALLER_ESTACION"] = escribir_ajustes(carpeta, args.modo, args.hz)
+    import Taller_FreeDrive as app      # lee TALLER_ESTACION al importar
+
+    dialogos = Dialogos()
+    app.messagebox = dialogos
+    app.conectar_robot()
+    app.construir_ventana()
+    app.ventana.withdraw()
+    app.iniciar_nucleo()
+    ventana = app.ventana
+    io_pid = getattr(app.motor_celda, "pid", None)
+
+    lat_rtde, lag_tk, acciones = Serie(), Serie(), Serie()
+    flujo = {"filas": 0, "ultimo": None, "hueco": 0.0}
+
+    def al_lote(lote):
+        ahora = time.monotonic()
+        lat_rtde.agregar(time.time() - lote["timestamp"])
+        if flujo["ultimo"] is not None:
+            flujo["hueco"] = max(flujo["hueco"], ahora - flujo["ultimo"])
+        flujo["ultimo"] = ahora
+        flujo["filas"] += len(lote)
+
+    app.distribuidor_rtde.suscribir(al_lote, lote=True)
+
+    limite = time.monotonic() + 15
+    while flujo["ultimo"] is None and time.monotonic() < limite:
+        ventana.update()
+        time.sleep(0.05)
+    if flujo["ultimo"] is None:
+        sys.exit("Sin datos RTDE de los simuladores (¿puertos ocupados o sin 127.0.0.2?)")
+
+    def medir(funcion):
+        t = time.perf_counter()
+        funcion()
+        acciones.agregar(time.perf_counter() - t)
+
+    rnd = random.Random(args.semilla)
+    cortes, muestras, fallas = [], [], []
+    memoria = {"base": None}            # instantánea de tracemalloc al terminar el calentamiento
+    archivo = escritor = None
+    t0 = time.monotonic()
+    fin = t0 + args.horas * 3600
+    calentamiento_h = min(args.calentamiento / 60, args.horas / 4)
+
+    def cargar():
+        ciclo_taller(app, rnd, args.modo, medir)
+        ventana.after(int(args.ciclo * 1000), cargar)
+
+    def cortar():
+        ordenes.put("cortar")
+        cortes.append(time.monotonic())
+        ventana.after(int(args.corte * 1000), cortar)
+
+    def sonda():
+        t = time.perf_counter()
+        ventana.after(50, lambda: (lag_tk.agregar(time.perf_counter() - t - 0.05), sonda()))
+
+    def muestrear():
+        nonlocal archivo, escritor
+        ahora = time.monotonic()
+        if args.tracemalloc and memoria["base"] is None and (ahora - t0) / 3600 >= calentamiento_h:
+            tracemalloc.start()
+            memoria["base"] = tracemalloc.take_snapshot()
+        fila = {"t_h": (ahora - t0) / 3600}
+        fila.update(recursos(os.getpid()))
+        if io_pid is not None:
+            fila.update({f"io_{k}": v for k, v in recursos(io_pid).items()})
+        fila.update(recursos_tk(ventana, app.style))
+        fila["objetos_py"] = len(gc.get_objects())
+        percentiles(fila, "rtde", lat_rtde.vaciar())
+        percentiles(fila, "tk_lag", lag_tk.vaciar())
+        percentiles(fila, "accion", acciones.vaciar())
+        fila["rtde_hz"] = flujo["filas"] / args.muestreo
+        fila["hueco_max_s"] = max(flujo["hueco"], ahora - flujo["ultimo"])
+        fila["reconexiones"] = sum(app.conexiones_enlaces().values())
+        fila["cortes"] = len(cortes)
+        fila["dialogos"] = len(dialogos.registro)
+        flujo["filas"], flujo["hueco"] = 0, 0.0
+        muestras.append(fila)
+
+        if args.csv:
+            if escritor is None:
+                archivo = open(args.csv, "w", newline="", encoding="utf-8")
+                escritor = csv.DictWriter(archivo, fieldnames=list(fila))
+                escritor.writeheader()
+            escritor.writerow(fila)
+            archivo.flush()
+        print(f"{fila['t_h']:6.2f} h  RSS {fila['rss_mb']:6.1f} MB  hilos {fila['hilos']:3d}  "
+              f"sockets {fila['sockets']:3d}  widgets {fila['widgets']:4d}  tcl {fila['tcl_comandos']:5d}  "
+              f"RTDE {fila['rtde_hz']:5.0f} Hz p99 {fila['rtde_p99_ms']:6.2f} ms  "
+              f"Tk p99 {fila['tk_lag_p99_ms']:6.2f} ms  hueco {fila['hueco_max_s']:5.2f} s  "
+              f"cortes {fila['cortes']}  diálogos {fila['dialogos']}", flush=True)
+
+        if fila["hueco_max_s"] > args.hueco:
+            fallas.append(f"{fila['t_h']:.2f} h: {fila['hueco_max_s']:.1f} s sin RTDE")
+        if ahora < fin:
+            ventana.after(int(args.muestreo * 1000), muestrear)
+        else:
+            ventana.quit()
+
+    print(f"Soak {args.horas:g} h, modo {args.modo}, RTDE {args.hz:.0f} Hz, "
+          f"ciclo {args.ciclo:g} s, corte cada {args.corte:g} s, muestra cada {args.muestreo:g} s")
+    ventana.after(int(args.ciclo * 1000), cargar)
+    if args.corte > 0:
+        ventana.after(int(args.corte * 1000), cortar)
+    sonda()
+    ventana.after(int(args.muestreo * 1000), muestrear)
+    ventana.mainloop()
+
+    # Cierre
+    if memoria["base"] is not None:
+        print("\nMemoria nueva desde el fin del calentamiento (top 15):")
+        for estadistica in tracemalloc.take_snapshot().compare_to(memoria["base"], "lineno")[:15]:
+            print(f"  {estadistica}")
+    app.conexion_ur.cerrar()
+    app.cliente_dashboard.cerrar()
+    if app.motor_celda is not None:
+        app.motor_celda.detener()
+    else:
+        app.cerrar_rtde()
+    ventana.destroy()
+    ordenes.put("detener")
+    servidor.join(5)
+    if archivo is not None:
+        archivo.close()
+    shutil.rmtree(carpeta, ignore_errors=True)
+
+    # Veredicto
+    print(f"\n{'serie':>15} {'inicio':>10} {'fin':>10} {'/hora':>10} {'límite':>8}")
+    for clave, inicio, final, pendiente, por_hora, falla in tendencias(muestras, calentamiento_h):
+        print(f"{clave:>15} {inicio:>10.2f} {final:>10.2f} {pendiente:>10.2f} {por_hora:>8.2f}"
+              f"{'  CRECE' if falla else ''}")
+        if falla:
+            fallas.append(f"{clave} crece {pendiente:.2f}/h (límite {por_hora:g}/h)")
+    if muestras and muestras[-1]["rtde_hz"] < 0.5 * args.hz:
+        fallas.append(f"flujo RTDE final {muestras[-1]['rtde_hz']:.0f} Hz (pedido {args.hz:.0f} Hz)")
+    for t, tipo, titulo, mensaje in dialogos.registro:
+        if not any(0 <= t - c <= DIALOGO_TRAS_CORTE_S for c in cortes):
+            fallas.append(f"diálogo {tipo} fuera de un corte: {titulo}: {mensaje!r}")
+
+    if fallas:
+        print("\nFALLA:\n  " + "\n  ".join(fallas))
+        sys.exit(1)
+    print("\nOK: sin crecimiento sostenido")
+
+
+if __name__ == "__main__":
+    main()
+
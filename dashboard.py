@@ -0,0 +1,176 @@
+"""
+dashboard.py
+------------------------------------------------
+Propósito: cliente del Dashboard Server del UR (puerto 29999) sobre UNA
+conexión persistente. Las consultas se envían en tubería (pipelining):
+varias líneas en una sola escritura y luego se leen las respuestas en
+orden, con caché por TTL para que varios widgets que consultan el mismo
+estado colapsen en un único viaje de ida y vuelta.
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y constantes
+# ------------------------------------------------------------
+
+import time
+import socket
+import threading
+
+PUERTO_DASHBOARD = 29999
+
+# Comandos de solo lectura: se pueden cachear
+CONSULTAS = {"programState", "robotmode", "safetystatus", "safetymode", "running",
+             "get loaded program", "isProgramSaved", "is in remote control"}
+
+CONSULTA_ESTADO = ("programState", "robotmode", "safetystatus")
+
+
+def interpretar_estado(r: dict) -> dict:
+    """Respuestas de CONSULTA_ESTADO -> {"programa", "modo", "seguridad"}."""
+    return {"programa": r["programState"].split(" ")[0],
+            "modo": r["robotmode"].split(":")[-1].strip(),
+            "seguridad": r["safetystatus"].split(":")[-1].strip()}
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Cliente
+# ------------------------------------------------------------
+class ClienteDashboard:
+    """
+    ============================================================
+    CLASE: ClienteDashboard(ip, puerto=29999, ttl=0.5, timeout=2.0)
+    ------------------------------------------------------------
+    Cliente persistente del Dashboard Server.
+
+        Métodos:
+            consultar(*comandos) -> dict: {comando: respuesta}.
+            estado() -> dict: programa, modo y seguridad en un viaje.
+            stop(), play(), pause(), desbloquear_parada(): control.
+            cerrar()
+        Notas:
+            - Las consultas (ver CONSULTAS) se sirven de caché si
+            tienen menos de `ttl` s; solo las vencidas viajan.
+            - Los comandos de control nunca se cachean e invalidan
+            la caché.
+            - Ante un error de socket reconecta y reintenta una vez.
+            - Seguro entre hilos: un hilo que espera el candado
+            encuentra la caché recién llenada por el anterior.
+    ============================================================
+    """
+
+    def __init__(self, ip: str, puerto: int = PUERTO_DASHBOARD, ttl: float = 0.5, timeout: float = 2.0):
+        self.ip, self.puerto = ip, puerto
+        self.ttl, self.timeout = ttl, timeout
+        self._sock = None
+        self._pendiente = b""
+        self._cache = {}                # comando -> (t, respuesta)
+        self._lock = threading.Lock()
+        self.viajes = 0                 # escrituras en tubería realizadas
+        self.reconexiones = 0
+
+    # ---------- conexión ----------
+    def _conectar(self):
+        if self._sock is None:
+            s = socket.create_connection((self.ip, self.puerto), timeout=self.timeout)
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock, self._pendiente = s, b""
+            self._leer_linea()          # saludo: "Connected: Universal Robots Dashboard Server"
+            self.reconexiones += 1
+        return self._sock
+
+    def _leer_linea(self) -> str:
+        while b"\n" not in self._pendiente:
+            trozo = self._sock.recv(4096)
+            if not trozo:
+                raise ConnectionError("Dashboard: conexión cerrada")
+            self._pendiente += trozo
+        linea, self._pendiente = self._pendiente.split(b"\n", 1)
+        return linea.decode("utf-8", errors="replace").strip()
+
+    def _descartar(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock, self._pendiente = None, b""
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._descartar()
+
+    # ---------- envío en tubería ----------
+    def _tuberia(self, comandos: list) -> list:
+        for intento in (0, 1):
+            try:
+                s = self._conectar()
+                s.sendall("".join(c + "\n" for c in comandos).encode("utf-8"))
+                self.viajes += 1
+                return [self._leer_linea() for _ in comandos]
+            except OSError:
+                self._descartar()
+                if intento:
+                    raise
+
+    def consultar(self, *comandos) -> dict:
+        """
+        ============================================================
+        MÉTODO: consultar(*comandos)
+        ------------------------------------------------------------
+        Envía en un solo viaje todos los comandos que no estén en
+        caché vigente y devuelve las respuestas.
+
+            Parámetros:
+                comandos (str): p. ej. "programState", "robotmode".
+            Retorna:
+                dict: {comando: respuesta (str)}.
+            Errores:
+                OSError si no se puede hablar con el robot.
+        ============================================================
+        """
+        with self._lock:
+            ahora = time.monotonic()
+            respuestas, faltan = {}, []
+            for c in comandos:
+                en_cache = self._cache.get(c)
+                if c in CONSULTAS and en_cache and ahora - en_cache[0] < self.ttl:
+                    respuestas[c] = en_cache[1]
+                elif c not in faltan:
+                    faltan.append(c)
+
+            if faltan:
+                control = any(c not in CONSULTAS for c in faltan)
+                if control:
+                    self._cache.clear()
+                t = time.monotonic()
+                for c, r in zip(faltan, self._tuberia(faltan)):
+                    respuestas[c] = r
+                    if c in CONSULTAS and not control:
+                        self._cache[c] = (t, r)
+            return respuestas
+
+    # ---------- atajos ----------
+    def estado(self) -> dict:
+        """Programa, modo y seguridad del robot en un único viaje (o desde caché)."""
+        return interpretar_estado(self.consultar(*CONSULTA_ESTADO))
+
+    def stop(self) -> str:
+        return self.consultar("stop")["stop"]
+
+    def play(self) -> str:
+        return self.consultar("play")["play"]
+
+    def pause(self) -> str:
+        return self.consultar("pause")["pause"]
+
+    def desbloquear_parada(self) -> str:
+        return self.consultar("unlock protective stop")["unlock protective stop"]
+
+# ▲▲========================================================▲▲
@@ -0,0 +1,445 @@
+"""
+ejecucion_bloques.py
+------------------------------------------------
+Propósito: ejecución de rutinas en streaming. En lugar de compilar toda
+la rutina a un único programa URScript, el robot recibe un programa
+corto y de tamaño constante (el receptor residente) que abre un socket
+hacia el PC y ejecuta registros de movimiento a medida que llegan.
+
+- La rutina se traduce a registros de 10 enteros de 32 bits big-endian
+  (`socket_read_binary_integer`): [op, x, y, z, rx, ry, rz, a, v, r],
+  en µm / µrad / µm/s / µm/s² (x 1e6).
+- Los registros viajan en bloques de `TAMANO`. El receptor confirma el
+  inicio de cada bloque con una línea ("k"); el PC mantiene a lo sumo
+  `VENTANA` bloques en cola detrás del que se ejecuta (control de flujo)
+  y prepara el siguiente mientras el robot se mueve.
+- El primer movimiento espera solo al primer bloque, sin importar el
+  largo de la rutina.
+
+Uso:
+    emisor = EmisorBloques(lambda: bloques(pasos))
+    programa = s_cobotStart + "\\n".join(compilar_receptor(host, emisor.puerto)) + ...
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y constantes
+# ------------------------------------------------------------
+
+import socket
+import threading
+import time
+
+import numpy as np
+
+import poses
+import paletizado
+import trayectorias
+import metricas
+
+OP_FIN, OP_MOVEJ, OP_MOVEL, OP_ABRIR, OP_CERRAR, OP_ESPERA = range(6)
+CAMPOS = 10                             # enteros por registro
+ESCALA = np.array([1] + [1e6] * (CAMPOS - 1))
+ACEL_J, VEL_J = 0.6, 0.6                # pasos "pose" (como construir_script_rutina)
+PAUSA = 0.05                            # s entre pasos
+
+TAMANO = 500                            # registros por bloque
+VENTANA = 2                             # bloques en cola detrás del que se ejecuta
+PUERTO = 50010                          # puerto del PC al que se conecta el robot
+ESPERA_S = 10.0                         # s sin datos/conexión antes de abandonar
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Pasos → registros
+# ------------------------------------------------------------
+def _registros(op: int, pose=None, a: float = 0.0, v: float = 0.0, r=0.0, n: int = 1) -> np.ndarray:
+    """Arreglo (n, CAMPOS) de registros con la misma operación."""
+    regs = np.zeros((n, CAMPOS))
+    regs[:, 0] = op
+    if pose is not None:
+        regs[:, 1:7] = pose
+    regs[:, 7], regs[:, 8], regs[:, 9] = a, v, r
+    return regs
+
+
+def _espera() -> np.ndarray:
+    return _registros(OP_ESPERA, a=PAUSA)
+
+
+def _registros_patron(paso: dict) -> np.ndarray:
+    """Mismos movimientos que `paletizado.compilar_patron`, calculados en el PC."""
+    celdas = paletizado.generar_poses(paso)
+    aprox = [0, 0, -paso["aproximacion"], 0, 0, 0]
+    arriba = poses.componer(celdas, aprox).reshape(-1, 6)
+    n = len(celdas)
+    J, L = (paletizado.ACEL_J, paletizado.VEL_J), (paletizado.ACEL_L, paletizado.VEL_L)
+
+    columnas = []                       # un registro por celda en cada columna
+    if paso.get("recoger") is not None:
+        recoger = np.asarray(paso["recoger"], dtype=float)
+        sobre = poses.componer(recoger, aprox).reshape(6)
+        columnas += [_registros(OP_MOVEJ, sobre, *J, n=n), _registros(OP_MOVEL, recoger, *L, n=n),
+                     _registros(OP_CERRAR, n=n), _registros(OP_MOVEL, sobre, *L, n=n)]
+    columnas += [_registros(OP_MOVEJ, arriba, *J, n=n), _registros(OP_MOVEL, celdas, *L, n=n)]
+    accion = "Abrir" if paso.get("recoger") is not None else paso.get("accion")
+    if accion in ("Abrir", "Cerrar"):
+        columnas.append(_registros(OP_ABRIR if accion == "Abrir" else OP_CERRAR, n=n))
+    columnas.append(_registros(OP_MOVEL, arriba, *L, n=n))
+    return np.stack(columnas, axis=1).reshape(-1, CAMPOS)
+
+
+def registros(pasos: list, tamano: int = TAMANO):
+    """
+    ============================================================
+    FUNCIÓN: registros(pasos, tamano=TAMANO)
+    ------------------------------------------------------------
+    Traduce los pasos de `lista_instrucciones` a registros, con la
+    misma semántica que `construir_script_rutina` (pausa corta
+    entre pasos).
+
+        Parámetros:
+            pasos (list): pasos pose / gripper / patron / trayectoria.
+            tamano (int): tope de registros por arreglo generado (las
+            trayectorias largas se cortan, así preparar un bloque no
+            recorre la trayectoria completa).
+        Retorna:
+            generador de ndarray (n, CAMPOS) float64 (sin escalar).
+    ============================================================
+    """
+    for paso in pasos:
+        tipo = paso.get("tipo")
+        if tipo == "pose":
+            yield _registros(OP_MOVEJ, paso["pose"], ACEL_J, VEL_J)
+        elif tipo == "gripper":
+            yield _registros(OP_ABRIR if paso["accion"] == "Abrir" else OP_CERRAR)
+        elif tipo == "patron":
+            yield _registros_patron(paso)
+        elif tipo == "trayectoria":
+            puntos = paso["poses"]
+            yield _registros(OP_MOVEJ, puntos[0], trayectorias.ACEL_J, trayectorias.VEL_J)
+            for i in range(1, len(puntos), tamano):
+                fin = min(len(puntos), i + tamano)
+                radios = trayectorias.radios_mezcla(puntos[i - 1:fin + 1, :3], paso["radio"])[1:fin - i + 1]
+                yield _registros(OP_MOVEL, puntos[i:fin], paso["acel"], paso["vel"][i:fin], radios, fin - i)
+        else:
+            continue
+        yield _espera()
+
+
+def contar_registros(pasos: list) -> int:
+    """Cantidad de registros que genera `registros(pasos)` (sin generarlos)."""
+    total = 0
+    for paso in pasos:
+        tipo = paso.get("tipo")
+        if tipo == "patron":
+            n_x, n_y, n_z = paso["n"]
+            por_celda = 3 + (5 if paso.get("recoger") is not None else paso.get("accion") in ("Abrir", "Cerrar"))
+            total += n_x * n_y * n_z * por_celda + 1
+        elif tipo == "trayectoria":
+            total += len(paso["poses"]) + 1
+        elif tipo in ("pose", "gripper"):
+            total += 2
+    return total
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Registros → bloques
+# ------------------------------------------------------------
+def codificar(regs: np.ndarray) -> bytes:
+    """Registros (n, CAMPOS) → bytes para `socket_read_binary_integer` (int32 big-endian)."""
+    return np.rint(regs * ESCALA).astype(">i4").tobytes()
+
+
+def bloques(pasos: list, tamano: int = TAMANO):
+    """
+    ============================================================
+    FUNCIÓN: bloques(pasos, tamano=TAMANO)
+    ------------------------------------------------------------
+    Genera los bloques codificados de la rutina: todos de
+    `tamano` registros salvo el último, que termina con OP_FIN.
+
+        Parámetros:
+            pasos (list): pasos de la rutina.
+            tamano (int): registros por bloque (igual que en el receptor).
+        Retorna:
+            generador de bytes.
+        Notas:
+            - Perezoso: cada bloque se calcula cuando el emisor lo
+            pide, mientras el robot ejecuta el anterior.
+    ============================================================
+    """
+    pendiente, n = [], 0
+    for regs in registros(pasos, tamano):
+        while len(regs):
+            toma = regs[:tamano - n]
+            regs = regs[len(toma):]
+            pendiente.append(toma)
+            n += len(toma)
+            if n == tamano:
+                yield codificar(np.concatenate(pendiente))
+                pendiente, n = [], 0
+    pendiente.append(_registros(OP_FIN))
+    yield codificar(np.concatenate(pendiente))
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 04 Receptor residente (URScript)
+# ------------------------------------------------------------
+def compilar_receptor(host: str, puerto: int = PUERTO, tamano: int = TAMANO,
+                      espera_s: float = ESPERA_S, sangria: str = "    ") -> list:
+    """
+    ============================================================
+    FUNCIÓN: compilar_receptor(host, puerto, tamano, espera_s, sangria)
+    ------------------------------------------------------------
+    Cuerpo URScript del receptor: se conecta al PC, confirma el
+    inicio de cada bloque y ejecuta registro por registro hasta
+    OP_FIN. Va dentro de `urscripts.s_cobotStart` (usa rq_*).
+
+        Parámetros:
+            host (str): IP del PC vista desde el robot.
+            puerto (int): puerto de `EmisorBloques`.
+            tamano (int): registros por bloque (igual que `bloques`).
+            espera_s (float): s sin datos antes de detenerse.
+            sangria (str): sangría base.
+        Retorna:
+            list[str]: líneas; el tamaño no depende de la rutina.
+        Notas:
+            - El bloque siguiente ya está en el buffer del socket
+            cuando termina el actual, así los movel con radio de
+            mezcla no se detienen entre bloques.
+    ============================================================
+    """
+    s0, s1, s2, s3 = sangria, sangria + "  ", sangria + "    ", sangria + "      "
+    campo = ", ".join(f"blq_r[{i}] / 1000000.0" for i in range(2, 8))
+    return [
+        f"{s0}# Rutina por bloques: receptor residente",
+        f'{s0}if not socket_open("{host}", {puerto}, "bloques"):',
+        f'{s1}popup("Sin conexión con el PC ({host}:{puerto})", "Rutina por bloques", error=True)',
+        f"{s1}halt",
+        f"{s0}end",
+        f"{s0}blq_k = 0",
+        f"{s0}blq_n = 0",
+        f"{s0}blq_espera = 0",
+        f"{s0}while True:",
+        f'{s1}blq_r = socket_read_binary_integer({CAMPOS}, "bloques", 1)',
+        f"{s1}if blq_r[0] < {CAMPOS}:",
+        f"{s2}blq_espera = blq_espera + 1",
+        f"{s2}if blq_espera > {int(espera_s)}:",
+        f'{s3}popup("El PC dejó de enviar la rutina", "Rutina por bloques", error=True)',
+        f"{s3}halt",
+        f"{s2}end",
+        f"{s1}else:",
+        f"{s2}blq_espera = 0",
+        f"{s2}if blq_n == 0:",
+        f'{s3}socket_send_line(to_str(blq_k), "bloques")',
+        f"{s3}blq_k = blq_k + 1",
+        f"{s2}end",
+        f"{s2}blq_n = blq_n + 1",
+        f"{s2}if blq_n == {tamano}:",
+        f"{s3}blq_n = 0",
+        f"{s2}end",
+        f"{s2}blq_op = blq_r[1]",
+        f"{s2}if blq_op == {OP_FIN}:",
+        f"{s3}break",
+        f"{s2}end",
+        f"{s2}blq_p = p[{campo}]",
+        f"{s2}blq_a = blq_r[8] / 1000000.0",
+        f"{s2}blq_v = blq_r[9] / 1000000.0",
+        f"{s2}blq_rad = blq_r[10] / 1000000.0",
+        f"{s2}if blq_op == {OP_MOVEJ}:",
+        f"{s3}movej(blq_p, a=blq_a, v=blq_v, r=blq_rad)",
+        f"{s2}elif blq_op == {OP_MOVEL}:",
+        f"{s3}movel(blq_p, a=blq_a, v=blq_v, r=blq_rad)",
+        f"{s2}elif blq_op == {OP_ABRIR}:",
+        f"{s3}rq_open_and_classify()",
+        f"{s2}elif blq_op == {OP_CERRAR}:",
+        f"{s3}rq_close_and_classify()",
+        f"{s2}elif blq_op == {OP_ESPERA}:",
+        f"{s3}sleep(blq_a)",
+        f"{s2}end",
+        f"{s1}end",
+        f"{s0}end",
+        f'{s0}socket_send_line("fin", "bloques")',
+        f'{s0}socket_close("bloques")',
+    ]
+
+
+def host_local(ip_robot: str) -> str:
+    """IP de la interfaz del PC que enruta hacia el robot (sin enviar nada)."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect((ip_robot, 9))
+        return s.getsockname()[0]
+    finally:
+        s.close()
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 05 Emisor (servidor en el PC)
+# ------------------------------------------------------------
+class _ErrorFuente(RuntimeError):
+    """La rutina (fuente de bloques) falló; no es un error de la conexión."""
+
+
+def resolver_ip(host: str) -> str:
+    """IP de `host` (las conexiones se comparan por dirección)."""
+    try:
+        return socket.gethostbyname(host)
+    except OSError:
+        return host
+
+
+class EmisorBloques:
+    """
+    ============================================================
+    CLASE: EmisorBloques(fuente, puerto, ventana, conexiones, permitidos, ...)
+    ------------------------------------------------------------
+    Servidor TCP al que se conecta el receptor residente. Cada
+    conexión (un robot) recorre su propio iterador de bloques en
+    un hilo y respeta la ventana de control de flujo.
+
+        Parámetros:
+            fuente (callable): fuente() → iterador de bloques (bytes),
+            p. ej. lambda: bloques(pasos).
+            puerto (int): puerto de escucha (0 = libre).
+            ventana (int): bloques en cola detrás del que se ejecuta.
+            conexiones (int): robots que se esperan (celda).
+            permitidos (iterable | None): IP/nombres de los robots;
+            otras conexiones se rechazan y no ocupan un lugar
+            (None = cualquiera, solo para pruebas locales).
+            espera_s (float): s para que se conecten los robots.
+            al_terminar (callable | None): al_terminar(ip, error)
+            desde el hilo de la conexión; error None si terminó la
+            rutina.
+        Notas:
+            - Crear el emisor ANTES de enviar el programa: el robot
+            se conecta apenas empieza.
+            - `cerrar()` corta todas las conexiones (Detener) sin
+            informar error.
+            - Si `fuente` falla (paso mal formado), se envía OP_FIN
+            para que el robot termine tras los bloques ya en cola y
+            se informa el error a `al_terminar` de inmediato.
+    ============================================================
+    """
+
+    def __init__(self, fuente, puerto: int = PUERTO, ventana: int = VENTANA, conexiones: int = 1,
+                 permitidos=None, espera_s: float = ESPERA_S, al_terminar=None):
+        self._fuente = fuente
+        self.ventana = ventana
+        self._conexiones = conexiones
+        self._permitidos = None if permitidos is None else {resolver_ip(h) for h in permitidos}
+        self._espera_s = espera_s
+        self._al_terminar = al_terminar
+        self._activo = True
+        self._clientes = []
+        self.inicio = time.perf_counter()
+        self.primer_envio = None        # s desde la creación hasta el primer bloque enviado
+        self.enviados = 0               # bloques enviados (todas las conexiones)
+        self._servidor = socket.create_server(("", puerto))
+        self.puerto = self._servidor.getsockname()[1]
+        threading.Thread(target=self._aceptar, daemon=True).start()
+
+    def _aceptar(self) -> None:
+        limite = time.monotonic() + self._espera_s
+        aceptadas = 0
+        try:
+            while aceptadas < self._conexiones:
+                try:
+                    self._servidor.settimeout(max(limite - time.monotonic(), 0.001))
+                    conexion, direccion = self._servidor.accept()
+                except socket.timeout:
+                    self._terminar(None, TimeoutError("el robot no se conectó al emisor de bloques"))
+                    return
+                except OSError:         # cerrado
+                    return
+                if self._permitidos is not None:
+                    if direccion[0] not in self._permitidos:
+                        print(f"[bloques] conexión rechazada de {direccion[0]} (no es un robot esperado)")
+                        conexion.close()
+                        continue
+                    self._permitidos.discard(direccion[0])     # una conexión por robot
+                aceptadas += 1
+                self._clientes.append(conexion)
+                threading.Thread(target=self._servir, args=(conexion, direccion[0]), daemon=True).start()
+        finally:
+            self._servidor.close()
+
+    def _servir(self, conexion: socket.socket, ip: str) -> None:
+        error = None
+        try:
+            conexion.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conexion.settimeout(None)   # un bloque puede tardar minutos en ejecutarse
+            lector = conexion.makefile("rb")
+            iterador = self._bloques_fuente()
+            siguiente = next(iterador, None)
+            confirmado, k = -1, 0       # último bloque iniciado por el robot / próximo a enviar
+            while self._activo:
+                while siguiente is not None and k <= confirmado + self.ventana:
+                    conexion.sendall(siguiente)
+                    if self.primer_envio is None:
+                        self.primer_envio = time.perf_counter() - self.inicio
+                    self.enviados += 1
+                    metricas.RUTINA_BLOQUES.incrementar(robot=ip)
+                    k += 1
+                    siguiente = next(iterador, None)    # preparar mientras el robot se mueve
+                linea = lector.readline().strip()
+                if linea == b"fin":
+                    break
+                if not linea:
+                    raise ConnectionError(f"el robot cerró la conexión en el bloque {confirmado}")
+                confirmado = int(linea)
+        except _ErrorFuente as e:       # paso mal formado: que el robot termine ya
+            error = e
+            try:
+                conexion.sendall(codificar(_registros(OP_FIN)))
+            except OSError:
+                pass
+        except (OSError, ValueError) as e:
+            error = e
+        finally:
+            conexion.close()
+        self._terminar(ip, error)
+
+    def _bloques_fuente(self):
+        """Bloques de `fuente`; cualquier error de la rutina sale como _ErrorFuente."""
+        try:
+            yield from self._fuente()
+        except Exception as e:
+            raise _ErrorFuente(f"no se pudo preparar la rutina: {type(e).__name__}: {e}") from e
+
+    def _terminar(self, ip, error) -> None:
+        if self._al_terminar is not None and self._activo:
+            self._al_terminar(ip, error)
+
+    def cerrar(self) -> None:
+        """Corta el servidor y todas las conexiones (sin avisar a `al_terminar`)."""
+        self._activo = False
+        self._servidor.close()
+        for conexion in self._clientes:
+            try:
+                conexion.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+# ▲▲========================================================▲▲
@@ -0,0 +1,292 @@
+"""
+interfaz_secundaria.py
+------------------------------------------------
+Propósito: conexión persistente al puerto 30002 (interfaz secundaria) que
+envía los programas URScript y además interpreta el flujo de estado que el
+controlador devuelve por el mismo socket: modo del robot / estado del
+programa, excepciones de ejecución y mensajes de texto.
+
+Solo se decodifican los sub-paquetes suscritos; el resto se salta por su
+longitud con `struct.unpack_from` sobre un `memoryview`, sin copias.
+
+Formato (big-endian): [int32 largo][uint8 tipo][contenido]
+  - 16 ROBOT_STATE  : secuencia de sub-paquetes [int32 largo][uint8 tipo]...
+  - 20 ROBOT_MESSAGE: [uint64 t][int8 fuente][uint8 tipo_mensaje]...
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y constantes
+# ------------------------------------------------------------
+
+import time
+import select
+import socket
+import struct
+import threading
+
+MSG_ROBOT_STATE   = 16
+MSG_ROBOT_MESSAGE = 20
+
+SUB_ROBOT_MODE = 0                   # sub-paquete "Robot mode data"
+
+ROBOT_MSG_TEXT              = 0
+ROBOT_MSG_ERROR_CODE        = 6
+ROBOT_MSG_KEY               = 7
+ROBOT_MSG_RUNTIME_EXCEPTION = 10
+
+MODOS_ROBOT = {-1: "SIN CONTROLADOR", 0: "DESCONECTADO", 1: "CONFIRMAR SEGURIDAD",
+               2: "INICIANDO", 3: "APAGADO", 4: "ENCENDIDO", 5: "EN REPOSO",
+               6: "BACKDRIVE", 7: "EN MARCHA", 8: "ACTUALIZANDO FIRMWARE"}
+
+_CAB       = struct.Struct(">iB")                # largo + tipo (paquete y sub-paquete)
+_MODO      = struct.Struct(">Q???????bBddd")     # robot mode data (sin byte reservado e-Series)
+_MENSAJE   = struct.Struct(">QbB")               # timestamp, fuente, tipo de mensaje
+_EXCEPCION = struct.Struct(">ii")                # línea, columna
+_ERROR     = struct.Struct(">iiiBI")             # código, argumento, nivel, tipo dato, dato
+_CLAVE     = struct.Struct(">iiB")               # código, argumento, largo del título
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Parser del flujo
+# ------------------------------------------------------------
+class ParserSecundario:
+    """
+    ============================================================
+    CLASE: ParserSecundario()
+    ------------------------------------------------------------
+    Interpreta paquetes completos de la interfaz secundaria y
+    genera eventos (dict) solo cuando hay algo nuevo.
+
+        Métodos:
+            procesar(buf, fin) -> (consumidos, eventos)
+        Eventos:
+            {"tipo": "modo", "modo", "modo_txt", "programa",
+             "pausado", "parada_protectiva", "emergencia", "encendido"}
+            {"tipo": "excepcion", "linea", "columna", "texto"}
+            {"tipo": "error", "codigo", "argumento", "nivel", "texto"}
+            {"tipo": "clave", "codigo", "argumento", "titulo", "texto"}
+            {"tipo": "texto", "texto"}
+        Notas:
+            - El evento "modo" se emite solo si cambia algún campo
+            (el controlador lo envía a ~10 Hz).
+    ============================================================
+    """
+
+    def __init__(self):
+        self.ultimo_modo = None
+        self.paquetes = 0
+
+    def procesar(self, buf, fin: int):
+        eventos = []
+        pos = 0
+        while fin - pos >= _CAB.size:
+            largo, tipo = _CAB.unpack_from(buf, pos)
+            if largo < _CAB.size:
+                raise ConnectionError(f"30002: largo de paquete inválido ({largo})")
+            if fin - pos < largo:
+                break
+            if tipo == MSG_ROBOT_STATE:
+                self._estado(buf, pos + _CAB.size, pos + largo, eventos)
+            elif tipo == MSG_ROBOT_MESSAGE:
+                self._mensaje(buf, pos + _CAB.size, pos + largo, eventos)
+            self.paquetes += 1
+            pos += largo
+        return pos, eventos
+
+    def _estado(self, buf, pos: int, fin: int, eventos: list) -> None:
+        while fin - pos >= _CAB.size:
+            largo, tipo = _CAB.unpack_from(buf, pos)
+            if largo < _CAB.size or pos + largo > fin:
+                return
+            if tipo == SUB_ROBOT_MODE and largo >= _CAB.size + _MODO.size:
+                (_, _, _, encendido, emergencia, protectiva, programa,
+                 pausado, modo, _, _, _, _) = _MODO.unpack_from(buf, pos + _CAB.size)
+                actual = (modo, programa, pausado, protectiva, emergencia, encendido)
+                if actual != self.ultimo_modo:
+                    self.ultimo_modo = actual
+                    eventos.append({"tipo": "modo", "modo": modo,
+                                    "modo_txt": MODOS_ROBOT.get(modo, str(modo)),
+                                    "programa": programa, "pausado": pausado,
+                                    "parada_protectiva": protectiva, "emergencia": emergencia,
+                                    "encendido": encendido})
+            pos += largo
+
+    @staticmethod
+    def _texto(buf, ini: int, fin: int) -> str:
+        return bytes(buf[ini:fin]).decode("utf-8", errors="replace")
+
+    def _mensaje(self, buf, pos: int, fin: int, eventos: list) -> None:
+        if fin - pos < _MENSAJE.size:
+            return
+        _, _, tipo = _MENSAJE.unpack_from(buf, pos)
+        pos += _MENSAJE.size
+        if tipo == ROBOT_MSG_RUNTIME_EXCEPTION and fin - pos >= _EXCEPCION.size:
+            linea, columna = _EXCEPCION.unpack_from(buf, pos)
+            eventos.append({"tipo": "excepcion", "linea": linea, "columna": columna,
+                            "texto": self._texto(buf, pos + _EXCEPCION.size, fin)})
+        elif tipo == ROBOT_MSG_ERROR_CODE and fin - pos >= _ERROR.size:
+            codigo, argumento, nivel, _, _ = _ERROR.unpack_from(buf, pos)
+            eventos.append({"tipo": "error", "codigo": codigo, "argumento": argumento, "nivel": nivel,
+                            "texto": self._texto(buf, pos + _ERROR.size, fin)})
+        elif tipo == ROBOT_MSG_KEY and fin - pos >= _CLAVE.size:
+            codigo, argumento, n_titulo = _CLAVE.unpack_from(buf, pos)
+            ini = pos + _CLAVE.size
+            eventos.append({"tipo": "clave", "codigo": codigo, "argumento": argumento,
+                            "titulo": self._texto(buf, ini, ini + n_titulo),
+                            "texto": self._texto(buf, ini + n_titulo, fin)})
+        elif tipo == ROBOT_MSG_TEXT:
+            eventos.append({"tipo": "texto", "texto": self._texto(buf, pos, fin)})
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Conexión persistente (envío + lectura)
+# ------------------------------------------------------------
+class ConexionSecundaria:
+    """
+    ============================================================
+    CLASE: ConexionSecundaria(ip, puerto, al_evento)
+    ------------------------------------------------------------
+    Mantiene abierto el socket 30002: `enviar()` escribe programas
+    URScript y un hilo lector interpreta el flujo de estado.
+
+        Parámetros:
+            ip (str), puerto (int): dirección de la interfaz.
+            al_evento (callable): recibe cada evento (desde el hilo
+                lector; la GUI debe reenviarlo con `after`).
+        Métodos:
+            iniciar(): lanza el hilo lector (reconecta solo).
+            enviar(script): envía, reconectando una vez si falla.
+            cerrar()
+    ============================================================
+    """
+
+    def __init__(self, ip: str, puerto: int = 30002, al_evento=None, capacidad: int = 1 << 17):
+        self.ip, self.puerto = ip, puerto
+        self.al_evento = al_evento or (lambda ev: None)
+        self.parser = ParserSecundario()
+        self._sock = None
+        self._lock = threading.Lock()
+        self._buf = bytearray(capacidad)
+        self._vista = memoryview(self._buf)
+        self._activo = False
+        self.reconexiones = 0
+
+    def _conectar(self):
+        with self._lock:
+            if self._sock is None:
+                s = socket.create_connection((self.ip, self.puerto), timeout=3.0)
+                s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                s.settimeout(None)
+                self._sock = s
+                self.reconexiones += 1
+            return self._sock
+
+    def _descartar(self, s) -> None:
+        with self._lock:
+            if self._sock is s:
+                self._sock = None
+        try:
+            s.close()
+        except OSError:
+            pass
+
+    def enviar(self, script: str) -> None:
+        datos = (script + "\n").encode("utf-8")
+        for intento in (0, 1):
+            s = self._conectar()
+            try:
+                s.sendall(datos)
+                return
+            except OSError:
+                self._descartar(s)
+                if intento:
+                    raise
+
+    def iniciar(self) -> None:
+        self._activo = True
+        threading.Thread(target=self._leer, daemon=True).start()
+
+    def cerrar(self) -> None:
+        self._activo = False
+        with self._lock:
+            s, self._sock = self._sock, None
+        if s is not None:
+            s.close()
+
+    def _leer(self) -> None:
+        fin = 0
+        while self._activo:
+            try:
+                s = self._conectar()
+            except OSError:
+                time.sleep(1.0)
+                continue
+            try:
+                listo, _, _ = select.select([s], [], [], 1.0)
+                if not listo:
+                    continue
+                n = s.recv_into(self._vista[fin:])
+                if n == 0:
+                    raise ConnectionError("30002 cerrado por el robot")
+                fin += n
+                consumidos, eventos = self.parser.procesar(self._buf, fin)
+                resto = fin - consumidos
+                if resto:
+                    self._buf[:resto] = self._buf[consumidos:fin]
+                fin = resto
+                if fin == len(self._buf):
+                    raise ConnectionError("30002: paquete mayor que el buffer")
+                for ev in eventos:
+                    self.al_evento(ev)
+            except (OSError, ValueError):
+                self._descartar(s)
+                fin = 0
+                if self._activo:
+                    time.sleep(0.5)
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 04 Codificación (simuladores / benchmarks)
+# ------------------------------------------------------------
+def codificar_estado(modo: int = 7, programa: bool = False, pausado: bool = False,
+                     protectiva: bool = False, emergencia: bool = False,
+                     relleno: int = 0) -> bytes:
+    """Paquete ROBOT_STATE con sub-paquete de modo (+ `relleno` bytes de otro sub-paquete)."""
+    cuerpo = _MODO.pack(int(time.time() * 1e6), True, True, True, emergencia, protectiva,
+                        programa, pausado, modo, 0, 1.0, 1.0, 1.0)
+    sub = _CAB.pack(_CAB.size + len(cuerpo), SUB_ROBOT_MODE) + cuerpo
+    if relleno:
+        sub += _CAB.pack(_CAB.size + relleno, 1) + bytes(relleno)
+    return _CAB.pack(_CAB.size + len(sub), MSG_ROBOT_STATE) + sub
+
+
+def codificar_excepcion(linea: int, columna: int, texto: str) -> bytes:
+    """Paquete ROBOT_MESSAGE de excepción de ejecución."""
+    cuerpo = (_MENSAJE.pack(0, -1, ROBOT_MSG_RUNTIME_EXCEPTION) +
+              _EXCEPCION.pack(linea, columna) + texto.encode("utf-8"))
+    return _CAB.pack(_CAB.size + len(cuerpo), MSG_ROBOT_MESSAGE) + cuerpo
+
+
+def codificar_texto(texto: str) -> bytes:
+    """Paquete ROBOT_MESSAGE de texto."""
+    cuerpo = _MENSAJE.pack(0, -1, ROBOT_MSG_TEXT) + texto.encode("utf-8")
+    return _CAB.pack(_CAB.size + len(cuerpo), MSG_ROBOT_MESSAGE) + cuerpo
+
+# ▲▲========================================================▲▲
@@ -0,0 +1,385 @@
+"""
+metricas.py
+------------------------------------------------
+Propósito: métricas de la calidad del enlace con el robot (tasa RTDE,
+jitter de llegada, paquetes perdidos/atrasados, conexiones, latencia de
+envío URScript, tamaño y tiempo de construcción de rutinas, bloques
+enviados en la ejecución por bloques) expuestas en formato de texto
+Prometheus por un endpoint HTTP local, y consultables por la GUI para sus
+etiquetas de estado.
+
+Endpoints:
+    /metrics   texto Prometheus (version=0.0.4)
+    /health    200 "ok" si todos los flujos RTDE reciben datos; 503 si no
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías
+# ------------------------------------------------------------
+
+import time
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import rtde_flujo
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Tipos de métrica
+# ------------------------------------------------------------
+def _etiquetas(nombres: tuple, valores: tuple) -> str:
+    if not nombres:
+        return ""
+    pares = ",".join(f'{n}="{str(v)}"' for n, v in zip(nombres, valores))
+    return "{" + pares + "}"
+
+
+def _numero(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metrica:
+    tipo = "untyped"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: tuple = (), funcion=None):
+        self.nombre, self.ayuda = nombre, ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.funcion = funcion          # callable -> {valores_etiquetas: valor} (leída al exponer)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, etq: dict) -> tuple:
+        return tuple(etq.get(n, "") for n in self.etiquetas)
+
+    def valor(self, **etq) -> float:
+        return self._muestras().get(self._clave(etq), 0)
+
+    def _muestras(self) -> dict:
+        if self.funcion is not None:
+            return dict(self.funcion())
+        with self._lock:
+            return dict(self._valores)
+
+    def exponer(self) -> list:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        for clave, v in sorted(self._muestras().items()):
+            lineas.append(f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(v)}")
+        return lineas
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (paquetes, conexiones)."""
+    tipo = "counter"
+
+    def incrementar(self, n: float = 1, **etq) -> None:
+        clave = self._clave(etq)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + n
+
+
+class Medidor(_Metrica):
+    """Valor instantáneo (tasa, tamaño del último script)."""
+    tipo = "gauge"
+
+    def fijar(self, v: float, **etq) -> None:
+        with self._lock:
+            self._valores[self._clave(etq)] = v
+
+
+class Histograma(_Metrica):
+    """
+    ============================================================
+    CLASE: Histograma(nombre, ayuda, limites, etiquetas=())
+    ------------------------------------------------------------
+    Distribución acumulada por cubetas (`le`), con suma y cuenta.
+
+        Métodos:
+            observar(v, n=1, **etq): registra n observaciones de v.
+            observar_lote(valores, **etq): varias observaciones.
+            cuantil(q, **etq) -> float: aproximación por cubetas.
+    ============================================================
+    """
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, limites: tuple, etiquetas: tuple = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(sorted(limites))
+
+    def observar(self, v: float, n: int = 1, **etq) -> None:
+        clave = self._clave(etq)
+        i = bisect.bisect_left(self.limites, v)
+        with self._lock:
+            c = self._valores.get(clave)
+            if c is None:
+                c = self._valores[clave] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            c[0][i] += n
+            c[1] += v * n
+            c[2] += n
+
+    def observar_lote(self, valores, **etq) -> None:
+        valores = np.asarray(valores, dtype=float)
+        if not len(valores):
+            return
+        clave = self._clave(etq)
+        cubetas = np.bincount(np.searchsorted(self.limites, valores, "left"), minlength=len(self.limites) + 1)
+        with self._lock:
+            c = self._valores.get(clave)
+            if c is None:
+                c = self._valores[clave] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            c[0] = [a + int(b) for a, b in zip(c[0], cubetas)]
+            c[1] += float(valores.sum())
+            c[2] += len(valores)
+
+    def cuantil(self, q: float, **etq) -> float:
+        with self._lock:
+            c = self._valores.get(self._clave(etq))
+            if c is None or not c[2]:
+                return 0.0
+            objetivo, acumulado = q * c[2], 0
+            for limite, n in zip(self.limites + (float("inf"),), c[0]):
+                acumulado += n
+                if acumulado >= objetivo:
+                    return limite
+        return float("inf")
+
+    def exponer(self) -> list:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        with self._lock:
+            valores = {k: ([*v[0]], v[1], v[2]) for k, v in self._valores.items()}
+        for clave, (cubetas, suma, cuenta) in sorted(valores.items()):
+            acumulado = 0
+            for limite, n in zip(self.limites + (float("inf"),), cubetas):
+                acumulado += n
+                etq = _etiquetas(self.etiquetas + ("le",), clave + (_numero(limite),))
+                lineas.append(f"{self.nombre}_bucket{etq} {acumulado}")
+            etq = _etiquetas(self.etiquetas, clave)
+            lineas.append(f"{self.nombre}_sum{etq} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{etq} {cuenta}")
+        return lineas
+
+
+class Registro:
+    """Conjunto de métricas expuestas juntas."""
+
+    def __init__(self):
+        self.metricas = []
+
+    def agregar(self, metrica):
+        self.metricas.append(metrica)
+        return metrica
+
+    def exponer(self) -> str:
+        lineas = []
+        for m in self.metricas:
+            try:
+                lineas.extend(m.exponer())
+            except Exception as e:      # un colector con error no tumba el endpoint
+                lineas.append(f"# {m.nombre}: error al leer ({e})")
+        return "\n".join(lineas) + "\n"
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Métricas de la estación
+# ------------------------------------------------------------
+REGISTRO = Registro()
+
+_SEG_LLEGADA = (0.0005, 0.001, 0.002, 0.004, 0.008, 0.016, 0.032, 0.064, 0.128, 0.256, 1.0)
+_SEG_ENVIO = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+RTDE_PAQUETES = REGISTRO.agregar(Contador(
+    "taller_rtde_paquetes_total", "Paquetes RTDE recibidos.", ("robot",)))
+RTDE_PERDIDOS = REGISTRO.agregar(Contador(
+    "taller_rtde_perdidos_total", "Paquetes RTDE faltantes (saltos en el timestamp del robot).", ("robot",)))
+RTDE_ATRASADOS = REGISTRO.agregar(Contador(
+    "taller_rtde_atrasados_total", "Paquetes RTDE leidos con otro mas nuevo ya encolado (lector atrasado).", ("robot",)))
+RTDE_LLEGADA = REGISTRO.agregar(Histograma(
+    "taller_rtde_interllegada_segundos", "Tiempo entre llegadas de paquetes RTDE al lector.", _SEG_LLEGADA, ("robot",)))
+RTDE_TASA = REGISTRO.agregar(Medidor(
+    "taller_rtde_tasa_hz", "Tasa RTDE real en la ultima ventana.", ("robot",)))
+RTDE_PEDIDA = REGISTRO.agregar(Medidor(
+    "taller_rtde_frecuencia_pedida_hz", "Frecuencia RTDE aceptada por el controlador.", ("robot",)))
+CONEXIONES = REGISTRO.agregar(Contador(
+    "taller_conexiones_total", "Conexiones establecidas por enlace (1 + reconexiones).", ("robot", "enlace")))
+URSCRIPT_ENVIO = REGISTRO.agregar(Histograma(
+    "taller_urscript_envio_segundos", "Latencia de envio de programas URScript.", _SEG_ENVIO, ("robot",)))
+RUTINA_BYTES = REGISTRO.agregar(Medidor(
+    "taller_rutina_bytes", "Tamano del ultimo programa de rutina construido."))
+RUTINA_CONSTRUCCION = REGISTRO.agregar(Histograma(
+    "taller_rutina_construccion_segundos", "Tiempo de construccion del programa de rutina.", _SEG_ENVIO))
+RUTINA_BLOQUES = REGISTRO.agregar(Contador(
+    "taller_rutina_bloques_total", "Bloques de rutina enviados al receptor residente (ejecucion por bloques).", ("robot",)))
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 04 Monitor del flujo RTDE
+# ------------------------------------------------------------
+class MonitorRTDE:
+    """
+    ============================================================
+    CLASE: MonitorRTDE(robot="robot", ventana_s=1.0)
+    ------------------------------------------------------------
+    Consumidor de `DistribuidorRTDE` que alimenta las métricas
+    RTDE de un robot.
+
+        Atributos:
+            frecuencia (float): Hz aceptados (para detectar saltos).
+        Métodos:
+            __call__(estado) / agregar_lote(lote, llegadas=None):
+                consumidores.
+            tasa() -> float: Hz reales (0 si no llegan datos).
+            edad() -> float: s desde el último paquete.
+        Notas:
+            - Perdidos: saltos de `timestamp` mayores a 1,5 periodos
+            (solo si la receta trae `timestamp`).
+            - Jitter y atrasados se miden con el instante en que cada
+            paquete se leyó del socket: `llegadas` (uno por paquete,
+            p. ej. `ProcesoIO.llegadas`) o, si es None, "ahora" para
+            todo el lote (el lote viene directo de una lectura).
+            - Atrasados: paquetes leídos del socket junto con el
+            anterior (ya tenían sucesor cuando el lector despertó);
+            los lotes de la bomba de `ProcesoIO` no cuentan como tales.
+    ============================================================
+    """
+
+    def __init__(self, robot: str = "robot", ventana_s: float = 1.0):
+        self.robot = robot
+        self.frecuencia = 0.0
+        self.medidor = rtde_flujo.MedidorTasa(ventana_s)
+        self._t_llegada = None          # reloj local (edad)
+        self._lectura = None            # instante de lectura del último paquete
+        self._ts_robot = None
+        MONITORES[robot] = self
+
+    def __call__(self, estado) -> None:
+        ts = getattr(estado, "timestamp", None)
+        self._registrar(1, None if ts is None else np.array([ts], dtype=float))
+
+    def agregar_lote(self, lote, llegadas=None) -> None:
+        ts = lote["timestamp"].astype(float) if "timestamp" in lote.dtype.names else None
+        self._registrar(len(lote), ts, llegadas)
+
+    def _registrar(self, n: int, ts, llegadas=None) -> None:
+        if n == 0:
+            return
+        ahora = time.monotonic()
+        self.medidor.marcar(ahora, n)
+        RTDE_PAQUETES.incrementar(n, robot=self.robot)
+        self._t_llegada = ahora
+
+        if llegadas is None:
+            llegadas = np.full(n, ahora)
+        else:
+            llegadas = np.asarray(llegadas, dtype=float)
+        if self._lectura is not None:
+            intervalos = np.diff(llegadas, prepend=self._lectura)
+        else:
+            intervalos = np.diff(llegadas)
+        RTDE_LLEGADA.observar_lote(intervalos, robot=self.robot)
+        juntos = int(np.count_nonzero(intervalos == 0.0))
+        if juntos:
+            RTDE_ATRASADOS.incrementar(juntos, robot=self.robot)
+        self._lectura = float(llegadas[-1])
+
+        if ts is not None and self.frecuencia > 0:
+            periodo = 1.0 / self.frecuencia
+            if self._ts_robot is not None:
+                ts = np.concatenate(([self._ts_robot], ts))
+            saltos = np.diff(ts)
+            grandes = saltos[saltos > 1.5 * periodo]
+            if len(grandes):
+                RTDE_PERDIDOS.incrementar(int(np.rint(grandes / periodo).sum()) - len(grandes), robot=self.robot)
+            self._ts_robot = float(ts[-1])
+
+    def edad(self) -> float:
+        return time.monotonic() - self._t_llegada if self._t_llegada is not None else float("inf")
+
+    def tasa(self) -> float:
+        return self.medidor.tasa() if self.edad() < self.medidor.ventana_s else 0.0
+
+
+MONITORES = {}                      # robot -> MonitorRTDE
+
+RTDE_TASA.funcion = lambda: {(r,): m.tasa() for r, m in MONITORES.items()}
+RTDE_PEDIDA.funcion = lambda: {(r,): m.frecuencia for r, m in MONITORES.items()}
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 05 Endpoint HTTP
+# ------------------------------------------------------------
+def salud() -> tuple:
+    """(ok, texto): ok si hay monitores y todos reciben datos."""
+    caidos = [r for r, m in MONITORES.items() if m.tasa() == 0.0]
+    if not MONITORES:
+        return False, "sin flujos RTDE"
+    if caidos:
+        return False, "sin datos RTDE: " + ", ".join(caidos)
+    return True, "ok"
+
+
+def servir(puerto: int, host: str = "127.0.0.1", registro: Registro = REGISTRO) -> ThreadingHTTPServer:
+    """
+    ============================================================
+    FUNCIÓN: servir(puerto, host="127.0.0.1", registro=REGISTRO)
+    ------------------------------------------------------------
+    Lanza el endpoint HTTP de métricas en un hilo de fondo.
+
+        Parámetros:
+            puerto (int): 0 elige uno libre (ver `server_address`).
+            host (str): "0.0.0.0" para que lo lea un Prometheus remoto.
+        Retorna:
+            ThreadingHTTPServer: llamar `shutdown()` para detenerlo.
+    ============================================================
+    """
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] == "/metrics":
+                codigo, tipo, cuerpo = 200, "text/plain; version=0.0.4; charset=utf-8", registro.exponer()
+            elif self.path.split("?")[0] == "/health":
+                ok, texto = salud()
+                codigo, tipo, cuerpo = (200 if ok else 503), "text/plain; charset=utf-8", texto + "\n"
+            else:
+                codigo, tipo, cuerpo = 404, "text/plain; charset=utf-8", "/metrics | /health\n"
+            datos = cuerpo.encode("utf-8")
+            self.send_response(codigo)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def log_message(self, *args):
+            pass                        # sin ruido en consola por cada scrape
+
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="metricas_http", daemon=True).start()
+    return servidor
+
+# ▲▲========================================================▲▲
@@ -0,0 +1,584 @@
+"""
+motor_async.py
+------------------------------------------------
+Propósito: motor de E/S asíncrono para celdas con varios brazos UR. Un
+único event loop (asyncio, en un hilo propio) atiende N robots; cada robot
+tiene su flujo RTDE, su conexión persistente a 30002 (envío de URScript +
+flujo de estado), su cliente Dashboard en tubería con caché y su buffer de
+estado. La GUI usa `MotorCelda` desde su hilo con llamadas síncronas.
+
+RTDE se atiende con un `asyncio.BufferedProtocol`: el loop escribe
+directamente en un buffer fijo por robot y `rtde_rapido` extrae todos los
+paquetes completos como un lote NumPy (sin objetos por paquete).
+
+Uso:
+    motor = MotorCelda(al_lote=..., al_evento=...)
+    motor.agregar("r1", "192.168.1.20")
+    motor.agregar("r2", "192.168.1.21")
+    motor.iniciar()
+    motor.difundir(script)            # mismo programa a todos
+    motor.dashboard("r1").estado()    # misma interfaz que ClienteDashboard
+    motor.detener()
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y constantes
+# ------------------------------------------------------------
+
+import os
+import socket
+import struct
+import asyncio
+import threading
+import concurrent.futures
+
+import rtde_flujo
+import rtde_rapido
+import dashboard
+import interfaz_secundaria
+
+PUERTOS = {"dashboard": dashboard.PUERTO_DASHBOARD, "urscript": 30002, "rtde": 30004}
+RECETAS_XML = os.path.join(os.path.dirname(os.path.abspath(__file__)), "control_loop_configuration.xml")
+
+RTDE_VERSION  = 2
+REINTENTO_S   = 1.0                  # espera entre reconexiones
+TIMEOUT_S     = 2.0                  # handshake / respuestas de control
+RECHAZADOS    = ("NOT_FOUND", "IN_USE")
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Protocolo RTDE (buffer fijo por robot)
+# ------------------------------------------------------------
+class _ProtocoloRTDE(asyncio.BufferedProtocol):
+    """
+    ============================================================
+    CLASE: _ProtocoloRTDE(robot, capacidad)
+    ------------------------------------------------------------
+    Recibe RTDE sobre un buffer reutilizado. Las respuestas de
+    control (handshake) resuelven la espera de `pedir()`; los
+    DATA_PACKAGE se entregan a `robot._recibir(lote)`.
+    ============================================================
+    """
+
+    def __init__(self, robot, capacidad: int = 1 << 16):
+        self.robot = robot
+        self._buf = bytearray(capacidad)
+        self._vista = memoryview(self._buf)
+        self._fin = 0
+        self.dec = None                 # DecodificadorRTDE tras el setup
+        self.id_receta = None
+        self.transporte = None
+        self._espera = None             # (tipo, future) de la respuesta pendiente
+        self.cerrado = asyncio.get_running_loop().create_future()
+
+    # ---------- callbacks del loop ----------
+    def connection_made(self, transporte):
+        self.transporte = transporte
+
+    def get_buffer(self, sizehint):
+        if self._fin == len(self._buf):
+            raise ConnectionError("RTDE: paquete mayor que el buffer")
+        return self._vista[self._fin:]
+
+    def buffer_updated(self, n):
+        self._fin += n
+        try:
+            self._procesar()
+        except ConnectionError as e:
+            self.transporte.abort()
+            self._terminar(e)
+
+    def connection_lost(self, exc):
+        self._terminar(exc or ConnectionError("RTDE: conexión cerrada por el robot"))
+
+    def _terminar(self, exc) -> None:
+        if self._espera is not None and not self._espera[1].done():
+            self._espera[1].set_exception(ConnectionError(str(exc)))
+        if not self.cerrado.done():
+            self.cerrado.set_result(exc)
+
+    # ---------- extracción ----------
+    def _procesar(self) -> None:
+        buf, fin = self._buf, self._fin
+        lote = None
+        if self.dec is None:            # handshake: solo paquetes de control
+            pos = 0
+            while fin - pos >= rtde_rapido.CABECERA.size:
+                largo, tipo = rtde_rapido.CABECERA.unpack_from(buf, pos)
+                if largo < rtde_rapido.CABECERA.size:
+                    raise ConnectionError(f"RTDE: cabecera inválida (tamaño {largo})")
+                if fin - pos < largo:
+                    break
+                if tipo != rtde_rapido.TIPO_DATA_PACKAGE:
+                    self._control(tipo, bytes(buf[pos + rtde_rapido.CABECERA.size:pos + largo]))
+                pos += largo
+        else:
+            pos, lote, descartados = self.dec.extraer(buf, fin, self.id_receta, self._control)
+            self.robot.descartados += descartados
+
+        resto = fin - pos
+        if resto:
+            buf[:resto] = buf[pos:fin]
+        self._fin = resto
+        if lote is not None:
+            self.robot._recibir(lote)
+
+    def _control(self, tipo: int, payload: bytes) -> None:
+        if self._espera is not None and self._espera[0] == tipo and not self._espera[1].done():
+            self._espera[1].set_result(payload)
+
+    # ---------- petición / respuesta ----------
+    async def pedir(self, tipo: str, payload: bytes = b"") -> bytes:
+        futuro = asyncio.get_running_loop().create_future()
+        self._espera = (ord(tipo), futuro)
+        cab = rtde_rapido.CABECERA
+        self.transporte.write(cab.pack(cab.size + len(payload), ord(tipo)) + payload)
+        try:
+            return await asyncio.wait_for(futuro, TIMEOUT_S)
+        finally:
+            self._espera = None
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Robot (RTDE + 30002 + Dashboard)
+# ------------------------------------------------------------
+def _sin_retardo(escritor_o_transporte) -> None:
+    s = escritor_o_transporte.get_extra_info("socket")
+    if s is not None:
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class RobotAsync:
+    """
+    ============================================================
+    CLASE: RobotAsync(nombre, ip, puertos=None, ...)
+    ------------------------------------------------------------
+    Conexiones y estado de un robot dentro del loop del motor.
+
+        Parámetros:
+            nombre (str), ip (str): identificación del robot.
+            puertos (dict | None): reemplaza entradas de PUERTOS.
+            receta, campos, frecuencia, respaldo: salida RTDE (ver
+                `rtde_flujo.intentos_salida`).
+            ttl (float): caché de consultas Dashboard (s).
+            historial (int): muestras a tasa completa (0 = ninguna).
+            al_lote (callable): (nombre, lote) por cada lote RTDE.
+            al_evento (callable): (nombre, evento) de 30002.
+        Atributos:
+            ultimo: última fila RTDE recibida (buffer de estado).
+            salida: (receta, nombres, tipos, Hz) aceptados.
+            medidor (rtde_flujo.MedidorTasa): tasa real recibida.
+            registro (rtde_flujo.RegistroRTDE | None): historial.
+        Notas:
+            - Los callbacks corren en el hilo del motor: deben ser
+            breves (la GUI reenvía con `after`).
+            - Cada conexión reconecta sola cada REINTENTO_S, también
+            tras errores inesperados del handshake o del decodificador
+            (se informan por consola).
+    ============================================================
+    """
+
+    def __init__(self, nombre: str, ip: str, puertos: dict = None, receta: str = "state",
+                 campos: list = (), frecuencia: float = 125.0, respaldo: str = "state",
+                 ruta_recetas: str = RECETAS_XML, ttl: float = 0.5, historial: int = 0,
+                 al_lote=None, al_evento=None):
+        self.nombre, self.ip = nombre, ip
+        self.puertos = dict(PUERTOS)
+        self.puertos.update(puertos or {})
+        self.receta, self.campos = receta, list(campos)
+        self.frecuencia, self.respaldo = float(frecuencia), respaldo
+        self.ruta_recetas = ruta_recetas
+        self.ttl = ttl
+        self.al_lote, self.al_evento = al_lote, al_evento
+
+        self.ultimo = None
+        self.salida = None
+        self.medidor = rtde_flujo.MedidorTasa()
+        self.registro = rtde_flujo.RegistroRTDE(historial) if historial > 0 else None
+        self.parser = interfaz_secundaria.ParserSecundario()
+        self.paquetes = 0
+        self.descartados = 0
+        self.reconexiones = {"rtde": 0, "urscript": 0, "dashboard": 0}
+        self.viajes_dashboard = 0
+
+        self._tareas = []
+        self._escritor_ur = None
+        self._ur_listo = None           # asyncio.Event (se crea dentro del loop)
+        self._dash = None               # (lector, escritor)
+        self._lock_dash = None
+        self._cache = {}
+
+    # ---------- ciclo de vida ----------
+    async def iniciar(self) -> None:
+        self._ur_listo = asyncio.Event()
+        self._lock_dash = asyncio.Lock()
+        self._tareas = [asyncio.create_task(self._ciclo_rtde()),
+                        asyncio.create_task(self._ciclo_secundaria())]
+
+    async def detener(self) -> None:
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self._tareas = []
+        self._cerrar_dashboard()
+
+    @property
+    def rtde_conectado(self) -> bool:
+        return self.salida is not None
+
+    # ---------- RTDE ----------
+    async def _ciclo_rtde(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            transporte = None
+            try:
+                transporte, prot = await asyncio.wait_for(loop.create_connection(
+                    lambda: _ProtocoloRTDE(self), self.ip, self.puertos["rtde"]), TIMEOUT_S)
+                _sin_retardo(transporte)
+                self.reconexiones["rtde"] += 1
+                await self._configurar(prot)
+                await prot.cerrado
+            except (OSError, asyncio.TimeoutError):
+                pass
+            except Exception as e:      # tipo RTDE desconocido, respuesta corrupta...: reintentar igual
+                print(f"[motor] RTDE {self.nombre}: {type(e).__name__}: {e}")
+            finally:
+                self.salida = None
+                if transporte is not None:
+                    transporte.abort()
+            await asyncio.sleep(REINTENTO_S)
+
+    async def _configurar(self, prot: _ProtocoloRTDE) -> None:
+        r = await prot.pedir("V", struct.pack(">H", RTDE_VERSION))
+        if not r or not r[0]:
+            raise ConnectionError("RTDE: versión de protocolo rechazada")
+
+        for rec, cam, hz in rtde_flujo.intentos_salida(self.receta, self.campos, self.frecuencia, self.respaldo):
+            try:
+                nombres = cam or rtde_rapido.receta_desde_xml(self.ruta_recetas, rec)[0]
+            except KeyError:
+                continue
+            r = await prot.pedir("O", struct.pack(">d", hz) + ",".join(nombres).encode("utf-8"))
+            tipos = r[1:].decode("utf-8").split(",")
+            if any(t in RECHAZADOS for t in tipos):
+                continue
+            prot.dec, prot.id_receta = rtde_rapido.DecodificadorRTDE(nombres, tipos), r[0]
+            break
+        else:
+            raise ConnectionError("RTDE: el controlador rechazó todas las recetas")
+
+        r = await prot.pedir("S")
+        if not r or not r[0]:
+            raise ConnectionError("RTDE: start rechazado")
+        self.salida = (rec, nombres, tipos, hz)
+
+    def _recibir(self, lote) -> None:
+        n = len(lote)
+        self.paquetes += n
+        self.medidor.marcar(n=n)
+        self.ultimo = lote[-1]
+        if self.registro is not None:
+            self.registro.agregar_lote(lote)
+        if self.al_lote is not None:
+            try:
+                self.al_lote(self.nombre, lote)
+            except Exception as e:
+                print(f"[motor] al_lote({self.nombre}) falló: {e}")
+
+    # ---------- Interfaz secundaria (30002) ----------
+    def _evento(self, evento: dict) -> None:
+        if self.al_evento is not None:
+            try:
+                self.al_evento(self.nombre, evento)
+            except Exception as e:
+                print(f"[motor] al_evento({self.nombre}) falló: {e}")
+
+    async def _ciclo_secundaria(self) -> None:
+        while True:
+            escritor = None
+            try:
+                lector, escritor = await asyncio.wait_for(
+                    asyncio.open_connection(self.ip, self.puertos["urscript"]), TIMEOUT_S)
+                _sin_retardo(escritor)
+                self.reconexiones["urscript"] += 1
+                self._escritor_ur = escritor
+                self._ur_listo.set()
+                pendiente = bytearray()
+                while True:
+                    datos = await lector.read(1 << 16)
+                    if not datos:
+                        break
+                    pendiente += datos
+                    consumidos, eventos = self.parser.procesar(pendiente, len(pendiente))
+                    del pendiente[:consumidos]
+                    for ev in eventos:
+                        self._evento(ev)
+            except (OSError, asyncio.TimeoutError):
+                pass
+            except Exception as e:      # paquete 30002 inesperado: reintentar igual
+                print(f"[motor] 30002 {self.nombre}: {type(e).__name__}: {e}")
+            finally:
+                self._ur_listo.clear()
+                self._escritor_ur = None
+                if escritor is not None:
+                    escritor.close()
+            await asyncio.sleep(REINTENTO_S)
+
+    async def enviar(self, script: str) -> None:
+        """Envía un programa URScript (espera la conexión hasta TIMEOUT_S)."""
+        try:
+            await asyncio.wait_for(self._ur_listo.wait(), TIMEOUT_S)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"{self.nombre}: 30002 no conectado") from None
+        self._escritor_ur.write((script + "\n").encode("utf-8"))
+        await self._escritor_ur.drain()
+
+    # ---------- Dashboard (29999) ----------
+    def _cerrar_dashboard(self) -> None:
+        if self._dash is not None:
+            self._dash[1].close()
+        self._dash = None
+
+    async def _linea(self, lector) -> str:
+        linea = await asyncio.wait_for(lector.readline(), TIMEOUT_S)
+        if not linea:
+            raise ConnectionError("Dashboard: conexión cerrada")
+        return linea.decode("utf-8", errors="replace").strip()
+
+    async def _tuberia(self, comandos: list) -> list:
+        for intento in (0, 1):
+            try:
+                if self._dash is None:
+                    lector, escritor = await asyncio.wait_for(
+                        asyncio.open_connection(self.ip, self.puertos["dashboard"]), TIMEOUT_S)
+                    _sin_retardo(escritor)
+                    self._dash = (lector, escritor)
+                    self.reconexiones["dashboard"] += 1
+                    await self._linea(lector)   # saludo
+                lector, escritor = self._dash
+                escritor.write("".join(c + "\n" for c in comandos).encode("utf-8"))
+                await escritor.drain()
+                self.viajes_dashboard += 1
+                return [await self._linea(lector) for _ in comandos]
+            except (OSError, asyncio.TimeoutError) as e:
+                self._cerrar_dashboard()
+                if intento:
+                    raise ConnectionError(f"{self.nombre}: Dashboard sin respuesta ({e})") from None
+
+    async def consultar(self, *comandos) -> dict:
+        """Igual que `ClienteDashboard.consultar`, sin bloquear el loop."""
+        async with self._lock_dash:
+            ahora = asyncio.get_running_loop().time()
+            respuestas, faltan = {}, []
+            for c in comandos:
+                en_cache = self._cache.get(c)
+                if c in dashboard.CONSULTAS and en_cache and ahora - en_cache[0] < self.ttl:
+                    respuestas[c] = en_cache[1]
+                elif c not in faltan:
+                    faltan.append(c)
+
+            if faltan:
+                control = any(c not in dashboard.CONSULTAS for c in faltan)
+                if control:
+                    self._cache.clear()
+                t = asyncio.get_running_loop().time()
+                for c, r in zip(faltan, await self._tuberia(faltan)):
+                    respuestas[c] = r
+                    if c in dashboard.CONSULTAS and not control:
+                        self._cache[c] = (t, r)
+            return respuestas
+
+    async def estado(self) -> dict:
+        return dashboard.interpretar_estado(await self.consultar(*dashboard.CONSULTA_ESTADO))
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 04 Motor de la celda (API síncrona para la GUI)
+# ------------------------------------------------------------
+class MotorCelda:
+    """
+    ============================================================
+    CLASE: MotorCelda(al_lote=None, al_evento=None)
+    ------------------------------------------------------------
+    Un event loop en un hilo para todos los robots de la celda.
+
+        Métodos:
+            agregar(nombre, ip, **opciones) -> RobotAsync
+            iniciar() / detener()
+            enviar(nombre, script): URScript a un robot.
+            difundir(script, nombres=None) -> dict: el mismo
+                programa a varios robots en paralelo; {nombre: None
+                | excepción}.
+            consultar(nombre, *comandos), estado(nombre): Dashboard.
+            ultimo(nombre): última fila RTDE; salida(nombre): receta.
+            conexiones() -> dict: conexiones por robot y enlace.
+            lanzar(corrutina) -> Future: sin esperar el resultado.
+            dashboard(nombre) / urscript(nombre): adaptadores con la
+                interfaz de ClienteDashboard / ConexionSecundaria.
+        Notas:
+            - `al_lote(nombre, lote)` y `al_evento(nombre, evento)`
+            corren en el hilo del motor.
+            - Los fallos de red se informan como ConnectionError.
+    ============================================================
+    """
+
+    def __init__(self, al_lote=None, al_evento=None):
+        self.al_lote, self.al_evento = al_lote, al_evento
+        self.robots = {}
+        self._loop = None
+        self._hilo = None
+
+    def agregar(self, nombre: str, ip: str, **opciones) -> RobotAsync:
+        opciones.setdefault("al_lote", self.al_lote)
+        opciones.setdefault("al_evento", self.al_evento)
+        robot = RobotAsync(nombre, ip, **opciones)
+        self.robots[nombre] = robot
+        if self._loop is not None:
+            self._ejecutar(robot.iniciar())
+        return robot
+
+    # ---------- ciclo de vida ----------
+    def iniciar(self):
+        listo = threading.Event()
+
+        def correr():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            listo.set()
+            self._loop.run_forever()
+
+        self._hilo = threading.Thread(target=correr, name="motor_celda", daemon=True)
+        self._hilo.start()
+        listo.wait(5.0)
+        self._ejecutar(self._iniciar_todos())
+        return self
+
+    async def _iniciar_todos(self) -> None:
+        for robot in self.robots.values():
+            await robot.iniciar()
+
+    def detener(self) -> None:
+        if self._loop is None:
+            return
+
+        async def todos():
+            await asyncio.gather(*(r.detener() for r in self.robots.values()), return_exceptions=True)
+
+        try:
+            self._ejecutar(todos())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._hilo.join(5.0)
+            self._loop = None
+
+    def lanzar(self, corrutina) -> concurrent.futures.Future:
+        """Programa una corrutina en el loop del motor sin esperarla."""
+        return asyncio.run_coroutine_threadsafe(corrutina, self._loop)
+
+    def _ejecutar(self, corrutina, timeout: float = 2 * TIMEOUT_S + 1):
+        """Corre una corrutina en el loop del motor y espera su resultado."""
+        futuro = self.lanzar(corrutina)
+        try:
+            return futuro.result(timeout)
+        except concurrent.futures.TimeoutError:
+            futuro.cancel()
+            raise ConnectionError("motor: operación sin respuesta") from None
+
+    # ---------- operaciones ----------
+    def enviar(self, nombre: str, script: str) -> None:
+        self._ejecutar(self.robots[nombre].enviar(script))
+
+    def difundir(self, script: str, nombres: list = None) -> dict:
+        nombres = list(nombres or self.robots)
+
+        async def todos():
+            return await asyncio.gather(*(self.robots[n].enviar(script) for n in nombres),
+                                        return_exceptions=True)
+
+        return dict(zip(nombres, self._ejecutar(todos())))
+
+    def consultar(self, nombre: str, *comandos) -> dict:
+        return self._ejecutar(self.robots[nombre].consultar(*comandos))
+
+    def estado(self, nombre: str) -> dict:
+        return self._ejecutar(self.robots[nombre].estado())
+
+    def ultimo(self, nombre: str):
+        return self.robots[nombre].ultimo
+
+    def salida(self, nombre: str):
+        """(receta, nombres, tipos, Hz) RTDE aceptados, o None si no hay flujo."""
+        return self.robots[nombre].salida
+
+    def conexiones(self) -> dict:
+        """{robot: {"rtde"|"urscript"|"dashboard": conexiones establecidas}}."""
+        return {n: dict(r.reconexiones) for n, r in self.robots.items()}
+
+    def dashboard(self, nombre: str) -> "AdaptadorDashboard":
+        return AdaptadorDashboard(self, nombre)
+
+    def urscript(self, nombre: str) -> "AdaptadorURScript":
+        return AdaptadorURScript(self, nombre)
+
+
+class AdaptadorDashboard:
+    """Interfaz de `dashboard.ClienteDashboard` para un robot de un motor (consultar/estado)."""
+
+    def __init__(self, motor: MotorCelda, nombre: str):
+        self.motor, self.nombre = motor, nombre
+
+    def consultar(self, *comandos) -> dict:
+        return self.motor.consultar(self.nombre, *comandos)
+
+    def estado(self) -> dict:
+        return self.motor.estado(self.nombre)
+
+    def stop(self) -> str:
+        return self.consultar("stop")["stop"]
+
+    def play(self) -> str:
+        return self.consultar("play")["play"]
+
+    def pause(self) -> str:
+        return self.consultar("pause")["pause"]
+
+    def desbloquear_parada(self) -> str:
+        return self.consultar("unlock protective stop")["unlock protective stop"]
+
+    def cerrar(self) -> None:
+        pass                            # la conexión pertenece al motor
+
+
+class AdaptadorURScript:
+    """Interfaz de `interfaz_secundaria.ConexionSecundaria` para un robot de un motor (enviar)."""
+
+    def __init__(self, motor: MotorCelda, nombre: str):
+        self.motor, self.nombre = motor, nombre
+
+    def enviar(self, script: str) -> None:
+        self.motor.enviar(self.nombre, script)
+
+    def iniciar(self) -> None:
+        pass                            # el motor ya mantiene la conexión
+
+    def cerrar(self) -> None:
+        pass
+
+# ▲▲========================================================▲▲
@@ -0,0 +1,201 @@
+"""
+paletizado.py
+------------------------------------------------
+Propósito: paso de rutina tipo "patrón" (grilla N x M x K) definido por
+poses de esquina y cantidades. Se compila a un bucle URScript que calcula
+cada celda en el controlador con `pose_add`/`pose_trans`, por lo que el
+tamaño del script es constante sin importar el tamaño del pallet.
+
+Formato del paso (elemento de `lista_instrucciones`):
+    {"tipo": "patron",
+     "origen": [..6..],  "esq_x": [..6..],  "esq_y": [..6..],
+     "n": [N, M, K], "altura_capa": m, "aproximacion": m,
+     "recoger": [..6..] | None, "accion": "Abrir" | "Cerrar" | None}
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y constantes
+# ------------------------------------------------------------
+
+import numpy as np
+
+import poses
+
+ACEL_J, VEL_J = 0.6, 0.6             # movimientos de traslado (movej)
+ACEL_L, VEL_L = 0.3, 0.1             # aproximación / retiro (movel)
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Definición del patrón
+# ------------------------------------------------------------
+def crear_patron(origen, esq_x, esq_y, n_x: int, n_y: int, n_z: int = 1,
+                 altura_capa: float = 0.0, aproximacion: float = 0.05,
+                 recoger=None, accion=None) -> dict:
+    """
+    ============================================================
+    FUNCIÓN: crear_patron(origen, esq_x, esq_y, n_x, n_y, ...)
+    ------------------------------------------------------------
+    Crea un paso "patron" a partir de tres esquinas enseñadas.
+
+        Parámetros:
+            origen (list): pose de la primera celda (fija la orientación).
+            esq_x (list): pose de la última celda en la dirección X.
+            esq_y (list): pose de la última celda en la dirección Y.
+            n_x, n_y, n_z (int): cantidad de celdas por dirección / capas.
+            altura_capa (float): separación entre capas en m (eje Z base).
+            aproximacion (float): distancia de aproximación/retiro en m,
+                a lo largo del eje Z de la herramienta (0 = sin aproximación).
+            recoger (list | None): pose de recogida; si existe, cada celda
+                hace recoger → cerrar → dejar → abrir.
+            accion (str | None): "Abrir"/"Cerrar" en cada celda cuando no
+                hay pose de recogida.
+        Retorna:
+            dict: paso listo para `lista_instrucciones`.
+        Errores:
+            ValueError si alguna cantidad es menor que 1.
+    ============================================================
+    """
+    if min(n_x, n_y, n_z) < 1:
+        raise ValueError("Las cantidades del patrón deben ser >= 1")
+    return {"tipo": "patron",
+            "origen": [float(v) for v in origen],
+            "esq_x": [float(v) for v in esq_x],
+            "esq_y": [float(v) for v in esq_y],
+            "n": [int(n_x), int(n_y), int(n_z)],
+            "altura_capa": float(altura_capa),
+            "aproximacion": float(aproximacion),
+            "recoger": None if recoger is None else [float(v) for v in recoger],
+            "accion": accion}
+
+
+def _incrementos(paso: dict):
+    """Devuelve los vectores de paso (3,) en X, Y y Z de la grilla."""
+    origen = np.asarray(paso["origen"][:3])
+    n_x, n_y, _ = paso["n"]
+    dx = (np.asarray(paso["esq_x"][:3]) - origen) / (n_x - 1) if n_x > 1 else np.zeros(3)
+    dy = (np.asarray(paso["esq_y"][:3]) - origen) / (n_y - 1) if n_y > 1 else np.zeros(3)
+    dz = np.array([0.0, 0.0, paso["altura_capa"]])
+    return dx, dy, dz
+
+
+def generar_poses(paso: dict):
+    """
+    ============================================================
+    FUNCIÓN: generar_poses(paso)
+    ------------------------------------------------------------
+    Calcula localmente todas las poses de celda del patrón, en el
+    mismo orden en que las recorre el bucle del robot (X, luego Y,
+    luego capas).
+
+        Parámetros:
+            paso (dict): paso "patron".
+        Retorna:
+            ndarray (N*M*K, 6): poses de celda.
+    ============================================================
+    """
+    n_x, n_y, n_z = paso["n"]
+    dx, dy, dz = _incrementos(paso)
+    k, j, i = np.meshgrid(np.arange(n_z), np.arange(n_y), np.arange(n_x), indexing="ij")
+    desplaz = np.zeros((k.size, 6))
+    desplaz[:, :3] = (i.reshape(-1, 1) * dx + j.reshape(-1, 1) * dy + k.reshape(-1, 1) * dz)
+    return poses.sumar(paso["origen"], desplaz)
+
+
+def vista_previa(paso: dict) -> list:
+    """Lista de líneas de texto (mm, rad) con las poses generadas por el patrón."""
+    lineas = []
+    for n, pose in enumerate(generar_poses(paso).tolist()):
+        pos_fmt = [round(pose[0]*1000, 1), round(pose[1]*1000, 1), round(pose[2]*1000, 1),
+                   round(pose[3], 3), round(pose[4], 3), round(pose[5], 3)]
+        lineas.append(f"{n + 1:4d} -> {pos_fmt}")
+    return lineas
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Compilación a URScript
+# ------------------------------------------------------------
+def _p(valores) -> str:
+    """Formatea una pose como literal URScript p[...]."""
+    return "p[" + ", ".join(repr(float(v)) for v in valores) + "]"
+
+
+def _expr_eje(eje: int, dx, dy, dz, i: str, j: str, k: str) -> str:
+    """Expresión URScript del desplazamiento en un eje (omite términos nulos)."""
+    terminos = [f"{var}*{repr(float(d[eje]))}" for var, d in ((i, dx), (j, dy), (k, dz)) if d[eje] != 0.0]
+    return " + ".join(terminos) if terminos else "0"
+
+
+def compilar_patron(paso: dict, indice: int, sangria: str = "    ") -> list:
+    """
+    ============================================================
+    FUNCIÓN: compilar_patron(paso, indice, sangria)
+    ------------------------------------------------------------
+    Genera las líneas URScript del bucle del patrón para insertar
+    dentro del programa de `ejecutar_rutina` (usa los atajos
+    `rq_*_and_classify()` definidos en `urscripts.s_cobotStart`).
+
+        Parámetros:
+            paso (dict): paso "patron".
+            indice (int): número del paso (evita choques de nombres).
+            sangria (str): sangría base de las líneas.
+        Retorna:
+            list[str]: líneas URScript (tamaño constante).
+    ============================================================
+    """
+    n_x, n_y, n_z = paso["n"]
+    dx, dy, dz = _incrementos(paso)
+    pre = f"pat{indice}_"
+    i, j, k = pre + "i", pre + "j", pre + "k"
+    aprox = _p([0, 0, -paso["aproximacion"], 0, 0, 0])
+    desplaz = "p[" + ", ".join(_expr_eje(e, dx, dy, dz, i, j, k) for e in range(3)) + ", 0, 0, 0]"
+
+    s0, s1, s2, s3 = sangria, sangria + "  ", sangria + "    ", sangria + "      "
+    lineas = [f"{s0}# Patrón {n_x}x{n_y}x{n_z} ({n_x * n_y * n_z} celdas)",
+              f"{s0}{pre}origen = {_p(paso['origen'])}"]
+    if paso.get("recoger") is not None:
+        lineas.append(f"{s0}{pre}recoger = {_p(paso['recoger'])}")
+    lineas += [f"{s0}{k} = 0",
+               f"{s0}while {k} < {n_z}:",
+               f"{s1}{j} = 0",
+               f"{s1}while {j} < {n_y}:",
+               f"{s2}{i} = 0",
+               f"{s2}while {i} < {n_x}:"]
+
+    if paso.get("recoger") is not None:
+        lineas += [f"{s3}movej(pose_trans({pre}recoger, {aprox}), a={ACEL_J}, v={VEL_J})",
+                   f"{s3}movel({pre}recoger, a={ACEL_L}, v={VEL_L})",
+                   f"{s3}rq_close_and_classify()",
+                   f"{s3}movel(pose_trans({pre}recoger, {aprox}), a={ACEL_L}, v={VEL_L})"]
+
+    lineas += [f"{s3}{pre}celda = pose_add({pre}origen, {desplaz})",
+               f"{s3}movej(pose_trans({pre}celda, {aprox}), a={ACEL_J}, v={VEL_J})",
+               f"{s3}movel({pre}celda, a={ACEL_L}, v={VEL_L})"]
+
+    accion = "Abrir" if paso.get("recoger") is not None else paso.get("accion")
+    if accion == "Abrir":
+        lineas.append(f"{s3}rq_open_and_classify()")
+    elif accion == "Cerrar":
+        lineas.append(f"{s3}rq_close_and_classify()")
+
+    lineas += [f"{s3}movel(pose_trans({pre}celda, {aprox}), a={ACEL_L}, v={VEL_L})",
+               f"{s3}{i} = {i} + 1",
+               f"{s2}end",
+               f"{s2}{j} = {j} + 1",
+               f"{s1}end",
+               f"{s1}{k} = {k} + 1",
+               f"{s0}end"]
+    return lineas
+
+# ▲▲========================================================▲▲
@@ -0,0 +1,347 @@
+"""
+poses.py
+------------------------------------------------
+Propósito: librería local de matemática de poses (NumPy) con la misma
+convención que URScript: p[x, y, z, Rx, Ry, Rz] con (Rx, Ry, Rz) como
+vector de rotación (eje * ángulo, en rad).
+
+Todas las funciones aceptan una pose (6,) o un lote (N, 6) y devuelven
+el mismo formato, de modo que una rutina completa se procesa en una sola
+llamada y sin viajes de ida y vuelta al robot.
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y constantes
+# ------------------------------------------------------------
+
+import numpy as np
+
+_EPS = 1e-12                         # umbral de ángulo "cero"
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Conversiones de rotación
+# ------------------------------------------------------------
+def _como_lote(arr, ancho: int):
+    """Convierte a ndarray (N, ancho) y devuelve también si la entrada era única."""
+    a = np.asarray(arr, dtype=np.float64)
+    unico = a.ndim == 1
+    return a.reshape(-1, ancho), unico
+
+
+def _salida(a, unico: bool):
+    """Devuelve el resultado con la forma original (única o lote)."""
+    return a[0] if unico else a
+
+
+def rotvec_a_quat(rv):
+    """
+    ============================================================
+    FUNCIÓN: rotvec_a_quat(rv)
+    ------------------------------------------------------------
+    Convierte vectores de rotación a cuaterniones unitarios.
+
+        Parámetros:
+            rv (array (3,) | (N, 3)): vector de rotación [Rx, Ry, Rz].
+        Retorna:
+            ndarray (4,) | (N, 4): cuaternión [w, x, y, z].
+    ============================================================
+    """
+    r, unico = _como_lote(rv, 3)
+    theta = np.linalg.norm(r, axis=1)
+    media = 0.5 * theta
+    # sin(θ/2)/θ estable cerca de cero (serie de Taylor)
+    pequeno = theta < 1e-6
+    factor = np.where(pequeno, 0.5 - theta**2 / 48.0,
+                      np.sin(media) / np.where(pequeno, 1.0, theta))
+    q = np.empty((r.shape[0], 4))
+    q[:, 0] = np.cos(media)
+    q[:, 1:] = r * factor[:, None]
+    return _salida(q, unico)
+
+
+def quat_a_rotvec(quat):
+    """
+    ============================================================
+    FUNCIÓN: quat_a_rotvec(quat)
+    ------------------------------------------------------------
+    Convierte cuaterniones [w, x, y, z] a vectores de rotación,
+    eligiendo siempre el ángulo en [0, π].
+
+        Parámetros:
+            quat (array (4,) | (N, 4)): cuaternión (no requiere normalizar).
+        Retorna:
+            ndarray (3,) | (N, 3): vector de rotación.
+    ============================================================
+    """
+    q, unico = _como_lote(quat, 4)
+    q = q / np.linalg.norm(q, axis=1, keepdims=True)
+    q = np.where(q[:, :1] < 0, -q, q)           # hemisferio w >= 0
+    w = q[:, 0]
+    v = q[:, 1:]
+    s = np.linalg.norm(v, axis=1)
+    theta = 2.0 * np.arctan2(s, w)
+    # denominadores seguros en ambas ramas: np.where evalúa las dos (w = 0 en ángulos de π)
+    factor = np.where(s > _EPS, theta / np.where(s > _EPS, s, 1.0), 2.0 / np.where(s > _EPS, 1.0, w))
+    return _salida(v * factor[:, None], unico)
+
+
+def quat_a_matriz(quat):
+    """Cuaterniones [w, x, y, z] (N, 4) -> matrices de rotación (N, 3, 3)."""
+    q, unico = _como_lote(quat, 4)
+    q = q / np.linalg.norm(q, axis=1, keepdims=True)
+    w, x, y, z = q.T
+    m = np.empty((q.shape[0], 3, 3))
+    m[:, 0, 0] = 1 - 2 * (y * y + z * z)
+    m[:, 0, 1] = 2 * (x * y - w * z)
+    m[:, 0, 2] = 2 * (x * z + w * y)
+    m[:, 1, 0] = 2 * (x * y + w * z)
+    m[:, 1, 1] = 1 - 2 * (x * x + z * z)
+    m[:, 1, 2] = 2 * (y * z - w * x)
+    m[:, 2, 0] = 2 * (x * z - w * y)
+    m[:, 2, 1] = 2 * (y * z + w * x)
+    m[:, 2, 2] = 1 - 2 * (x * x + y * y)
+    return _salida(m, unico)
+
+
+def matriz_a_quat(mat):
+    """Matrices de rotación (N, 3, 3) -> cuaterniones [w, x, y, z] (método de Shepperd)."""
+    m = np.asarray(mat, dtype=np.float64)
+    unico = m.ndim == 2
+    m = m.reshape(-1, 3, 3)
+    traza = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+    diag = np.stack([traza, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]], axis=1)
+    caso = np.argmax(diag, axis=1)
+    q = np.empty((m.shape[0], 4))
+
+    i = caso == 0
+    s = np.sqrt(1.0 + traza[i]) * 2
+    q[i] = np.stack([0.25 * s,
+                     (m[i, 2, 1] - m[i, 1, 2]) / s,
+                     (m[i, 0, 2] - m[i, 2, 0]) / s,
+                     (m[i, 1, 0] - m[i, 0, 1]) / s], axis=1)
+    i = caso == 1
+    s = np.sqrt(1.0 + m[i, 0, 0] - m[i, 1, 1] - m[i, 2, 2]) * 2
+    q[i] = np.stack([(m[i, 2, 1] - m[i, 1, 2]) / s,
+                     0.25 * s,
+                     (m[i, 0, 1] + m[i, 1, 0]) / s,
+                     (m[i, 0, 2] + m[i, 2, 0]) / s], axis=1)
+    i = caso == 2
+    s = np.sqrt(1.0 + m[i, 1, 1] - m[i, 0, 0] - m[i, 2, 2]) * 2
+    q[i] = np.stack([(m[i, 0, 2] - m[i, 2, 0]) / s,
+                     (m[i, 0, 1] + m[i, 1, 0]) / s,
+                     0.25 * s,
+                     (m[i, 1, 2] + m[i, 2, 1]) / s], axis=1)
+    i = caso == 3
+    s = np.sqrt(1.0 + m[i, 2, 2] - m[i, 0, 0] - m[i, 1, 1]) * 2
+    q[i] = np.stack([(m[i, 1, 0] - m[i, 0, 1]) / s,
+                     (m[i, 0, 2] + m[i, 2, 0]) / s,
+                     (m[i, 1, 2] + m[i, 2, 1]) / s,
+                     0.25 * s], axis=1)
+    return _salida(q, unico)
+
+
+def rotvec_a_matriz(rv):
+    """Vectores de rotación (N, 3) -> matrices de rotación (N, 3, 3)."""
+    return quat_a_matriz(rotvec_a_quat(rv))
+
+
+def matriz_a_rotvec(mat):
+    """Matrices de rotación (N, 3, 3) -> vectores de rotación (N, 3)."""
+    return quat_a_rotvec(matriz_a_quat(mat))
+
+
+def rpy_a_quat(rpy):
+    """
+    ============================================================
+    FUNCIÓN: rpy_a_quat(rpy)
+    ------------------------------------------------------------
+    Convierte ángulos [roll, pitch, yaw] (convención de URScript
+    `rpy2rotvec`: R = Rz(yaw)·Ry(pitch)·Rx(roll)) a cuaterniones.
+
+        Parámetros:
+            rpy (array (3,) | (N, 3)): ángulos en rad.
+        Retorna:
+            ndarray (4,) | (N, 4): cuaternión [w, x, y, z].
+    ============================================================
+    """
+    a, unico = _como_lote(rpy, 3)
+    cr, sr = np.cos(a[:, 0] / 2), np.sin(a[:, 0] / 2)
+    cp, sp = np.cos(a[:, 1] / 2), np.sin(a[:, 1] / 2)
+    cy, sy = np.cos(a[:, 2] / 2), np.sin(a[:, 2] / 2)
+    q = np.stack([cr * cp * cy + sr * sp * sy,
+                  sr * cp * cy - cr * sp * sy,
+                  cr * sp * cy + sr * cp * sy,
+                  cr * cp * sy - sr * sp * cy], axis=1)
+    return _salida(q, unico)
+
+
+def quat_a_rpy(quat):
+    """Cuaterniones [w, x, y, z] -> ángulos [roll, pitch, yaw] (convención `rotvec2rpy`)."""
+    q, unico = _como_lote(quat, 4)
+    q = q / np.linalg.norm(q, axis=1, keepdims=True)
+    w, x, y, z = q.T
+    roll = np.arctan2(2 * (w * x + y * z), 1 - 2 * (x * x + y * y))
+    pitch = np.arcsin(np.clip(2 * (w * y - z * x), -1.0, 1.0))
+    yaw = np.arctan2(2 * (w * z + x * y), 1 - 2 * (y * y + z * z))
+    return _salida(np.stack([roll, pitch, yaw], axis=1), unico)
+
+
+def rpy_a_rotvec(rpy):
+    """Equivalente local de `rpy2rotvec` de URScript (admite lotes)."""
+    return quat_a_rotvec(rpy_a_quat(rpy))
+
+
+def rotvec_a_rpy(rv):
+    """Equivalente local de `rotvec2rpy` de URScript (admite lotes)."""
+    return quat_a_rpy(rotvec_a_quat(rv))
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Operaciones de pose
+# ------------------------------------------------------------
+def pose_a_matriz(pose):
+    """Poses (N, 6) -> transformaciones homogéneas (N, 4, 4)."""
+    p, unico = _como_lote(pose, 6)
+    t = np.zeros((p.shape[0], 4, 4))
+    t[:, :3, :3] = rotvec_a_matriz(p[:, 3:])
+    t[:, :3, 3] = p[:, :3]
+    t[:, 3, 3] = 1.0
+    return _salida(t, unico)
+
+
+def matriz_a_pose(mat):
+    """Transformaciones homogéneas (N, 4, 4) -> poses (N, 6)."""
+    t = np.asarray(mat, dtype=np.float64)
+    unico = t.ndim == 2
+    t = t.reshape(-1, 4, 4)
+    p = np.empty((t.shape[0], 6))
+    p[:, :3] = t[:, :3, 3]
+    p[:, 3:] = matriz_a_rotvec(t[:, :3, :3])
+    return _salida(p, unico)
+
+
+def componer(pose_a, pose_b):
+    """
+    ============================================================
+    FUNCIÓN: componer(pose_a, pose_b)
+    ------------------------------------------------------------
+    Composición de poses, equivalente a `pose_trans(a, b)`: la
+    pose b se interpreta en el sistema de referencia de a.
+
+        Parámetros:
+            pose_a (array (6,) | (N, 6)): pose base.
+            pose_b (array (6,) | (N, 6)): pose relativa a `pose_a`.
+        Retorna:
+            ndarray (6,) | (N, 6): pose resultante.
+        Notas:
+            - Admite difusión: una pose contra un lote y viceversa.
+    ============================================================
+    """
+    a, unico_a = _como_lote(pose_a, 6)
+    b, unico_b = _como_lote(pose_b, 6)
+    n = max(a.shape[0], b.shape[0])
+    a = np.broadcast_to(a, (n, 6))
+    b = np.broadcast_to(b, (n, 6))
+    ra = rotvec_a_matriz(a[:, 3:])
+    rb = rotvec_a_matriz(b[:, 3:])
+    pos = a[:, :3] + np.einsum("nij,nj->ni", ra, b[:, :3])
+    rot = matriz_a_rotvec(np.matmul(ra, rb))
+    return _salida(np.hstack([pos, rot]), unico_a and unico_b)
+
+
+def sumar(pose_a, pose_b):
+    """Equivalente de `pose_add(a, b)`: suma de posiciones y rotación R = Ra·Rb."""
+    a, unico_a = _como_lote(pose_a, 6)
+    b, unico_b = _como_lote(pose_b, 6)
+    n = max(a.shape[0], b.shape[0])
+    a = np.broadcast_to(a, (n, 6))
+    b = np.broadcast_to(b, (n, 6))
+    pos = a[:, :3] + b[:, :3]
+    rot = matriz_a_rotvec(np.matmul(rotvec_a_matriz(a[:, 3:]), rotvec_a_matriz(b[:, 3:])))
+    return _salida(np.hstack([pos, rot]), unico_a and unico_b)
+
+
+def invertir(pose):
+    """Equivalente de `pose_inv(p)` (admite lotes)."""
+    p, unico = _como_lote(pose, 6)
+    rt = np.transpose(rotvec_a_matriz(p[:, 3:]), (0, 2, 1))
+    pos = -np.einsum("nij,nj->ni", rt, p[:, :3])
+    return _salida(np.hstack([pos, matriz_a_rotvec(rt)]), unico)
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 04 Alineación de herramienta
+# ------------------------------------------------------------
+def alinear_z(poses, objetivo=None):
+    """
+    ============================================================
+    FUNCIÓN: alinear_z(poses, objetivo=None)
+    ------------------------------------------------------------
+    Alinea el eje Z de la herramienta con un eje de la base
+    aplicando la rotación mínima, por lo que conserva el giro
+    alrededor de Z (a diferencia de anular Rx/Ry del rotvec,
+    que depende de la orientación de partida).
+
+        Parámetros:
+            poses (array (6,) | (N, 6)): poses TCP.
+            objetivo (array (3,) | None): dirección deseada del eje Z
+                en la base. Con None se usa el eje ±Z de la base más
+                cercano a cada pose.
+        Retorna:
+            ndarray (6,) | (N, 6): poses con la misma posición y el
+            eje Z alineado.
+    ============================================================
+    """
+    p, unico = _como_lote(poses, 6)
+    rot = rotvec_a_matriz(p[:, 3:])
+    z = rot[:, :, 2]
+
+    if objetivo is None:
+        signo = np.where(z[:, 2] >= 0, 1.0, -1.0)
+        t = np.zeros_like(z)
+        t[:, 2] = signo
+    else:
+        t = np.asarray(objetivo, dtype=np.float64)
+        t = np.broadcast_to(t / np.linalg.norm(t), z.shape)
+
+    eje = np.cross(z, t)
+    seno = np.linalg.norm(eje, axis=1)
+    coseno = np.einsum("ni,ni->n", z, t)
+    angulo = np.arctan2(seno, coseno)
+
+    # Caso antiparalelo: girar π alrededor del eje X de la herramienta
+    degenerado = seno < 1e-9
+    eje = np.where(degenerado[:, None], rot[:, :, 0], eje / np.where(degenerado, 1.0, seno)[:, None])
+    correccion = rotvec_a_matriz(eje * angulo[:, None])
+
+    salida = p.copy()
+    salida[:, 3:] = matriz_a_rotvec(np.matmul(correccion, rot))
+    return _salida(salida, unico)
+
+
+def reorientar(poses, rotvec):
+    """Asigna a todas las poses la misma orientación `rotvec`, conservando la posición."""
+    p, unico = _como_lote(poses, 6)
+    salida = p.copy()
+    salida[:, 3:] = np.asarray(rotvec, dtype=np.float64)
+    return _salida(salida, unico)
+
+# ▲▲========================================================▲▲
@@ -0,0 +1,536 @@
+"""
+proceso_io.py
+------------------------------------------------
+Propósito: E/S de robots en un proceso aparte, para que la recepción RTDE
+no comparta el GIL con Tk, PIL o la construcción de rutinas. El proceso
+hijo corre un `motor_async.MotorCelda`; el estado sale por memoria
+compartida y los comandos por una tubería liviana.
+
+Memoria compartida (`multiprocessing.shared_memory`, un segmento por robot):
+    [cabecera 64 B][llegadas: `capacidad` float64][último paquete]
+    [anillo de `capacidad` paquetes]
+`llegadas` guarda, por casilla del anillo, el `time.monotonic()` del hijo
+cuando leyó el paquete del socket (las métricas de jitter no dependen del
+periodo de la bomba).
+con un esquema seqlock: el escritor (único, en el hijo) pone `seq` impar,
+escribe y lo deja par; el lector repite la lectura si `seq` cambió o era
+impar. Así la GUI lee el estado en el lugar, sin copias ni candados entre
+procesos.
+
+Uso (misma interfaz que MotorCelda):
+    io = ProcesoIO(al_lote=..., al_evento=...)
+    io.agregar("r1", "192.168.1.20")
+    io.iniciar()
+    pose = io.leer("r1", lambda f: f.actual_TCP_pose.tolist())
+    io.urscript("r1").enviar(script)
+    io.detener()
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y constantes
+# ------------------------------------------------------------
+
+import sys
+import time
+import itertools
+import contextlib
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import dashboard
+import motor_async
+
+# Cabecera: 8 x uint64 (el tiempo se guarda como float64 en su casilla)
+SEQ, ESCRITOS, T_ULTIMO = 0, 1, 2
+TAM_CABECERA = 64
+
+TIMEOUT_S = 2 * motor_async.TIMEOUT_S + 1
+ESPERA_SEQ_S = 0.5                  # una escritura dura µs: más que esto = el escritor murió a mitad
+PERIODO_BOMBA_S = 0.01              # lectura de lotes nuevos en el proceso de la GUI
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Estado en memoria compartida (seqlock)
+# ------------------------------------------------------------
+class EstadoCompartido:
+    """
+    ============================================================
+    CLASE: EstadoCompartido(dtype, capacidad, nombre=None)
+    ------------------------------------------------------------
+    Último paquete + historial circular de un robot en un
+    segmento de memoria compartida.
+
+        Parámetros:
+            dtype (np.dtype): fila RTDE (`DecodificadorRTDE.dtype`).
+            capacidad (int): paquetes del anillo.
+            nombre (str | None): None crea el segmento (escritor);
+                un nombre lo adjunta (lector).
+        Métodos:
+            escribir_lote(lote, llegada=None): solo el escritor;
+                `llegada` = instante de lectura del socket.
+            leer(funcion): aplica `funcion(fila)` sobre el último
+                paquete en el lugar y devuelve su resultado.
+            nuevos(desde) -> (lote, hasta, perdidos, llegadas):
+                copia de los paquetes escritos desde el índice
+                `desde` y de sus instantes de llegada.
+            cerrar(eliminar=False)
+        Errores:
+            TimeoutError en `leer`/`nuevos` si `seq` sigue impar
+            más de ESPERA_SEQ_S (el hijo murió a mitad de escribir).
+        Notas:
+            - `funcion` no debe devolver vistas de la fila (se
+            invalidan al cerrar); p. ej. usar `.tolist()`.
+    ============================================================
+    """
+
+    def __init__(self, dtype: np.dtype, capacidad: int, nombre: str = None):
+        self.dtype, self.capacidad = np.dtype(dtype), int(capacidad)
+        tam = TAM_CABECERA + 8 * self.capacidad + self.dtype.itemsize * (1 + self.capacidad)
+        if nombre is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=tam)
+        else:
+            try:
+                self.shm = shared_memory.SharedMemory(name=nombre, track=False)   # Python >= 3.13
+            except TypeError:
+                self.shm = shared_memory.SharedMemory(name=nombre)
+        self.nombre = self.shm.name
+        buf = self.shm.buf
+        self._cab = np.ndarray((8,), np.uint64, buf, 0)
+        self._t = np.ndarray((1,), np.float64, buf, 8 * T_ULTIMO)
+        self._llegadas = np.ndarray((self.capacidad,), np.float64, buf, TAM_CABECERA)
+        inicio = TAM_CABECERA + 8 * self.capacidad
+        self._ultimo = np.ndarray((1,), self.dtype, buf, inicio).view(np.recarray)
+        self._anillo = np.ndarray((self.capacidad,), self.dtype, buf,
+                                  inicio + self.dtype.itemsize).view(np.recarray)
+        if nombre is None:
+            self._cab[:] = 0
+
+    # ---------- escritor ----------
+    def escribir_lote(self, lote, llegada: float = None) -> None:
+        n, cap = len(lote), self.capacidad
+        if n == 0:
+            return
+        llegada = time.monotonic() if llegada is None else llegada
+        cab = self._cab
+        cab[SEQ] += 1                   # impar: escritura en curso
+        escritos = int(cab[ESCRITOS])
+        recientes = lote[-cap:]
+        i = (escritos + n - len(recientes)) % cap
+        primero = min(len(recientes), cap - i)
+        self._anillo[i:i + primero] = recientes[:primero]
+        self._llegadas[i:i + primero] = llegada
+        if len(recientes) > primero:
+            self._anillo[:len(recientes) - primero] = recientes[primero:]
+            self._llegadas[:len(recientes) - primero] = llegada
+        self._ultimo[0] = lote[-1]
+        self._t[0] = time.time()
+        cab[ESCRITOS] = escritos + n
+        cab[SEQ] += 1                   # par: consistente
+
+    # ---------- lectores ----------
+    def _seq_estable(self) -> int:
+        limite = None
+        while True:
+            s = int(self._cab[SEQ])
+            if not s & 1:
+                return s
+            ahora = time.monotonic()    # escritura en curso (otro proceso)
+            if limite is None:
+                limite = ahora + ESPERA_SEQ_S
+            elif ahora > limite:
+                raise TimeoutError("memoria compartida a medio escribir (¿terminó el proceso de E/S?)")
+            time.sleep(0)
+
+    def leer(self, funcion):
+        while True:
+            s = self._seq_estable()
+            if not self._cab[ESCRITOS]:
+                return None
+            resultado = funcion(self._ultimo[0])
+            if int(self._cab[SEQ]) == s:
+                return resultado
+
+    def nuevos(self, desde: int):
+        cap = self.capacidad
+        while True:
+            s = self._seq_estable()
+            escritos = int(self._cab[ESCRITOS])
+            n = escritos - desde
+            perdidos = max(0, n - cap)
+            n = min(n, cap)
+            i = (escritos - n) % cap
+            if i + n <= cap:
+                lote = self._anillo[i:i + n].copy()
+                llegadas = self._llegadas[i:i + n].copy()
+            else:
+                lote = np.concatenate((self._anillo[i:], self._anillo[:i + n - cap])).view(np.recarray)
+                llegadas = np.concatenate((self._llegadas[i:], self._llegadas[:i + n - cap]))
+            if int(self._cab[SEQ]) == s:
+                return lote, escritos, perdidos, llegadas
+
+    @property
+    def escritos(self) -> int:
+        return int(self._cab[ESCRITOS])
+
+    @property
+    def antiguedad(self) -> float:
+        """Segundos desde la última escritura (inf si nunca se escribió)."""
+        return time.time() - float(self._t[0]) if self._cab[ESCRITOS] else float("inf")
+
+    def cerrar(self, eliminar: bool = False) -> None:
+        self._cab = self._t = self._ultimo = self._anillo = self._llegadas = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass                        # quedan vistas vivas: el SO libera al salir
+        if eliminar:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Proceso hijo
+# ------------------------------------------------------------
+def _resultado(futuro) -> tuple:
+    try:
+        return futuro.result(), None
+    except Exception as e:
+        return None, e
+
+
+@contextlib.contextmanager
+def _este_modulo_como_principal():
+    """
+    Mientras dura, `__main__` es este módulo: el hijo "spawn" arranca
+    importando proceso_io y no re-ejecuta el script de la GUI (tkinter,
+    PIL, ajustes y conexiones a nivel de módulo) como `__mp_main__`.
+    """
+    principal = sys.modules["__main__"]
+    sys.modules["__main__"] = sys.modules[__name__]
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = principal
+
+
+def _principal(conexion, robots: list, capacidad: int) -> None:
+    """
+    ============================================================
+    FUNCIÓN: _principal(conexion, robots, capacidad)
+    ------------------------------------------------------------
+    Cuerpo del proceso de E/S: motor asyncio + memoria compartida.
+
+        Mensajes hijo → padre (tuplas):
+            ("estado", robot, nombre_shm, dtype, capacidad)
+            ("salida", robot, salida | None)
+            ("conexiones", robot, {enlace: n})
+            ("evento", robot, evento)
+            ("respuesta", id, resultado, error)
+        Mensajes padre → hijo:
+            (operación, id, robot, args) con operación "enviar" o
+            "consultar"; ("detener", ...) termina el proceso.
+    ============================================================
+    """
+
+    candado = threading.Lock()
+    estados = {}
+
+    def responder(*mensaje):
+        with candado:
+            try:
+                conexion.send(mensaje)
+            except (OSError, EOFError):
+                pass                    # el padre ya no escucha
+
+    def al_lote(nombre, lote):
+        est = estados.get(nombre)
+        if est is None or est.dtype != lote.dtype:
+            if est is not None:
+                est.cerrar(eliminar=True)
+            est = estados[nombre] = EstadoCompartido(lote.dtype, capacidad)
+            responder("estado", nombre, est.nombre, est.dtype, capacidad)
+        est.escribir_lote(lote)
+
+    motor = motor_async.MotorCelda(al_lote=al_lote, al_evento=lambda n, ev: responder("evento", n, ev))
+    for nombre, ip, opciones in robots:
+        motor.agregar(nombre, ip, **opciones)
+    motor.iniciar()
+
+    salidas, conexiones = {}, {}
+    try:
+        while True:
+            if conexion.poll(0.5):
+                try:
+                    operacion, ident, nombre, args = conexion.recv()
+                except (EOFError, OSError):
+                    break
+                if operacion == "detener":
+                    break
+                futuro = motor.lanzar(getattr(motor.robots[nombre], operacion)(*args))
+                futuro.add_done_callback(lambda f, i=ident: responder("respuesta", i, *_resultado(f)))
+            for nombre in motor.robots:
+                salida = motor.salida(nombre)
+                if salidas.get(nombre) != salida:
+                    salidas[nombre] = salida
+                    responder("salida", nombre, salida)
+            for nombre, c in motor.conexiones().items():
+                if conexiones.get(nombre) != c:
+                    conexiones[nombre] = c
+                    responder("conexiones", nombre, c)
+    finally:
+        motor.detener()
+        for est in estados.values():
+            est.cerrar(eliminar=True)
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 04 Lado de la GUI
+# ------------------------------------------------------------
+class ProcesoIO:
+    """
+    ============================================================
+    CLASE: ProcesoIO(al_lote=None, al_evento=None, capacidad=20000)
+    ------------------------------------------------------------
+    Misma interfaz que `motor_async.MotorCelda`, con la E/S en un
+    proceso hijo.
+
+        Parámetros:
+            al_lote (callable): (nombre, lote) con los paquetes
+                nuevos, leídos del anillo cada PERIODO_BOMBA_S.
+            al_evento (callable): (nombre, evento) de 30002.
+            capacidad (int): paquetes del anillo por robot.
+        Métodos:
+            agregar(nombre, ip, **opciones): antes de iniciar().
+            iniciar() / detener()
+            leer(nombre, funcion): lectura sin copia del último
+                paquete (ver `EstadoCompartido.leer`); None si aún
+                no hay datos o el hijo murió a mitad de escribir.
+            enviar, difundir, consultar, estado, salida,
+            dashboard(nombre), urscript(nombre): como MotorCelda.
+        Atributos:
+            estados (dict): nombre -> EstadoCompartido adjunto.
+            perdidos (dict): paquetes que la bomba no alcanzó a leer.
+            llegadas (dict): nombre -> instantes de lectura del
+                socket (`time.monotonic()` del hijo) de cada paquete
+                del lote que se está entregando a `al_lote`.
+        Notas:
+            - Usa el contexto "spawn", con proceso_io como módulo
+            principal del hijo: el script de la GUI no se importa
+            allí. Igual conviene proteger su arranque con
+            `if __name__ == "__main__":` (ejecutable congelado).
+            - Los callbacks corren en hilos de este proceso.
+            - Si el hijo cambia de receta (otro dtype), el segmento
+            se reemplaza bajo `_candado_estados`, el mismo que toman
+            la bomba y `leer`; el anterior se cierra cuando ya nadie
+            lo usa.
+    ============================================================
+    """
+
+    def __init__(self, al_lote=None, al_evento=None, capacidad: int = 20000):
+        self.al_lote, self.al_evento = al_lote, al_evento
+        self.capacidad = capacidad
+        self.robots = {}                # nombre -> (ip, opciones)
+        self.estados = {}
+        self.perdidos = {}
+        self.llegadas = {}
+        self._salidas = {}
+        self._conexiones = {}
+        self._leidos = {}
+        self._pendientes = {}           # id -> [Event, resultado, error]
+        self._ids = itertools.count()
+        self._candado = threading.Lock()
+        self._candado_estados = threading.Lock()   # estados/_leidos: escucha, bomba y leer
+        self._conexion = None
+        self._proceso = None
+        self._activo = False
+
+    def agregar(self, nombre: str, ip: str, **opciones) -> None:
+        opciones.pop("al_lote", None)
+        opciones.pop("al_evento", None)
+        self.robots[nombre] = (ip, opciones)
+
+    # ---------- ciclo de vida ----------
+    def iniciar(self):
+        ctx = mp.get_context("spawn")
+        propia, hija = ctx.Pipe()
+        robots = [(n, ip, op) for n, (ip, op) in self.robots.items()]
+        self._proceso = ctx.Process(target=_principal, args=(hija, robots, self.capacidad),
+                                    name="taller_io", daemon=True)
+        with _este_modulo_como_principal():
+            self._proceso.start()
+        hija.close()
+        self._conexion, self._activo = propia, True
+        threading.Thread(target=self._escuchar, name="io_escucha", daemon=True).start()
+        threading.Thread(target=self._bombear, name="io_bomba", daemon=True).start()
+        return self
+
+    @property
+    def pid(self):
+        """PID del proceso de E/S (None antes de iniciar)."""
+        return self._proceso.pid if self._proceso is not None else None
+
+    def detener(self) -> None:
+        if not self._activo:
+            return
+        self._activo = False
+        try:
+            with self._candado:
+                self._conexion.send(("detener", None, None, ()))
+        except OSError:
+            pass
+        self._proceso.join(5.0)
+        if self._proceso.is_alive():
+            self._proceso.terminate()
+        with self._candado_estados:
+            for est in self.estados.values():
+                est.cerrar()
+            self.estados.clear()
+
+    # ---------- hilos del lado GUI ----------
+    def _escuchar(self) -> None:
+        while self._activo:
+            try:
+                mensaje = self._conexion.recv()
+            except (EOFError, OSError):
+                break
+            tipo = mensaje[0]
+            if tipo == "respuesta":
+                _, ident, resultado, error = mensaje
+                pendiente = self._pendientes.get(ident)
+                if pendiente is not None:
+                    pendiente[1:] = [resultado, error]
+                    pendiente[0].set()
+            elif tipo == "evento" and self.al_evento is not None:
+                self.al_evento(mensaje[1], mensaje[2])
+            elif tipo == "salida":
+                self._salidas[mensaje[1]] = mensaje[2]
+            elif tipo == "conexiones":
+                self._conexiones[mensaje[1]] = mensaje[2]
+            elif tipo == "estado":
+                _, nombre, nombre_shm, dtype, capacidad = mensaje
+                nuevo = EstadoCompartido(dtype, capacidad, nombre_shm)
+                with self._candado_estados:
+                    anterior = self.estados.get(nombre)
+                    self.estados[nombre] = nuevo
+                    self._leidos[nombre] = 0
+                if anterior is not None:        # la bomba y `leer` ya no lo ven
+                    anterior.cerrar()
+
+    def _bombear(self) -> None:
+        trabados = set()                # avisados una vez: segmento a medio escribir
+        while self._activo:
+            time.sleep(PERIODO_BOMBA_S)
+            lotes = []
+            with self._candado_estados:
+                for nombre, est in self.estados.items():
+                    try:
+                        lote, self._leidos[nombre], perdidos, llegadas = est.nuevos(self._leidos.get(nombre, 0))
+                    except TimeoutError as e:
+                        if nombre not in trabados:
+                            trabados.add(nombre)
+                            print(f"[io] {nombre}: {e}")
+                        continue
+                    if perdidos:
+                        self.perdidos[nombre] = self.perdidos.get(nombre, 0) + perdidos
+                    lotes.append((nombre, lote, llegadas))
+            for nombre, lote, llegadas in lotes:     # fuera del candado: al_lote puede llamar a leer()
+                if len(lote) and self.al_lote is not None:
+                    self.llegadas[nombre] = llegadas
+                    try:
+                        self.al_lote(nombre, lote)
+                    except Exception as e:
+                        print(f"[io] al_lote({nombre}) falló: {e}")
+
+    # ---------- comandos ----------
+    def _pedir(self, operacion: str, nombre: str, *args):
+        if not self._activo:
+            raise ConnectionError("proceso de E/S detenido")
+        ident = next(self._ids)
+        pendiente = self._pendientes[ident] = [threading.Event(), None, None]
+        try:
+            with self._candado:
+                self._conexion.send((operacion, ident, nombre, args))
+            if not pendiente[0].wait(TIMEOUT_S):
+                raise ConnectionError("proceso de E/S sin respuesta")
+        finally:
+            del self._pendientes[ident]
+        if pendiente[2] is not None:
+            raise pendiente[2]
+        return pendiente[1]
+
+    def enviar(self, nombre: str, script: str) -> None:
+        self._pedir("enviar", nombre, script)
+
+    def difundir(self, script: str, nombres: list = None) -> dict:
+        nombres = list(nombres or self.robots)
+        resultados = {}
+
+        def uno(n):
+            try:
+                self.enviar(n, script)
+                resultados[n] = None
+            except Exception as e:
+                resultados[n] = e
+
+        hilos = [threading.Thread(target=uno, args=(n,)) for n in nombres]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        return {n: resultados[n] for n in nombres}
+
+    def consultar(self, nombre: str, *comandos) -> dict:
+        return self._pedir("consultar", nombre, *comandos)
+
+    def estado(self, nombre: str) -> dict:
+        return dashboard.interpretar_estado(self.consultar(nombre, *dashboard.CONSULTA_ESTADO))
+
+    # ---------- estado ----------
+    def leer(self, nombre: str, funcion):
+        with self._candado_estados:
+            est = self.estados.get(nombre)
+            if est is None:
+                return None
+            try:
+                return est.leer(funcion)
+            except TimeoutError:
+                return None             # el hijo murió a mitad de escribir
+
+    def ultimo(self, nombre: str):
+        return self.leer(nombre, lambda fila: fila.copy())
+
+    def salida(self, nombre: str):
+        return self._salidas.get(nombre)
+
+    def conexiones(self) -> dict:
+        return {n: dict(c) for n, c in self._conexiones.items()}
+
+    def dashboard(self, nombre: str) -> motor_async.AdaptadorDashboard:
+        return motor_async.AdaptadorDashboard(self, nombre)
+
+    def urscript(self, nombre: str) -> motor_async.AdaptadorURScript:
+        return motor_async.AdaptadorURScript(self, nombre)
+
+# ▲▲========================================================▲▲
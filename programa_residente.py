@@ -0,0 +1,488 @@
+"""
+programa_residente.py
+------------------------------------------------
+Propósito: programa residente en el robot con la tabla de la rutina
+conservada entre ejecuciones. En la puesta en marcha se retocan uno o dos
+puntos y se vuelve a ejecutar: en vez de reenviar `s_cobotStart` y todos
+los pasos, el PC compara la rutina con lo último que subió y envía solo
+las entradas que cambiaron.
+
+- La tabla son los registros de `ejecucion_bloques` (10 enteros por
+  movimiento/acción) en una lista URScript de capacidad fija, escrita
+  como literal al compilar (sin `make_list`: vale también en CB3 y
+  PolyScope anteriores a 5.10).
+- Cada subida termina con un hash de contenido (blake2b de 64 bits de la
+  tabla) que el robot guarda y devuelve; antes de comparar, el PC lo
+  consulta: si no coincide con el suyo (programa reiniciado, otra
+  conexión) sube la tabla completa.
+- Freedrive y pinza se piden al residente mientras está vivo: cualquier
+  otro programa enviado al 30002 lo reemplazaría y con él la tabla.
+- Detener usa el Dashboard (`stop`), que termina el residente: la próxima
+  ejecución vuelve a subir todo.
+
+Protocolo (el robot se conecta al PC):
+    PC → robot: encabezado de 4 int32 [comando, a, b, c] (+ registros)
+    robot → PC: líneas "hola <capacidad>", "h <h1> <h2> <n>",
+                "v <h1> <h2>", "fin"
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y constantes
+# ------------------------------------------------------------
+
+import queue
+import socket
+import hashlib
+import threading
+
+import numpy as np
+
+import ejecucion_bloques as eb
+
+(CMD_LATIDO, CMD_ESCRIBIR, CMD_LARGO, CMD_VERSION, CMD_CONSULTAR,
+ CMD_EJECUTAR, CMD_FREEDRIVE, CMD_PINZA, CMD_SALIR) = range(9)
+
+PUERTO = 50011                          # puerto del PC al que se conecta el residente
+CAPACIDAD_MIN = 1024                    # registros de la tabla al subir el programa
+CAPACIDAD_MAX = 20000                   # más registros → ejecución por bloques / programa completo
+ESPERA_S = 10.0                         # s para conectarse / sin latidos antes de salir
+LATIDO_S = 2.0                          # s entre latidos del PC
+RESPUESTA_S = 5.0                       # s para las respuestas del residente
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Tabla y diferencias
+# ------------------------------------------------------------
+def construir_tabla(pasos: list):
+    """
+    ============================================================
+    FUNCIÓN: construir_tabla(pasos)
+    ------------------------------------------------------------
+    Registros codificados de la rutina, como quedan en el robot.
+
+        Parámetros:
+            pasos (list): pasos de `lista_instrucciones`.
+        Retorna:
+            (ndarray (N, 10) >i4, ndarray (len(pasos) + 1,) int):
+            tabla y registro inicial de cada paso (el último = N).
+    ============================================================
+    """
+    trozos, largos = [], []
+    for paso in pasos:
+        regs = list(eb.registros([paso]))
+        trozos += regs
+        largos.append(sum(len(r) for r in regs))
+    inicios = np.concatenate(([0], np.cumsum(largos, dtype=np.int64)))
+    if not trozos:
+        return np.zeros((0, eb.CAMPOS), ">i4"), inicios
+    tabla = np.frombuffer(eb.codificar(np.concatenate(trozos)), ">i4").reshape(-1, eb.CAMPOS)
+    return tabla, inicios
+
+
+def huella(tabla: np.ndarray) -> tuple:
+    """Hash de contenido de la tabla como dos int32 (lo que guarda el robot)."""
+    digesto = hashlib.blake2b(tabla.tobytes(), digest_size=8).digest()
+    return tuple(int(v) for v in np.frombuffer(digesto, ">i4"))
+
+
+def diferencias(vieja: np.ndarray, nueva: np.ndarray) -> list:
+    """
+    ============================================================
+    FUNCIÓN: diferencias(vieja, nueva)
+    ------------------------------------------------------------
+    Tramos de registros a reescribir para pasar de `vieja` a
+    `nueva` (comparación vectorizada fila a fila).
+
+        Parámetros:
+            vieja, nueva (ndarray (N, 10)): tablas codificadas.
+        Retorna:
+            list[(inicio, fin)]: tramos contiguos [inicio, fin).
+        Notas:
+            - Las filas nuevas al final forman el último tramo; si
+            la tabla se acorta basta con CMD_LARGO.
+    ============================================================
+    """
+    comun = min(len(vieja), len(nueva))
+    filas = np.flatnonzero((vieja[:comun] != nueva[:comun]).any(axis=1))
+    if len(nueva) > comun:
+        filas = np.concatenate((filas, np.arange(comun, len(nueva))))
+    if not len(filas):
+        return []
+    cortes = np.flatnonzero(np.diff(filas) > 1) + 1
+    inicios = filas[np.concatenate(([0], cortes))]
+    fines = filas[np.concatenate((cortes - 1, [len(filas) - 1]))] + 1
+    return list(zip(inicios.tolist(), fines.tolist()))
+
+
+def pasos_cambiados(inicios: np.ndarray, tramos: list) -> np.ndarray:
+    """Índices de los pasos que tocan los `tramos` de registros (`inicios` de `construir_tabla`)."""
+    if not tramos:
+        return np.zeros(0, np.int64)
+    bordes = np.array(tramos).T
+    primero = np.searchsorted(inicios, bordes[0], "right") - 1
+    ultimo = np.searchsorted(inicios, bordes[1] - 1, "right") - 1
+    return np.unique(np.concatenate([np.arange(p, u + 1) for p, u in zip(primero, ultimo)]))
+
+
+def _encabezado(comando: int, a: int = 0, b: int = 0, c: int = 0) -> bytes:
+    return np.array([comando, a, b, c], ">i4").tobytes()
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Programa residente (URScript)
+# ------------------------------------------------------------
+def compilar_residente(host: str, puerto: int = PUERTO, capacidad: int = CAPACIDAD_MIN,
+                       espera_s: float = ESPERA_S, sangria: str = "    ") -> list:
+    """
+    ============================================================
+    FUNCIÓN: compilar_residente(host, puerto, capacidad, espera_s, sangria)
+    ------------------------------------------------------------
+    Cuerpo URScript del residente: se conecta al PC y atiende
+    comandos hasta CMD_SALIR o hasta que el PC deja de latir. Va
+    dentro de `urscripts.s_cobotStart` (usa rq_*).
+
+        Parámetros:
+            host (str): IP del PC vista desde el robot.
+            puerto (int): puerto de `ProgramaResidente`.
+            capacidad (int): registros de la tabla.
+            espera_s (float): s sin comandos ni latidos antes de salir.
+            sangria (str): sangría base.
+        Retorna:
+            list[str]: líneas; el tamaño depende solo de
+            `capacidad` (literal de la tabla, ~20 B por registro).
+        Notas:
+            - `res_tabla` es un literal de ceros en vez de
+            `make_list` (PolyScope 5.10+), para controladores
+            anteriores.
+            - CMD_EJECUTAR sale de Freedrive y recorre la tabla sin
+            leer el socket (los comandos que lleguen esperan).
+    ============================================================
+    """
+    s0, s1, s2, s3, s4, s5 = (sangria + "  " * i for i in range(6))
+    m = 1000000.0
+    valor = lambda j: f"res_tabla[res_k + {j}] / {m}"
+    return [
+        f"{s0}# Programa residente: tabla de la rutina conservada entre ejecuciones",
+        f'{s0}if not socket_open("{host}", {puerto}, "residente"):',
+        f'{s1}popup("Sin conexión con el PC ({host}:{puerto})", "Programa residente", error=True)',
+        f"{s1}halt",
+        f"{s0}end",
+        f"{s0}res_tabla = [{','.join(['0'] * (capacidad * eb.CAMPOS))}]",
+        f"{s0}res_n = 0",
+        f"{s0}res_h1 = 0",
+        f"{s0}res_h2 = 0",
+        f"{s0}res_silencio = 0",
+        f'{s0}socket_send_line("hola {capacidad}", "residente")',
+        f"{s0}while True:",
+        f'{s1}res_c = socket_read_binary_integer(4, "residente", 1)',
+        f"{s1}if res_c[0] < 4:",
+        f"{s2}res_silencio = res_silencio + 1",
+        f"{s2}if res_silencio > {int(espera_s)}:",
+        f"{s3}break",
+        f"{s2}end",
+        f"{s2}sleep(0.1)",
+        f"{s1}else:",
+        f"{s2}res_silencio = 0",
+        f"{s2}res_cmd = res_c[1]",
+        f"{s2}if res_cmd == {CMD_ESCRIBIR}:",
+        f"{s3}res_i = res_c[2]",
+        f"{s3}res_fin = res_i + res_c[3]",
+        f"{s3}while res_i < res_fin:",
+        f'{s4}res_r = socket_read_binary_integer({eb.CAMPOS}, "residente", 2)',
+        f"{s4}if res_r[0] < {eb.CAMPOS}:",
+        f'{s5}popup("Tabla incompleta", "Programa residente", error=True)',
+        f"{s5}halt",
+        f"{s4}end",
+        f"{s4}res_k = res_i * {eb.CAMPOS}",
+        *(f"{s4}res_tabla[res_k + {j}] = res_r[{j + 1}]" for j in range(eb.CAMPOS)),
+        f"{s4}res_i = res_i + 1",
+        f"{s4}if res_i % 50 == 0:",
+        f"{s5}sync()",
+        f"{s4}end",
+        f"{s3}end",
+        f"{s2}elif res_cmd == {CMD_LARGO}:",
+        f"{s3}res_n = res_c[2]",
+        f"{s2}elif res_cmd == {CMD_VERSION}:",
+        f"{s3}res_h1 = res_c[2]",
+        f"{s3}res_h2 = res_c[3]",
+        f'{s3}socket_send_line(str_cat(str_cat("v ", res_h1), str_cat(" ", res_h2)), "residente")',
+        f"{s2}elif res_cmd == {CMD_CONSULTAR}:",
+        f'{s3}socket_send_line(str_cat(str_cat(str_cat("h ", res_h1), str_cat(" ", res_h2)), '
+        f'str_cat(" ", res_n)), "residente")',
+        f"{s2}elif res_cmd == {CMD_EJECUTAR}:",
+        f"{s3}end_freedrive_mode()",
+        f"{s3}res_i = 0",
+        f"{s3}while res_i < res_n:",
+        f"{s4}res_k = res_i * {eb.CAMPOS}",
+        f"{s4}res_op = res_tabla[res_k]",
+        f"{s4}if res_op == {eb.OP_MOVEJ} or res_op == {eb.OP_MOVEL}:",
+        f"{s5}res_p = p[{', '.join(valor(j) for j in range(1, 7))}]",
+        f"{s5}if res_op == {eb.OP_MOVEJ}:",
+        f"{s5}  movej(res_p, a={valor(7)}, v={valor(8)}, r={valor(9)})",
+        f"{s5}else:",
+        f"{s5}  movel(res_p, a={valor(7)}, v={valor(8)}, r={valor(9)})",
+        f"{s5}end",
+        f"{s4}elif res_op == {eb.OP_ABRIR}:",
+        f"{s5}rq_open_and_classify()",
+        f"{s4}elif res_op == {eb.OP_CERRAR}:",
+        f"{s5}rq_close_and_classify()",
+        f"{s4}elif res_op == {eb.OP_ESPERA}:",
+        f"{s5}sleep({valor(7)})",
+        f"{s4}end",
+        f"{s4}res_i = res_i + 1",
+        f"{s3}end",
+        f'{s3}socket_send_line("fin", "residente")',
+        f"{s2}elif res_cmd == {CMD_FREEDRIVE}:",
+        f"{s3}if res_c[2] == 1:",
+        f"{s4}freedrive_mode()",
+        f"{s3}else:",
+        f"{s4}end_freedrive_mode()",
+        f"{s3}end",
+        f"{s2}elif res_cmd == {CMD_PINZA}:",
+        f"{s3}if res_c[2] == {eb.OP_ABRIR}:",
+        f"{s4}rq_open_and_classify()",
+        f"{s3}else:",
+        f"{s4}rq_close_and_classify()",
+        f"{s3}end",
+        f"{s2}elif res_cmd == {CMD_SALIR}:",
+        f"{s3}break",
+        f"{s2}end",
+        f"{s1}end",
+        f"{s0}end",
+        f"{s0}end_freedrive_mode()",
+        f'{s0}socket_close("residente")',
+    ]
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 04 Lado PC
+# ------------------------------------------------------------
+class ProgramaResidente:
+    """
+    ============================================================
+    CLASE: ProgramaResidente(puerto=PUERTO, al_terminar=None, permitidos=None)
+    ------------------------------------------------------------
+    Servidor al que se conecta el residente y espejo de la tabla
+    que tiene el robot.
+
+        Parámetros:
+            puerto (int): puerto de escucha (0 = libre).
+            al_terminar (callable | None): al_terminar(error) al
+            terminar una ejecución (hilo lector); error None si el
+            robot respondió "fin".
+            permitidos (iterable | None): IP/nombres de los robots
+            (ver `permitir`); None = cualquiera, solo pruebas locales.
+        Notas:
+            - Una conexión a la vez: un residente nuevo reemplaza al
+            anterior y la tabla espejo se descarta.
+            - Las conexiones de otras direcciones se cierran sin
+            tocar la del residente actual.
+            - `sincronizar` y los comandos se serializan con un lock;
+            las respuestas llegan por una cola desde el hilo lector.
+    ============================================================
+    """
+
+    def __init__(self, puerto: int = PUERTO, al_terminar=None, permitidos=None):
+        self._al_terminar = al_terminar
+        self._permitidos = None
+        if permitidos is not None:
+            self.permitir(permitidos)
+        self._lock = threading.Lock()
+        self._conexion = None
+        self._respuestas = queue.Queue()
+        self._cambio = threading.Condition()
+        self._tabla = None              # última tabla confirmada por el robot
+        self._huella = None
+        self.capacidad = 0              # registros de la tabla del residente conectado
+        self.conexiones = 0             # residentes conectados desde el inicio
+        self.ejecutando = False
+        self.ultimo_envio = 0           # bytes de la última sincronización
+        self._servidor = socket.create_server(("", puerto))
+        self.puerto = self._servidor.getsockname()[1]
+        threading.Thread(target=self._aceptar, daemon=True).start()
+        threading.Thread(target=self._latir, daemon=True).start()
+
+    @property
+    def vivo(self) -> bool:
+        return self._conexion is not None and self.capacidad > 0
+
+    def permitir(self, hosts) -> None:
+        """Robots que pueden conectarse (el activo cambia durante la sesión)."""
+        self._permitidos = {eb.resolver_ip(h) for h in hosts}
+
+    def _aceptar(self) -> None:
+        while True:
+            try:
+                conexion, direccion = self._servidor.accept()
+            except OSError:             # cerrado
+                return
+            permitidos = self._permitidos
+            if permitidos is not None and direccion[0] not in permitidos:
+                print(f"[residente] conexión rechazada de {direccion[0]} (no es el robot activo)")
+                conexion.close()
+                continue
+            conexion.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.soltar()
+            with self._cambio:
+                self._conexion = conexion
+                self._respuestas = queue.Queue()
+            threading.Thread(target=self._leer, args=(conexion,), daemon=True).start()
+
+    def _leer(self, conexion: socket.socket) -> None:
+        error = None
+        try:
+            for linea in conexion.makefile("r", encoding="ascii", errors="replace"):
+                partes = linea.split()
+                if not partes:
+                    continue
+                if partes[0] == "hola":
+                    with self._cambio:
+                        self.capacidad = int(partes[1])
+                        self.conexiones += 1
+                        self._cambio.notify_all()
+                elif partes[0] == "fin":
+                    self.ejecutando = False
+                    if self._al_terminar is not None:
+                        self._al_terminar(None)
+                else:
+                    self._respuestas.put(partes)
+            error = ConnectionError("el programa residente terminó")
+        except (OSError, ValueError) as e:
+            error = e
+        if conexion is self._conexion:  # no fue reemplazada ni soltada a propósito
+            self._olvidar()
+            if self.ejecutando and self._al_terminar is not None:
+                self._al_terminar(error)
+            self.ejecutando = False
+
+    def _latir(self) -> None:
+        evento = threading.Event()
+        while not evento.wait(LATIDO_S):
+            if self._conexion is not None and not self.ejecutando:
+                try:
+                    self._enviar(_encabezado(CMD_LATIDO))
+                except OSError:
+                    pass
+
+    def _olvidar(self) -> None:
+        with self._cambio:
+            self._conexion = None
+            self._tabla = self._huella = None
+            self.capacidad = 0
+
+    def _enviar(self, datos: bytes) -> None:
+        conexion = self._conexion
+        if conexion is None:
+            raise ConnectionError("no hay programa residente")
+        with self._lock:
+            conexion.sendall(datos)
+
+    def _respuesta(self, clave: str) -> list:
+        try:
+            while True:
+                partes = self._respuestas.get(timeout=RESPUESTA_S)
+                if partes[0] == clave:
+                    return [int(v) for v in partes[1:]]
+        except queue.Empty:
+            raise TimeoutError(f"el programa residente no respondió ({clave})") from None
+
+    def esperar(self, conexiones_previas: int, espera_s: float = ESPERA_S) -> bool:
+        """Espera a que se conecte un residente nuevo (después de enviar el programa)."""
+        with self._cambio:
+            return self._cambio.wait_for(lambda: self.conexiones > conexiones_previas, espera_s)
+
+    def sincronizar(self, tabla: np.ndarray) -> list:
+        """
+        ============================================================
+        MÉTODO: sincronizar(tabla)
+        ------------------------------------------------------------
+        Deja en el robot `tabla` enviando solo los tramos que
+        difieren de la última tabla confirmada.
+
+            Parámetros:
+                tabla (ndarray (N, 10) >i4): de `construir_tabla`.
+            Retorna:
+                list[(inicio, fin)]: tramos enviados.
+            Errores:
+                ValueError si la tabla supera la capacidad;
+                ConnectionError / TimeoutError si el robot no
+                confirma el hash.
+            Notas:
+                - Deja en `ultimo_envio` los bytes enviados.
+        ============================================================
+        """
+        if len(tabla) > self.capacidad:
+            raise ValueError(f"{len(tabla)} registros superan la capacidad del residente ({self.capacidad})")
+        self._enviar(_encabezado(CMD_CONSULTAR))
+        h1, h2, n = self._respuesta("h")
+        base = self._tabla
+        if base is None or (h1, h2) != self._huella or n != len(base):
+            base = np.zeros((0, eb.CAMPOS), ">i4")
+
+        tramos = diferencias(base, tabla)
+        nueva = huella(tabla)
+        partes = [_encabezado(CMD_ESCRIBIR, i, f - i) + tabla[i:f].tobytes() for i, f in tramos]
+        if len(tabla) != len(base) or not len(base):
+            partes.append(_encabezado(CMD_LARGO, len(tabla)))
+        partes.append(_encabezado(CMD_VERSION, *nueva))
+        datos = b"".join(partes)
+        self._tabla = None              # hasta que el robot confirme
+        self._enviar(datos)
+        if tuple(self._respuesta("v")) != nueva:
+            raise ConnectionError("el programa residente no confirmó la tabla")
+        self._tabla, self._huella = tabla.copy(), nueva
+        self.ultimo_envio = len(datos) + 16
+        return tramos
+
+    def ejecutar(self) -> None:
+        """Recorre la tabla en el robot; `al_terminar(None)` cuando responde "fin"."""
+        self.ejecutando = True
+        try:
+            self._enviar(_encabezado(CMD_EJECUTAR))
+        except OSError:
+            self.ejecutando = False
+            raise
+
+    def comando(self, comando: int, valor: int = 0) -> None:
+        """Comando directo (CMD_FREEDRIVE, CMD_PINZA) sin reemplazar el programa."""
+        self._enviar(_encabezado(comando, valor))
+
+    def soltar(self) -> None:
+        """Olvida el residente actual (cierra la conexión sin avisar a `al_terminar`)."""
+        conexion = self._conexion
+        self._olvidar()
+        self.ejecutando = False
+        if conexion is not None:
+            try:
+                conexion.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conexion.close()
+
+    def cerrar(self) -> None:
+        """Pide al residente que termine y deja de escuchar."""
+        try:
+            self._enviar(_encabezado(CMD_SALIR))
+        except OSError:
+            pass
+        self.soltar()
+        self._servidor.close()
+
+# ▲▲========================================================▲▲
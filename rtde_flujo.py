@@ -0,0 +1,234 @@
+"""
+rtde_flujo.py
+------------------------------------------------
+Propósito: configuración flexible de la salida RTDE (receta, campos y
+frecuencia con respaldo automático) y reparto de cada paquete recibido a
+consumidores con tasas distintas: tasa completa para grabación/perfilado
+y tasa decimada para la GUI. Mide además la tasa real entregada.
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías
+# ------------------------------------------------------------
+
+import time
+import threading
+from collections import deque
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Configuración de salida con respaldo
+# ------------------------------------------------------------
+def intentos_salida(receta: str, campos: list, frecuencia: float, respaldo: str) -> list:
+    """
+    ============================================================
+    FUNCIÓN: intentos_salida(receta, campos, frecuencia, respaldo)
+    ------------------------------------------------------------
+    Devuelve, en orden de preferencia y sin repetir, las
+    combinaciones (receta|campos, frecuencia) a probar.
+
+        Parámetros:
+            receta (str): receta solicitada.
+            campos (list): campos explícitos (reemplazan a la receta).
+            frecuencia (float): Hz solicitados.
+            respaldo (str): receta de respaldo.
+        Retorna:
+            list[tuple]: [(receta, campos, frecuencia), ...]
+        Notas:
+            - Orden: solicitado → solicitado a 125 Hz → respaldo a la
+            frecuencia pedida → respaldo a 125 Hz.
+    ============================================================
+    """
+    intentos, vistos = [], set()
+    for rec, cam in ((receta, list(campos)), (respaldo, [])):
+        for hz in (float(frecuencia), 125.0):
+            clave = (rec, tuple(cam), hz)
+            if rec and clave not in vistos:
+                vistos.add(clave)
+                intentos.append((rec, cam, hz))
+    return intentos
+
+
+def configurar_salida(con, conf, receta: str, campos: list, frecuencia: float, respaldo: str):
+    """
+    ============================================================
+    FUNCIÓN: configurar_salida(con, conf, receta, campos, ...)
+    ------------------------------------------------------------
+    Llama `send_output_setup` probando las combinaciones de
+    `intentos_salida` hasta que el controlador acepte una.
+
+        Parámetros:
+            con (rtde.RTDE): conexión ya abierta.
+            conf (rtde_config.ConfigFile): recetas del XML.
+            receta, campos, frecuencia, respaldo: ver `intentos_salida`.
+        Retorna:
+            tuple | None: (receta, nombres, tipos, frecuencia) aceptados,
+            o None si ninguna combinación fue aceptada.
+        Notas:
+            - Con campos explícitos se envían sin tipos: el
+            controlador informa los tipos reales.
+    ============================================================
+    """
+    for rec, cam, hz in intentos_salida(receta, campos, frecuencia, respaldo):
+        try:
+            nombres, tipos = (cam, []) if cam else conf.get_recipe(rec)
+        except KeyError:
+            continue                    # receta inexistente en el XML
+        if con.send_output_setup(nombres, tipos, frequency=hz):
+            return rec, nombres, tipos, hz
+    return None
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Medición de tasa real
+# ------------------------------------------------------------
+class MedidorTasa:
+    """
+    ============================================================
+    CLASE: MedidorTasa(ventana_s=1.0)
+    ------------------------------------------------------------
+    Mide la tasa real de paquetes (Hz) en una ventana deslizante
+    para compararla con la frecuencia solicitada.
+
+        Métodos:
+            marcar(t=None, n=1): registra la llegada de n paquetes.
+            tasa() -> float: paquetes/s en la última ventana.
+    ============================================================
+    """
+
+    def __init__(self, ventana_s: float = 1.0):
+        self.ventana_s = ventana_s
+        self._marcas = deque()
+        self.total = 0
+
+    def marcar(self, t: float = None, n: int = 1) -> None:
+        t = time.monotonic() if t is None else t
+        self._marcas.extend([t] * n)
+        self.total += n
+        limite = t - self.ventana_s
+        while self._marcas and self._marcas[0] < limite:
+            self._marcas.popleft()
+
+    def tasa(self) -> float:
+        if len(self._marcas) < 2:
+            return 0.0
+        lapso = self._marcas[-1] - self._marcas[0]
+        return (len(self._marcas) - 1) / lapso if lapso > 0 else 0.0
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 04 Reparto a consumidores
+# ------------------------------------------------------------
+class DistribuidorRTDE:
+    """
+    ============================================================
+    CLASE: DistribuidorRTDE()
+    ------------------------------------------------------------
+    Reparte cada estado RTDE recibido a consumidores suscritos,
+    cada uno con su propia tasa máxima.
+
+        Métodos:
+            suscribir(funcion, hz=None, lote=False): hz=None → tasa
+                completa; lote=True recibe el arreglo del lote entero.
+            publicar(estado): llamado por el hilo lector.
+            publicar_lote(lote): idem para lotes de `rtde_rapido`.
+        Notas:
+            - La decimación es por tiempo (intervalo mínimo 1/hz),
+            independiente de la frecuencia configurada.
+            - Un consumidor con error no detiene a los demás.
+    ============================================================
+    """
+
+    def __init__(self):
+        self._consumidores = []         # [funcion, intervalo_s, ultimo_t]
+        self._lock = threading.Lock()
+        self.medidor = MedidorTasa()
+
+    def suscribir(self, funcion, hz: float = None, lote: bool = False) -> None:
+        with self._lock:
+            self._consumidores.append([funcion, (1.0 / hz) if hz else 0.0, float("-inf"), lote])
+
+    def _entregar(self, c, dato) -> None:
+        try:
+            c[0](dato)
+        except Exception as e:
+            print(f"[RTDE] consumidor {getattr(c[0], '__name__', c[0])} falló: {e}")
+
+    def publicar(self, estado) -> None:
+        ahora = time.monotonic()
+        self.medidor.marcar(ahora)
+        with self._lock:
+            consumidores = list(self._consumidores)
+        for c in consumidores:
+            if ahora - c[2] < c[1]:
+                continue
+            c[2] = ahora
+            self._entregar(c, estado)
+
+    def publicar_lote(self, lote) -> None:
+        if len(lote) == 0:
+            return
+        ahora = time.monotonic()
+        self.medidor.marcar(ahora, len(lote))
+        with self._lock:
+            consumidores = list(self._consumidores)
+        for c in consumidores:
+            if c[3]:
+                self._entregar(c, lote)
+            elif c[1] == 0.0:
+                for fila in lote:
+                    self._entregar(c, fila)
+            elif ahora - c[2] >= c[1]:
+                c[2] = ahora
+                self._entregar(c, lote[-1])     # decimado: solo el más reciente
+
+
+class RegistroRTDE:
+    """
+    ============================================================
+    CLASE: RegistroRTDE(max_muestras)
+    ------------------------------------------------------------
+    Historial circular a tasa completa de (timestamp, TCP pose),
+    pensado para grabación y perfilado.
+
+        Métodos:
+            __call__(estado): consumidor para `DistribuidorRTDE`.
+            agregar_lote(lote): consumidor por lotes (`lote=True`).
+            muestras() -> list: copia del historial.
+    ============================================================
+    """
+
+    def __init__(self, max_muestras: int):
+        self._datos = deque(maxlen=max_muestras)
+
+    def __call__(self, estado) -> None:
+        self._datos.append((getattr(estado, "timestamp", time.monotonic()),
+                            tuple(getattr(estado, "actual_TCP_pose", ()))))
+
+    def agregar_lote(self, lote) -> None:
+        if "actual_TCP_pose" not in lote.dtype.names:
+            return
+        t = lote["timestamp"].tolist() if "timestamp" in lote.dtype.names else [time.monotonic()] * len(lote)
+        self._datos.extend(zip(t, map(tuple, lote["actual_TCP_pose"].tolist())))
+
+    def muestras(self) -> list:
+        return list(self._datos)
+
+# ▲▲========================================================▲▲
@@ -0,0 +1,269 @@
+"""
+rtde_rapido.py
+------------------------------------------------
+Propósito: decodificador rápido de paquetes RTDE DATA_PACKAGE. A partir de
+la receta (control_loop_configuration.xml o los tipos que informa el
+controlador) precompila un `struct.Struct` y un dtype estructurado NumPy,
+y drena de una vez todos los paquetes encolados en el socket sobre un
+buffer reutilizado (`memoryview`), sin crear objetos por campo.
+
+Formato RTDE (big-endian): [uint16 tamaño][uint8 tipo][payload]
+DATA_PACKAGE ('U'): payload = [uint8 id_receta][campos...]
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y constantes
+# ------------------------------------------------------------
+
+import select
+import struct
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+TIPO_DATA_PACKAGE = 85               # 'U'
+CABECERA = struct.Struct(">HB")      # tamaño (incluye cabecera) + tipo
+
+# tipo RTDE -> (formato struct, dtype NumPy big-endian, forma)
+TIPOS = {
+    "BOOL":          ("?",  ">u1", ()),
+    "UINT8":         ("B",  ">u1", ()),
+    "UINT32":        ("I",  ">u4", ()),
+    "UINT64":        ("Q",  ">u8", ()),
+    "INT32":         ("i",  ">i4", ()),
+    "DOUBLE":        ("d",  ">f8", ()),
+    "VECTOR3D":      ("3d", ">f8", (3,)),
+    "VECTOR6D":      ("6d", ">f8", (6,)),
+    "VECTOR6INT32":  ("6i", ">i4", (6,)),
+    "VECTOR6UINT32": ("6I", ">u4", (6,)),
+}
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Receta y decodificador
+# ------------------------------------------------------------
+def receta_desde_xml(ruta: str, clave: str):
+    """
+    ============================================================
+    FUNCIÓN: receta_desde_xml(ruta, clave)
+    ------------------------------------------------------------
+    Lee una receta de control_loop_configuration.xml sin depender
+    de la librería `rtde`.
+
+        Parámetros:
+            ruta (str): archivo XML de recetas.
+            clave (str): atributo `key` de la receta.
+        Retorna:
+            tuple[list, list]: (nombres, tipos).
+        Errores:
+            KeyError si la receta no existe.
+    ============================================================
+    """
+    for receta in ET.parse(ruta).getroot().iter("recipe"):
+        if receta.get("key") == clave:
+            campos = receta.findall("field")
+            return [c.get("name") for c in campos], [c.get("type") for c in campos]
+    raise KeyError(clave)
+
+
+class DecodificadorRTDE:
+    """
+    ============================================================
+    CLASE: DecodificadorRTDE(nombres, tipos)
+    ------------------------------------------------------------
+    Estructuras precompiladas para una receta de salida.
+
+        Atributos:
+            estructura (struct.Struct): payload completo (id + campos).
+            dtype (np.dtype): paquete completo con cabecera, para ver
+                N paquetes contiguos como un arreglo sin copiar.
+            tam_paquete (int): bytes por paquete (cabecera incluida).
+        Métodos:
+            tupla(buf, offset) -> tuple: valores planos de un paquete.
+            lote(buf, offset, n) -> np.recarray: n paquetes contiguos.
+            extraer(buf, fin, id_receta) -> (consumidos, lote, descartados)
+    ============================================================
+    """
+
+    def __init__(self, nombres: list, tipos: list):
+        self.nombres = list(nombres)
+        self.tipos = list(tipos)
+        fmt = "".join(TIPOS[t][0] for t in self.tipos)
+        self.estructura = struct.Struct(">B" + fmt)
+        self.dtype = np.dtype([("_tam", ">u2"), ("_tipo", "u1"), ("_receta", "u1")] +
+                              [(n, TIPOS[t][1], TIPOS[t][2]) for n, t in zip(self.nombres, self.tipos)])
+        self.tam_paquete = CABECERA.size + self.estructura.size
+        assert self.dtype.itemsize == self.tam_paquete
+
+    def tupla(self, buf, offset: int = 0) -> tuple:
+        """Decodifica un paquete con `struct.unpack_from` (id_receta, valores planos...)."""
+        return self.estructura.unpack_from(buf, offset + CABECERA.size)
+
+    def lote(self, buf, offset: int, n: int):
+        """Vista NumPy de n paquetes contiguos (sin copia; copiar antes de reutilizar `buf`)."""
+        return np.frombuffer(buf, dtype=self.dtype, count=n, offset=offset).view(np.recarray)
+
+    def extraer(self, buf, fin: int, id_receta: int, otros=None):
+        """
+        ============================================================
+        MÉTODO: extraer(buf, fin, id_receta, otros=None)
+        ------------------------------------------------------------
+        Recorre los paquetes completos de buf[0:fin] y devuelve los
+        DATA_PACKAGE de la receta como un único lote (copia).
+
+            Parámetros:
+                buf (bytearray): buffer con los bytes recibidos.
+                fin (int): bytes válidos en `buf`.
+                id_receta (int): receta esperada.
+                otros (callable | None): recibe (tipo, payload) de los
+                    paquetes que no son datos (respuestas de control).
+            Retorna:
+                tuple: (bytes consumidos, lote | None, descartados).
+            Errores:
+                ConnectionError si una cabecera es inválida.
+        ============================================================
+        """
+        tam = self.tam_paquete
+        pos, offsets, descartados = 0, [], 0
+        while fin - pos >= CABECERA.size:
+            largo, tipo = CABECERA.unpack_from(buf, pos)
+            if largo < CABECERA.size:
+                raise ConnectionError(f"RTDE: cabecera inválida (tamaño {largo})")
+            if fin - pos < largo:
+                break                   # paquete incompleto: esperar más bytes
+            if tipo == TIPO_DATA_PACKAGE and largo == tam and buf[pos + 3] == id_receta:
+                offsets.append(pos)
+            elif otros is not None and tipo != TIPO_DATA_PACKAGE:
+                otros(tipo, bytes(buf[pos + CABECERA.size:pos + largo]))
+            else:
+                descartados += 1
+            pos += largo
+
+        lote = None
+        if offsets:
+            n = len(offsets)
+            if offsets[-1] - offsets[0] == (n - 1) * tam:
+                lote = self.lote(buf, offsets[0], n).copy()          # caso común: contiguos
+            else:
+                lote = np.concatenate([self.lote(buf, o, 1) for o in offsets]).view(np.recarray)
+        return pos, lote, descartados
+
+    def codificar(self, id_receta: int, valores: dict) -> bytes:
+        """Arma un paquete DATA_PACKAGE (útil para simuladores y benchmarks)."""
+        plano = []
+        for n, t in zip(self.nombres, self.tipos):
+            v = valores[n]
+            plano.extend(v if TIPOS[t][2] else [v])
+        return CABECERA.pack(self.tam_paquete, TIPO_DATA_PACKAGE) + self.estructura.pack(id_receta, *plano)
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Lector por lotes sobre el socket
+# ------------------------------------------------------------
+class LectorRapido:
+    """
+    ============================================================
+    CLASE: LectorRapido(sock, decodificador, id_receta, capacidad)
+    ------------------------------------------------------------
+    Drena el socket RTDE en lotes: en cada despertar lee todo lo
+    disponible en un buffer fijo y devuelve todos los paquetes
+    DATA_PACKAGE completos como un único arreglo estructurado.
+
+        Métodos:
+            recibir_lote(timeout) -> np.recarray | None
+        Notas:
+            - Los paquetes de otro tipo (p. ej. mensajes de texto)
+            o de otra receta se descartan.
+            - El lote devuelto es una copia: el buffer se reutiliza.
+    ============================================================
+    """
+
+    def __init__(self, sock, decodificador: DecodificadorRTDE, id_receta: int,
+                 capacidad: int = 1 << 16, pendiente: bytes = b""):
+        self.sock = sock
+        self.dec = decodificador
+        self.id_receta = id_receta
+        self._buf = bytearray(max(capacidad, 4 * decodificador.tam_paquete, len(pendiente)))
+        self._vista = memoryview(self._buf)
+        self._buf[:len(pendiente)] = pendiente
+        self._fin = len(pendiente)      # bytes válidos en el buffer
+        self._cerrado = False
+        self.descartados = 0
+
+    def _leer_disponible(self, timeout: float) -> bool:
+        """Espera datos hasta `timeout` y luego lee sin bloquear todo lo disponible."""
+        if self._cerrado:
+            raise ConnectionError("RTDE: conexión cerrada por el robot")
+        listo, _, _ = select.select([self.sock], [], [], timeout)
+        if not listo:
+            return False
+        while self._fin < len(self._buf):
+            n = self.sock.recv_into(self._vista[self._fin:])
+            if n == 0:
+                self._cerrado = True    # entregar lo ya leído; fallar en la próxima llamada
+                if self._fin == 0:
+                    raise ConnectionError("RTDE: conexión cerrada por el robot")
+                break
+            self._fin += n
+            listo, _, _ = select.select([self.sock], [], [], 0)
+            if not listo:
+                break
+        return True
+
+    def recibir_lote(self, timeout: float = 1.0):
+        if self._fin == len(self._buf):
+            raise ConnectionError("RTDE: paquete mayor que el buffer del lector")
+        if not self._leer_disponible(0.0 if self._fin else timeout) and not self._fin:
+            return None
+
+        buf, fin = self._buf, self._fin
+        pos, lote, descartados = self.dec.extraer(buf, fin, self.id_receta)
+        self.descartados += descartados
+
+        # Conservar el resto incompleto al inicio del buffer
+        resto = fin - pos
+        if resto:
+            buf[:resto] = buf[pos:fin]
+        self._fin = resto
+        return lote
+
+
+def desde_conexion(con, nombres: list = None, tipos: list = None) -> LectorRapido:
+    """
+    ============================================================
+    FUNCIÓN: desde_conexion(con, nombres=None, tipos=None)
+    ------------------------------------------------------------
+    Crea un `LectorRapido` sobre una conexión `rtde.RTDE` ya
+    iniciada (`send_start`), reutilizando su socket y receta.
+
+        Parámetros:
+            con (rtde.RTDE): conexión iniciada.
+            nombres, tipos (list | None): receta; None usa la que
+                informó el controlador en `send_output_setup`.
+        Retorna:
+            LectorRapido
+        Errores:
+            AttributeError si la versión de la librería `rtde` no
+            expone el socket o la receta (usar `receive()`).
+    ============================================================
+    """
+    salida = con._RTDE__output_config
+    sock = con._RTDE__sock
+    nombres = nombres or salida.names
+    tipos = tipos or salida.types
+    pendiente = bytes(getattr(con, "_RTDE__buf", b""))   # bytes ya leídos por la librería
+    return LectorRapido(sock, DecodificadorRTDE(nombres, tipos), salida.id, pendiente=pendiente)
+
+# ▲▲========================================================▲▲
@@ -0,0 +1,19 @@
+"""
+rthook_temas.py
+------------------------------------------------
+Propósito: hook de arranque de PyInstaller (perfil liviano de
+Taller_FreeDrive.spec). Deja en ttkbootstrap solo los temas que usa la
+app, así `Style()` no registra los temas estándar restantes al crear la
+ventana. En ttkbootstrap los temas son un único dict de Python, por eso
+se recortan aquí y no en el análisis del spec.
+"""
+# -*- coding: utf-8 -*-
+
+TEMAS = ("lumen",)                      # tb.Window(themename=...) en construir_ventana
+
+try:
+    from ttkbootstrap.themes import standard as _estandar
+    for _nombre in [n for n in _estandar.STANDARD_THEMES if n not in TEMAS]:
+        del _estandar.STANDARD_THEMES[_nombre]
+except (ImportError, AttributeError):    # otra versión de ttkbootstrap: sin recorte
+    pass
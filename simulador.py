@@ -0,0 +1,313 @@
+"""
+simulador.py
+------------------------------------------------
+Propósito: controlador UR de reemplazo, local, para probar la app sin
+robot: atiende el Dashboard Server (29999), la interfaz secundaria (30002,
+recibe scripts y emite estado a 10 Hz) y RTDE (30004, handshake + datos a
+la frecuencia pedida) con un estado simulado.
+
+Uso:
+    sim = SimuladorUR().iniciar_en_hilo()     # puertos libres en 127.0.0.1
+    cli = dashboard.ClienteDashboard("127.0.0.1", sim.puertos["dashboard"])
+    ...
+    sim.detener_hilo()
+
+    python simulador.py      # fija los puertos estándar (29999/30002/30004)
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías
+# ------------------------------------------------------------
+
+import math
+import time
+import struct
+import asyncio
+import threading
+
+import rtde_rapido
+import interfaz_secundaria
+
+# Campos RTDE que el simulador sabe producir (nombre -> tipo)
+CAMPOS_SIM = {
+    "timestamp": "DOUBLE", "actual_q": "VECTOR6D", "actual_qd": "VECTOR6D",
+    "actual_TCP_pose": "VECTOR6D", "actual_TCP_speed": "VECTOR6D",
+    "speed_scaling": "DOUBLE", "runtime_state": "UINT32", "robot_status_bits": "UINT32",
+}
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Controlador simulado
+# ------------------------------------------------------------
+class SimuladorUR:
+    """
+    ============================================================
+    CLASE: SimuladorUR(host="127.0.0.1", puertos=None, frecuencia_max=500)
+    ------------------------------------------------------------
+    Controlador simulado sobre asyncio.
+
+        Parámetros:
+            host (str): interfaz de escucha.
+            puertos (dict | None): {"dashboard", "urscript", "rtde"};
+                0 o ausente → puerto libre asignado por el sistema.
+            frecuencia_max (float): Hz máximos aceptados por RTDE
+                (125 simula un CB3).
+        Atributos:
+            puertos (dict): puertos efectivos tras iniciar.
+            programa, modo, seguridad (str): estado del Dashboard.
+            comandos (list): comandos de Dashboard recibidos.
+            bytes_script, ultimo_script: tráfico recibido en 30002.
+        Métodos:
+            iniciar() / detener(): corrutinas (en un loop existente).
+            iniciar_en_hilo() / detener_hilo(): loop propio en un hilo.
+            cortar_enlaces(): cierra todas las conexiones abiertas
+                (simula una caída de red; los clientes reconectan).
+            excepcion(linea, columna, texto): emite una excepción de
+                ejecución por 30002.
+    ============================================================
+    """
+
+    def __init__(self, host: str = "127.0.0.1", puertos: dict = None, frecuencia_max: float = 500):
+        self.host = host
+        self.puertos = {"dashboard": 0, "urscript": 0, "rtde": 0}
+        self.puertos.update(puertos or {})
+        self.frecuencia_max = frecuencia_max
+        self.programa, self.modo, self.seguridad = "STOPPED", "RUNNING", "NORMAL"
+        self.comandos = []
+        self.bytes_script, self.ultimo_script = 0, b""
+        self.paquetes_rtde = 0
+        self._secundarias = set()       # escritores 30002 (para excepciones)
+        self._servidores = []
+        self._tareas = set()            # conexiones atendidas (para cerrarlas al detener)
+        self._loop = None
+        self._hilo = None
+
+    # ---------- ciclo de vida ----------
+    async def iniciar(self):
+        for clave, manejador in (("dashboard", self._dashboard), ("urscript", self._urscript),
+                                 ("rtde", self._rtde)):
+            servidor = await asyncio.start_server(self._atender(manejador), self.host, self.puertos[clave])
+            self.puertos[clave] = servidor.sockets[0].getsockname()[1]
+            self._servidores.append(servidor)
+        return self
+
+    def cortar_enlaces(self) -> None:
+        """Cierra las conexiones abiertas (llamar desde el loop o vía `llamar`)."""
+        for tarea in list(self._tareas):
+            tarea.cancel()
+
+    def llamar(self, funcion, *args) -> None:
+        """Ejecuta `funcion(*args)` dentro del loop del simulador (seguro entre hilos)."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(funcion, *args)
+        else:
+            funcion(*args)
+
+    def excepcion(self, linea: int, columna: int, texto: str) -> None:
+        paquete = interfaz_secundaria.codificar_excepcion(linea, columna, texto)
+        for escritor in list(self._secundarias):
+            escritor.write(paquete)
+
+    async def detener(self):
+        for servidor in self._servidores:
+            servidor.close()
+        for tarea in list(self._tareas):
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        for servidor in self._servidores:
+            await servidor.wait_closed()
+        self._servidores.clear()
+
+    def _atender(self, manejador):
+        """Envuelve un manejador de conexión para registrar su tarea."""
+        async def envuelto(lector, escritor):
+            tarea = asyncio.current_task()
+            self._tareas.add(tarea)
+            try:
+                await manejador(lector, escritor)
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+            finally:
+                self._tareas.discard(tarea)
+                escritor.close()
+        return envuelto
+
+    def iniciar_en_hilo(self):
+        listo = threading.Event()
+
+        def correr():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.iniciar())
+            listo.set()
+            self._loop.run_forever()
+
+        self._hilo = threading.Thread(target=correr, daemon=True)
+        self._hilo.start()
+        listo.wait(5.0)
+        return self
+
+    def detener_hilo(self) -> None:
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.detener(), self._loop).result(5.0)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._hilo.join(5.0)
+        self._loop = None
+
+    # ---------- Dashboard Server ----------
+    def responder_dashboard(self, comando: str) -> str:
+        self.comandos.append(comando)
+        if comando == "programState":
+            return f"{self.programa} taller.urp"
+        if comando == "robotmode":
+            return f"Robotmode: {self.modo}"
+        if comando == "safetystatus":
+            return f"Safetystatus: {self.seguridad}"
+        if comando == "safetymode":
+            return f"Safetymode: {self.seguridad}"
+        if comando == "running":
+            return f"Program running: {str(self.programa == 'PLAYING').lower()}"
+        if comando == "stop":
+            self.programa = "STOPPED"
+            return "Stopped"
+        if comando == "play":
+            self.programa = "PLAYING"
+            return "Starting program"
+        if comando == "pause":
+            self.programa = "PAUSED"
+            return "Pausing program"
+        if comando == "unlock protective stop":
+            self.seguridad = "NORMAL"
+            return "Protective stop releasing"
+        return f"could not understand: '{comando}'"
+
+    async def _dashboard(self, lector, escritor):
+        escritor.write(b"Connected: Universal Robots Dashboard Server\n")
+        while True:
+            linea = await lector.readline()
+            if not linea:
+                break
+            comando = linea.decode("utf-8", errors="replace").strip()
+            if comando == "quit":
+                escritor.write(b"Disconnected\n")
+                break
+            escritor.write((self.responder_dashboard(comando) + "\n").encode("utf-8"))
+            await escritor.drain()
+
+    # ---------- Interfaz secundaria (30002) ----------
+    async def _urscript(self, lector, escritor):
+        self._secundarias.add(escritor)
+        emisor = asyncio.create_task(self._emitir_secundaria(escritor))
+        try:
+            while True:
+                datos = await lector.read(65536)
+                if not datos:
+                    break
+                self.bytes_script += len(datos)
+                self.ultimo_script = datos[-4096:]
+        finally:
+            emisor.cancel()
+            self._secundarias.discard(escritor)
+
+    async def _emitir_secundaria(self, escritor):
+        while True:
+            escritor.write(interfaz_secundaria.codificar_estado(
+                7, programa=(self.programa == "PLAYING"), relleno=1100))
+            await escritor.drain()
+            await asyncio.sleep(0.1)
+
+    # ---------- RTDE (30004) ----------
+    @staticmethod
+    def _paquete_rtde(tipo: str, payload: bytes) -> bytes:
+        return rtde_rapido.CABECERA.pack(rtde_rapido.CABECERA.size + len(payload), ord(tipo)) + payload
+
+    async def _rtde(self, lector, escritor):
+        dec, hz, emisor = None, 125.0, None
+        try:
+            while True:
+                largo, tipo = rtde_rapido.CABECERA.unpack(await lector.readexactly(rtde_rapido.CABECERA.size))
+                payload = await lector.readexactly(largo - rtde_rapido.CABECERA.size)
+                tipo = chr(tipo)
+                if tipo == "V":
+                    escritor.write(self._paquete_rtde("V", b"\x01"))
+                elif tipo == "v":
+                    escritor.write(self._paquete_rtde("v", struct.pack(">IIII", 5, 11, 0, 0)))
+                elif tipo == "O":
+                    pedido = struct.unpack_from(">d", payload)[0]
+                    nombres = payload[8:].decode("utf-8").split(",")
+                    tipos = [CAMPOS_SIM.get(n, "NOT_FOUND") for n in nombres]
+                    if pedido > self.frecuencia_max:
+                        tipos = ["NOT_FOUND"] * len(nombres)
+                    escritor.write(self._paquete_rtde("O", b"\x01" + ",".join(tipos).encode("utf-8")))
+                    if "NOT_FOUND" not in tipos:
+                        dec, hz = rtde_rapido.DecodificadorRTDE(nombres, tipos), pedido
+                elif tipo == "S":
+                    escritor.write(self._paquete_rtde("S", b"\x01" if dec else b"\x00"))
+                    if dec and emisor is None:
+                        emisor = asyncio.create_task(self._emitir_rtde(escritor, dec, hz))
+                elif tipo == "P":
+                    if emisor is not None:
+                        emisor.cancel()
+                        emisor = None
+                    escritor.write(self._paquete_rtde("P", b"\x01"))
+                await escritor.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            if emisor is not None:
+                emisor.cancel()
+
+    async def _emitir_rtde(self, escritor, dec, hz: float):
+        periodo = 1.0 / hz
+        siguiente = time.perf_counter()
+        valores = {n: ([0.0] * 6 if rtde_rapido.TIPOS[t][2] else 0) for n, t in zip(dec.nombres, dec.tipos)}
+        while True:
+            ahora = time.time()
+            fase = 0.5 * ahora
+            pose = [0.4 + 0.1 * math.cos(fase), 0.1 * math.sin(fase), 0.3, 3.1416, 0.0, 0.0]
+            for n in valores:
+                if n == "timestamp":
+                    valores[n] = ahora          # reloj de pared: permite medir latencia
+                elif n == "actual_TCP_pose":
+                    valores[n] = pose
+                elif n == "robot_status_bits":
+                    valores[n] = 3
+            escritor.write(dec.codificar(1, valores))
+            self.paquetes_rtde += 1
+            if escritor.transport.get_write_buffer_size() > (1 << 20):
+                await escritor.drain()          # cliente lento: no crecer sin límite
+            siguiente += periodo
+            espera = siguiente - time.perf_counter()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            elif espera < -0.5:
+                siguiente = time.perf_counter()  # atraso grande: re-sincronizar
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Ejecución directa
+# ------------------------------------------------------------
+if __name__ == "__main__":
+    async def _principal():
+        sim = await SimuladorUR(puertos={"dashboard": 29999, "urscript": 30002, "rtde": 30004}).iniciar()
+        print(f"Simulador UR escuchando en {sim.host}: {sim.puertos}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_principal())
+    except KeyboardInterrupt:
+        pass
+
+# ▲▲========================================================▲▲
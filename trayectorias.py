@@ -0,0 +1,438 @@
+"""
+trayectorias.py
+------------------------------------------------
+Propósito: paso de rutina tipo "trayectoria" (miles de puntos generados
+fuera de línea para dispensado o desbarbado) e importación en streaming
+desde CSV y un subconjunto de G-code.
+
+- Tubería de generadores: líneas del archivo → bloques → parseo →
+  validación y conversión de unidades vectorizadas (NumPy) → pasos. La
+  memoria de trabajo es un bloque (`BLOQUE` líneas) sin importar el
+  largo del archivo.
+- Los puntos quedan en arreglos float64 (48 bytes por pose), no en un
+  dict por punto.
+
+Formato del paso (elemento de `lista_instrucciones`):
+    {"tipo": "trayectoria", "poses": ndarray (n, 6) [m, rad],
+     "vel": ndarray (n,) [m/s], "acel": m/s², "radio": m, "origen": "archivo"}
+
+CSV: columnas x, y, z, rx, ry, rz en la base del robot (encabezado
+opcional, que puede reordenarlas; separador coma, punto y coma, tab o
+espacios; líneas con # se ignoran).
+
+G-code: G0/G1 con X Y Z (A B C opcionales = rotvec en grados) y F,
+G20/G21 (pulgadas/mm), G90/G91 (absoluto/incremental). Las coordenadas
+son relativas a la pose `origen` (cero de pieza, ejes paralelos a la
+base). M-códigos de `mcodigos` → acción de pinza (después del movimiento
+de su misma línea); el resto se ignora. G4 (pausa) no mueve; los arcos
+G2/G3 se rechazan con el número de línea (linealizarlos en el CAM).
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y constantes
+# ------------------------------------------------------------
+
+import os
+import re
+import itertools
+
+import numpy as np
+
+BLOQUE = 50_000                         # líneas por bloque
+ALCANCE = 1.3                           # m desde la base (UR10e; UR5e = 0,85)
+VEL = 0.05                              # m/s si el archivo no trae F
+VEL_G0 = 0.25                           # m/s de los G0 (traslados)
+ACEL = 0.5                              # m/s² de los movel
+RADIO = 0.001                           # m de mezcla máxima entre puntos
+ACEL_J, VEL_J = 0.6, 0.6                # movej al primer punto
+MCODIGOS = {"M3": "Cerrar", "M5": "Abrir"}
+
+ESCALAS = {"m": 1.0, "mm": 1e-3, "in": 0.0254}
+COLUMNAS = ("x", "y", "z", "rx", "ry", "rz")
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Lectura en bloques
+# ------------------------------------------------------------
+def bloques_de_lineas(ruta: str, tamano: int = BLOQUE):
+    """Genera (número de la primera línea, [líneas]) de a `tamano` líneas."""
+    with open(ruta, encoding="utf-8", errors="replace") as f:
+        numero = 1
+        while True:
+            lineas = list(itertools.islice(f, tamano))
+            if not lineas:
+                return
+            yield numero, lineas
+            numero += len(lineas)
+
+
+def _es_dato(linea: str) -> bool:
+    texto = linea.strip()
+    return bool(texto) and texto[0] != "#"
+
+
+def _numero_de_fila(primera: int, lineas: list, fila: int) -> int:
+    """Número de línea de la fila `fila` de datos del bloque (solo para mensajes de error)."""
+    datos = (primera + i for i, linea in enumerate(lineas) if _es_dato(linea))
+    return next(itertools.islice(datos, fila, None), primera)
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 CSV
+# ------------------------------------------------------------
+def _separador(linea: str):
+    for sep in (";", "\t", ","):
+        if sep in linea:
+            return sep
+    return None                         # espacios
+
+
+def eventos_csv(bloques, unidades: str = "mm", angulos: str = "rad"):
+    """
+    ============================================================
+    FUNCIÓN: eventos_csv(bloques, unidades="mm", angulos="rad")
+    ------------------------------------------------------------
+    Parsea bloques CSV con el lector en C de NumPy.
+
+        Parámetros:
+            bloques: generador de `bloques_de_lineas`.
+            unidades (str): "m" | "mm" | "in" de x, y, z.
+            angulos (str): "rad" | "deg" de rx, ry, rz.
+        Retorna:
+            generador de ("mov", primera, lineas, poses (k, 6), vel None).
+        Errores:
+            ValueError: línea no numérica o con columnas faltantes.
+    ============================================================
+    """
+    escala = np.array([ESCALAS[unidades]] * 3 + [np.pi / 180 if angulos == "deg" else 1.0] * 3)
+    sep, columnas = False, list(range(6))
+    for primera, lineas in bloques:
+        if sep is False:
+            inicio = next((i for i, linea in enumerate(lineas) if _es_dato(linea)), None)
+            if inicio is None:
+                continue
+            sep = _separador(lineas[inicio])
+            encabezado = [c.strip().lower() for c in lineas[inicio].strip().split(sep)]
+            if not re.match(r"^[-+.\d]", encabezado[0]):
+                try:
+                    columnas = [encabezado.index(c) for c in COLUMNAS]
+                except ValueError:
+                    raise ValueError(f"línea {primera + inicio}: el encabezado debe nombrar {', '.join(COLUMNAS)}")
+                primera, lineas = primera + inicio + 1, lineas[inicio + 1:]
+        try:
+            poses = np.loadtxt(lineas, delimiter=sep, comments="#", usecols=columnas, ndmin=2)
+        except ValueError as e:
+            for fila, linea in enumerate(l for l in lineas if _es_dato(l)):
+                try:
+                    np.loadtxt([linea], delimiter=sep, usecols=columnas, ndmin=2)
+                except ValueError:
+                    raise ValueError(f"línea {_numero_de_fila(primera, lineas, fila)}: "
+                                     f"se esperaban 6 números ({linea.strip()[:60]!r})") from None
+            raise ValueError(f"líneas {primera}-{primera + len(lineas) - 1}: {e}") from None
+        if len(poses):
+            yield "mov", primera, lineas, poses * escala, None
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 04 G-code
+# ------------------------------------------------------------
+_NUM = r"([-+]?(?:\d+\.?\d*|\.\d+))"
+_PALABRA = re.compile(r"([A-Z])\s*" + _NUM)
+_COMENTARIO = re.compile(r"\(.*?\)|;.*")
+# Camino rápido: línea típica de CAM ("N10 G1 X.. Y.. Z.. F..", palabras en orden)
+_LINEA = re.compile(r"\s*(?:N\d+\s*)?(?:G0?([01])(?!\d)\s*)?" +
+                    "".join(rf"(?:{eje}\s*{_NUM}\s*)?" for eje in "XYZABCF") +
+                    r"(?:;.*)?$", re.IGNORECASE)
+_EJES = {"X": 0, "Y": 1, "Z": 2, "A": 3, "B": 4, "C": 5, "F": 6}
+_VACIA = ("nan",) * 7
+
+
+class LectorGcode:
+    """
+    ============================================================
+    CLASE: LectorGcode(origen, mcodigos=MCODIGOS, vel=VEL, vel_g0=VEL_G0)
+    ------------------------------------------------------------
+    Convierte bloques de G-code en eventos de movimiento y de
+    pinza. Conserva el estado modal (posición, F, G0/G1, unidades,
+    absoluto/incremental) entre bloques.
+
+        Parámetros:
+            origen (array (6,)): cero de pieza en la base [m, rad];
+            su orientación se usa si el archivo no trae A/B/C.
+        Atributos:
+            ignoradas (int): palabras no soportadas (G/M/otras) y
+                pausas G4.
+        Errores:
+            ValueError("línea N: ...") en arcos G2/G3.
+        Notas:
+            - Por línea solo se separan las palabras (una regex para
+            las líneas típicas de CAM); rellenar modales, convertir
+            unidades y acumular incrementos se hace por bloque.
+    ============================================================
+    """
+
+    def __init__(self, origen, mcodigos: dict = None, vel: float = VEL, vel_g0: float = VEL_G0):
+        origen = np.asarray(origen, dtype=float)
+        self.origen = origen
+        self.mcodigos = {k.upper(): v for k, v in (mcodigos or MCODIGOS).items()}
+        self.vel_g0 = vel_g0
+        # Estado modal (unidades SI, coordenadas de pieza)
+        self.pos = np.concatenate((np.zeros(3), origen[3:]))
+        self.f = vel
+        self.rapido = True
+        self.escala = ESCALAS["mm"]
+        self.incremental = False
+        self.ignoradas = 0
+
+    def eventos(self, bloques):
+        for primera, lineas in bloques:
+            yield from self._bloque(primera, lineas)
+
+    def _bloque(self, primera: int, lineas: list):
+        filas, modos, numeros = [], [], []
+        for i, linea in enumerate(lineas):
+            m = _LINEA.match(linea)
+            if m is not None:
+                g = m.group(1)
+                if g is not None:
+                    self.rapido = g == "0"
+                valores = m.groups("nan")[1:]
+                if valores != _VACIA:
+                    filas.append(valores)
+                    modos.append((self.rapido, self.escala, self.incremental))
+                    numeros.append(primera + i)
+                continue
+            fila, accion = self._linea_general(linea, primera + i)
+            if fila is not None:
+                filas.append(fila)
+                modos.append((self.rapido, self.escala, self.incremental))
+                numeros.append(primera + i)
+            if accion is not None:                  # pinza: después del movimiento de la línea
+                if filas:
+                    yield self._movimientos(filas, modos, numeros)
+                    filas, modos, numeros = [], [], []
+                yield "gripper", primera + i, accion
+        if filas:
+            yield self._movimientos(filas, modos, numeros)
+
+    def _linea_general(self, linea: str, numero: int):
+        """Línea fuera del camino rápido: (fila de 7 valores | None, acción de pinza | None)."""
+        fila = accion = None
+        pausa = False
+        for letra, valor in _PALABRA.findall(_COMENTARIO.sub("", linea.upper())):
+            if letra in _EJES:
+                fila = fila or ["nan"] * 7
+                fila[_EJES[letra]] = valor
+            elif letra == "G":
+                g = float(valor)
+                if g in (0, 1):
+                    self.rapido = g == 0
+                elif g in (2, 3):
+                    raise ValueError(f"línea {numero}: arco G{int(g)} no soportado "
+                                     f"(exportar la ruta con arcos linealizados)")
+                elif g == 4:
+                    pausa = True                    # X/P/S son la duración, no un destino
+                elif g in (20, 21):
+                    self.escala = ESCALAS["in" if g == 20 else "mm"]
+                elif g in (90, 91):
+                    self.incremental = g == 91
+                else:
+                    self.ignoradas += 1
+            elif letra == "M":
+                m = self.mcodigos.get(f"M{int(float(valor))}")
+                if m is not None:
+                    accion = m
+                else:
+                    self.ignoradas += 1
+            elif letra != "N":
+                self.ignoradas += 1
+        if pausa:
+            self.ignoradas += 1
+            fila = None
+        return fila, accion
+
+    def _movimientos(self, filas: list, modos: list, numeros: list):
+        """Vectorizado: modales, unidades, incrementos y F → (poses, vel)."""
+        valores = np.array(filas, dtype=float)      # "nan" = palabra ausente
+        m = np.array(modos, dtype=float)
+        rapido, escala, incremental = m[:, 0] > 0, m[:, 1], m[:, 2] > 0
+        valores[:, :3] *= escala[:, None]
+        valores[:, 3:6] *= np.pi / 180
+        valores[:, 6] *= escala / 60    # unidades/min → m/s
+
+        previo = np.concatenate((self.pos, [self.f]))
+        salida = np.empty_like(valores)
+        for col in range(7):
+            v = valores[:, col]
+            presente = ~np.isnan(v)
+            if col < 3 and incremental.any():
+                # Incremental: acumula deltas; absoluto: reinicia en el valor dado
+                delta = np.where(presente & incremental, v, 0.0)
+                base = np.where(presente & ~incremental, v, np.nan)
+                idx = np.maximum.accumulate(np.where(~np.isnan(base), np.arange(len(v)), -1))
+                ancla = np.where(idx >= 0, base[np.maximum(idx, 0)], previo[col])
+                acum = np.cumsum(delta)
+                acum_ancla = np.where(idx >= 0, acum[np.maximum(idx, 0)], 0.0)
+                salida[:, col] = ancla + acum - acum_ancla
+            else:
+                idx = np.maximum.accumulate(np.where(presente, np.arange(len(v)), -1))
+                salida[:, col] = np.where(idx >= 0, v[np.maximum(idx, 0)], previo[col])
+        self.pos, self.f = salida[-1, :6].copy(), float(salida[-1, 6])
+
+        poses = salida[:, :6].copy()
+        poses[:, :3] += self.origen[:3]
+        vel = np.where(rapido, self.vel_g0, salida[:, 6])
+        return "mov", numeros[0], np.asarray(numeros), poses, vel
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 05 Validación, agrupado e importación
+# ------------------------------------------------------------
+def validar(eventos, alcance: float = ALCANCE):
+    """Comprueba cada bloque de movimientos (finitos, dentro del alcance, F > 0)."""
+    for evento in eventos:
+        if evento[0] == "mov":
+            _, primera, lineas, poses, vel = evento
+            malos = ~np.isfinite(poses).all(axis=1) | (np.einsum("ij,ij->i", poses[:, :3], poses[:, :3]) > alcance ** 2)
+            if vel is not None:
+                malos |= ~(vel > 0)
+            if malos.any():
+                fila = int(np.argmax(malos))
+                linea = (int(lineas[fila]) if isinstance(lineas, np.ndarray)
+                         else _numero_de_fila(primera, lineas, fila))
+                x, y, z = (poses[fila, :3] * 1000).round(1)
+                raise ValueError(f"línea {linea}: punto ({x}, {y}, {z}) mm fuera del alcance "
+                                 f"({alcance * 1000:.0f} mm) o velocidad no válida")
+        yield evento
+
+
+def agrupar(eventos, nombre: str, vel: float = VEL, acel: float = ACEL, radio: float = RADIO):
+    """Une bloques de movimientos consecutivos en un paso "trayectoria"; las acciones cortan."""
+    poses, vels = [], []
+
+    def paso():
+        p = np.concatenate(poses)
+        return {"tipo": "trayectoria", "poses": p, "vel": np.concatenate(vels),
+                "acel": acel, "radio": radio, "origen": nombre}
+
+    for evento in eventos:
+        if evento[0] == "mov":
+            p, v = evento[3], evento[4]
+            poses.append(p)
+            vels.append(np.full(len(p), vel) if v is None else v)
+        else:
+            if poses:
+                yield paso()
+                poses, vels = [], []
+            yield {"tipo": "gripper", "accion": evento[2]}
+    if poses:
+        yield paso()
+
+
+def importar(ruta: str, origen=None, unidades: str = "mm", angulos: str = "rad",
+             alcance: float = ALCANCE, mcodigos: dict = None, vel: float = VEL,
+             vel_g0: float = VEL_G0, acel: float = ACEL, radio: float = RADIO,
+             tamano: int = BLOQUE, progreso=None):
+    """
+    ============================================================
+    FUNCIÓN: importar(ruta, origen=None, ..., progreso=None)
+    ------------------------------------------------------------
+    Tubería completa: genera los pasos de la rutina leyendo el
+    archivo en bloques.
+
+        Parámetros:
+            ruta (str): .csv/.txt → CSV; otro → G-code.
+            origen (array (6,) | None): cero de pieza del G-code
+            (None = base del robot, herramienta hacia abajo).
+            unidades, angulos: del CSV (el G-code usa G20/G21, grados).
+            alcance (float): radio máximo desde la base (m).
+            mcodigos (dict | None): {"M3": "Cerrar", ...}.
+            vel, vel_g0, acel, radio: movimiento (SI).
+            tamano (int): líneas por bloque.
+            progreso (callable | None): progreso(líneas_leídas).
+        Retorna:
+            generador de pasos "trayectoria" y "gripper".
+        Errores:
+            ValueError con el número de línea; OSError al leer.
+    ============================================================
+    """
+    bloques = bloques_de_lineas(ruta, tamano)
+    if progreso is not None:
+        bloques = _avisando(bloques, progreso)
+    if ruta.lower().endswith((".csv", ".txt")):
+        eventos = eventos_csv(bloques, unidades, angulos)
+    else:
+        origen = [0, 0, 0, 0, np.pi, 0] if origen is None else origen
+        eventos = LectorGcode(origen, mcodigos, vel, vel_g0).eventos(bloques)
+    return agrupar(validar(eventos, alcance), os.path.basename(ruta), vel, acel, radio)
+
+
+def _avisando(bloques, progreso):
+    for primera, lineas in bloques:
+        yield primera, lineas
+        progreso(primera + len(lineas) - 1)
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 06 Compilación a URScript
+# ------------------------------------------------------------
+def radios_mezcla(xyz: np.ndarray, radio: float) -> np.ndarray:
+    """Radio de mezcla por punto: <= `radio` y < la mitad de los segmentos vecinos (0 en los extremos)."""
+    r = np.zeros(len(xyz))
+    if len(xyz) > 2:
+        seg = np.linalg.norm(np.diff(xyz, axis=0), axis=1)
+        r[1:-1] = np.minimum(radio, 0.45 * np.minimum(seg[:-1], seg[1:]))
+    return r
+
+
+def compilar_trayectoria(paso: dict, sangria: str = "    ") -> list:
+    """
+    ============================================================
+    FUNCIÓN: compilar_trayectoria(paso, sangria)
+    ------------------------------------------------------------
+    Líneas URScript del paso: movej al primer punto y un movel
+    mezclado por cada punto siguiente.
+
+        Parámetros:
+            paso (dict): paso "trayectoria".
+            sangria (str): sangría base.
+        Retorna:
+            list[str]: una línea por punto.
+    ============================================================
+    """
+    poses = paso["poses"]
+    datos = np.column_stack((poses, paso["vel"], radios_mezcla(poses[:, :3], paso["radio"]))).tolist()
+    formato = f"{sangria}movel(p[%.6f, %.6f, %.6f, %.6f, %.6f, %.6f], a={paso['acel']}, v=%.4f, r=%.5f)"
+    lineas = [f"{sangria}# Trayectoria {paso['origen']} ({len(poses)} puntos)",
+              f"{sangria}movej(p[%.6f, %.6f, %.6f, %.6f, %.6f, %.6f], a={ACEL_J}, v={VEL_J})" % tuple(datos[0][:6])]
+    lineas += [formato % tuple(fila) for fila in datos[1:]]
+    return lineas
+
+# ▲▲========================================================▲▲
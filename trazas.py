@@ -0,0 +1,219 @@
+"""
+trazas.py
+------------------------------------------------
+Propósito: trazado liviano de los caminos calientes (envío URScript,
+conexión y lectura RTDE, construcción de rutinas, callbacks de la GUI)
+para saber dónde se fue el tiempo cuando "el botón anduvo lento".
+
+- Se activa/desactiva en caliente; desactivado cuesta una llamada y la
+  lectura de un flag.
+- Los eventos van a un buffer en memoria acotado (los más viejos se
+  descartan).
+- `exportar()` escribe JSON de Chrome Trace (chrome://tracing, Perfetto).
+
+Uso:
+    @trazas.trazar("rtde.conectar")
+    def rtde_connect(): ...
+
+    with trazas.tramo("rtde.publicar", n=len(lote)):
+        ...
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y estado
+# ------------------------------------------------------------
+
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+
+_activo = False
+_eventos = deque(maxlen=200_000)    # (fase, nombre, categoría, ts_ns, dur_ns, tid, args)
+_hilos = {}                         # tid -> nombre del hilo
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Control
+# ------------------------------------------------------------
+def activar(capacidad: int = None) -> None:
+    """Empieza a registrar; `capacidad` redimensiona el buffer (lo vacía)."""
+    global _activo, _eventos
+    if capacidad is not None and capacidad != _eventos.maxlen:
+        _eventos = deque(maxlen=capacidad)
+    _activo = True
+
+
+def desactivar() -> None:
+    global _activo
+    _activo = False
+
+
+def activo() -> bool:
+    return _activo
+
+
+def alternar() -> bool:
+    """Activa o desactiva; devuelve el estado nuevo."""
+    desactivar() if _activo else activar()
+    return _activo
+
+
+def limpiar() -> None:
+    _eventos.clear()
+
+
+def cantidad() -> int:
+    return len(_eventos)
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Registro de eventos
+# ------------------------------------------------------------
+def _tid() -> int:
+    tid = threading.get_ident()
+    if tid not in _hilos:
+        _hilos[tid] = threading.current_thread().name
+    return tid
+
+
+class _Nulo:
+    """Contexto vacío compartido: lo que devuelve `tramo()` desactivado."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULO = _Nulo()
+
+
+class _Tramo:
+    __slots__ = ("nombre", "cat", "args", "t0")
+
+    def __init__(self, nombre: str, cat: str, args: dict):
+        self.nombre, self.cat, self.args = nombre, cat, args
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, tipo, *exc):
+        t1 = time.perf_counter_ns()
+        if tipo is not None:
+            self.args = dict(self.args or {}, error=tipo.__name__)
+        _eventos.append(("X", self.nombre, self.cat, self.t0, t1 - self.t0, _tid(), self.args))
+        return False
+
+
+def tramo(nombre: str, cat: str = "app", **args):
+    """Contexto que registra la duración del bloque (evento "X")."""
+    if not _activo:
+        return _NULO
+    return _Tramo(nombre, cat, args or None)
+
+
+def trazar(nombre: str = None, cat: str = "app"):
+    """
+    ============================================================
+    DECORADOR: trazar(nombre=None, cat="app")
+    ------------------------------------------------------------
+    Registra cada llamada a la función como un tramo.
+
+        Parámetros:
+            nombre (str | None): None usa el nombre de la función.
+            cat (str): categoría (filtro en el visor).
+        Notas:
+            - Desactivado, el envoltorio solo lee el flag y llama.
+    ============================================================
+    """
+
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envoltorio(*args, **kwargs):
+            if not _activo:
+                return funcion(*args, **kwargs)
+            with _Tramo(etiqueta, cat, None):
+                return funcion(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+def instante(nombre: str, cat: str = "app", **args) -> None:
+    """Marca puntual (evento "i"), p. ej. una reconexión."""
+    if _activo:
+        _eventos.append(("i", nombre, cat, time.perf_counter_ns(), 0, _tid(), args or None))
+
+
+def contador(nombre: str, **valores) -> None:
+    """Serie numérica (evento "C"), p. ej. tamaño de lote o cola."""
+    if _activo:
+        _eventos.append(("C", nombre, "contador", time.perf_counter_ns(), 0, _tid(), valores))
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 04 Exportación (Chrome Trace / Perfetto)
+# ------------------------------------------------------------
+def eventos_chrome() -> list:
+    """Eventos del buffer en formato Chrome Trace (ts/dur en µs)."""
+    pid = os.getpid()
+    salida = [{"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": "Taller_FreeDrive"}}]
+    for tid, nombre in list(_hilos.items()):
+        salida.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": nombre}})
+    for fase, nombre, cat, ts, dur, tid, args in list(_eventos):
+        ev = {"ph": fase, "name": nombre, "cat": cat, "pid": pid, "tid": tid, "ts": ts / 1e3}
+        if fase == "X":
+            ev["dur"] = dur / 1e3
+        elif fase == "i":
+            ev["s"] = "t"
+        if args:
+            ev["args"] = args
+        salida.append(ev)
+    return salida
+
+
+def exportar(ruta: str) -> int:
+    """
+    ============================================================
+    FUNCIÓN: exportar(ruta)
+    ------------------------------------------------------------
+    Escribe el buffer como JSON de Chrome Trace.
+
+        Parámetros:
+            ruta (str): archivo destino (.json).
+        Retorna:
+            int: eventos escritos (sin metadatos).
+        Notas:
+            - Abrir en https://ui.perfetto.dev o chrome://tracing.
+    ============================================================
+    """
+    eventos = eventos_chrome()
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, f, default=str)
+    return sum(1 for e in eventos if e["ph"] != "M")
+
+# ▲▲========================================================▲▲
@@ -0,0 +1,385 @@
+"""
+vista_tcp.py
+------------------------------------------------
+Propósito: panel sobre el `canvas` de la GUI con la tira temporal de
+`actual_TCP_pose` (X, Y, Z) y la ruta de la rutina proyectada en planta
+(X-Y) y alzado (X-Z), con la posición actual del TCP.
+
+- Redibujo incremental: los ítems del canvas se crean una sola vez; cada
+  cuadro solo mueve coordenadas (`canvas.coords`) y cambia textos.
+- Nivel de detalle: la historia se agrega al llegar en columnas de píxel
+  (mínimo/máximo por columna), así que un cuadro dibuja 2 puntos por
+  píxel aunque la tira cubra 100 000 muestras.
+- La ruta se proyecta a píxeles y se descartan los puntos que caen en el
+  mismo píxel que el anterior.
+
+Uso:
+    panel = PanelTCP(canvas, x, y, ancho, alto)
+    distribuidor.suscribir(panel.agregar_lote, lote=True)
+    panel.fijar_ruta(lista_instrucciones)
+    panel.animar(ventana, fps=30)
+"""
+# -*- coding: utf-8 -*-
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 01 Librerías y constantes
+# ------------------------------------------------------------
+
+import threading
+
+import numpy as np
+
+import paletizado
+
+COLORES = ("#d9534f", "#5cb85c", "#0275d8")     # X, Y, Z
+BORDE = "#a0a0a0"
+RUTA = "#404040"
+SEPARACION = 8                                   # px entre tira y vistas
+MAX_PUNTOS_RUTA = 4000                           # tope de vértices de la ruta dibujada
+RANGO_MIN = 1e-4                                 # m (0,1 mm): evita escalar ruido a todo el alto
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 02 Geometría
+# ------------------------------------------------------------
+def puntos_rutina(pasos: list) -> np.ndarray:
+    """Posiciones (n, 3) en m que recorre la rutina (los patrones se expanden)."""
+    trozos = []
+    for paso in pasos:
+        if paso.get("tipo") == "pose":
+            trozos.append(np.asarray(paso["pose"][:3], dtype=float).reshape(1, 3))
+        elif paso.get("tipo") == "patron":
+            trozos.append(paletizado.generar_poses(paso)[:, :3])
+        elif paso.get("tipo") == "trayectoria":
+            trozos.append(paso["poses"][:, :3])
+    return np.concatenate(trozos) if trozos else np.zeros((0, 3))
+
+
+def reducir_ruta(px: np.ndarray, maximo: int = MAX_PUNTOS_RUTA) -> np.ndarray:
+    """
+    ============================================================
+    FUNCIÓN: reducir_ruta(px, maximo=MAX_PUNTOS_RUTA)
+    ------------------------------------------------------------
+    Nivel de detalle de una polilínea en pantalla.
+
+        Parámetros:
+            px (ndarray (n, 2)): puntos en píxeles.
+            maximo (int): vértices como máximo.
+        Retorna:
+            ndarray (m, 2) int: puntos redondeados, sin repetir el
+            píxel anterior; si aún son más de `maximo`, submuestreo
+            uniforme que conserva el primero y el último.
+    ============================================================
+    """
+    if len(px) == 0:
+        return np.zeros((0, 2), dtype=np.int32)
+    q = np.rint(px).astype(np.int32)
+    clave = q.view(np.int64).ravel() if q.flags.c_contiguous else q[:, 0] * 65536 + q[:, 1]
+    cambia = np.empty(len(q), dtype=bool)
+    cambia[0] = True
+    np.not_equal(clave[1:], clave[:-1], out=cambia[1:])
+    q = q[cambia]
+    if len(q) > maximo:
+        q = q[np.linspace(0, len(q) - 1, maximo).astype(np.intp)]
+    return q
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 03 Tira temporal de la pose TCP
+# ------------------------------------------------------------
+class TiraTCP:
+    """
+    ============================================================
+    CLASE: TiraTCP(canvas, x, y, ancho, alto, muestras=100000)
+    ------------------------------------------------------------
+    Tira temporal de X, Y, Z del TCP (un carril autoescalado por
+    eje, lo más reciente a la derecha).
+
+        Parámetros:
+            canvas (tk.Canvas | None): None solo calcula (benchmark).
+            x, y, ancho, alto (int): rectángulo en el canvas (px).
+            muestras (int): muestras que cubre el ancho completo.
+        Métodos:
+            __call__(estado) / agregar_lote(lote): consumidores RTDE
+            (cualquier hilo).
+            geometria() -> list | None: coordenadas de cada línea.
+            dibujar() -> bool: aplica el cuadro (hilo de Tk).
+            limpiar(): vacía la historia.
+        Notas:
+            - Cada columna de píxel guarda mín/máx de
+            `por_columna` muestras consecutivas: el costo de un
+            cuadro depende del ancho, no de `muestras`.
+    ============================================================
+    """
+
+    def __init__(self, canvas, x: int, y: int, ancho: int, alto: int, muestras: int = 100_000):
+        self.canvas = canvas
+        self.x, self.y, self.ancho, self.alto = x, y, ancho, alto
+        self.por_columna = max(1, -(-muestras // ancho))
+        self._min = np.zeros((ancho, 3))
+        self._max = np.zeros((ancho, 3))
+        self._candado = threading.Lock()
+        self.ultima = None              # última pose (6,)
+        self.version = 0                # cambia con cada muestra nueva
+        self._dibujada = -1
+        self._textos_previos = [None] * 3
+        self.limpiar()
+
+        if canvas is None:
+            return
+        canvas.create_rectangle(x, y, x + ancho, y + alto, fill="white", outline=BORDE)
+        carril = alto / 3
+        self._lineas = [canvas.create_line(x, y + (k + 0.5) * carril, x + 1, y + (k + 0.5) * carril, fill=c)
+                        for k, c in enumerate(COLORES)]
+        self._textos = [canvas.create_text(x + 4, y + k * carril + 2, anchor="nw", text="", fill=c,
+                                           font=("Arial", 8, "bold"))
+                        for k, c in enumerate(COLORES)]
+
+    def limpiar(self) -> None:
+        with self._candado:
+            self._col = 0               # columna en curso (anillo)
+            self._en_col = 0            # muestras ya agregadas a la columna en curso
+            self._llenas = 0            # columnas con datos (<= ancho)
+            self.ultima = None
+            self.version += 1
+
+    # ---------- consumidores ----------
+    def __call__(self, estado) -> None:
+        pose = getattr(estado, "actual_TCP_pose", None)
+        if pose is not None:
+            self._agregar(np.asarray(pose, dtype=float).reshape(1, 6))
+
+    def agregar_lote(self, lote) -> None:
+        if "actual_TCP_pose" in lote.dtype.names and len(lote):
+            self._agregar(lote["actual_TCP_pose"])
+
+    def _agregar(self, poses: np.ndarray) -> None:
+        xyz = poses[:, :3]
+        i, n = 0, len(xyz)
+        with self._candado:
+            while i < n:
+                c = self._col
+                toma = min(n - i, self.por_columna - self._en_col)
+                bloque = xyz[i:i + toma]
+                if self._en_col == 0:
+                    self._min[c] = bloque.min(axis=0)
+                    self._max[c] = bloque.max(axis=0)
+                    self._llenas = min(self._llenas + 1, self.ancho)
+                else:
+                    np.minimum(self._min[c], bloque.min(axis=0), out=self._min[c])
+                    np.maximum(self._max[c], bloque.max(axis=0), out=self._max[c])
+                self._en_col += toma
+                i += toma
+                if self._en_col == self.por_columna:
+                    self._col, self._en_col = (c + 1) % self.ancho, 0
+            self.ultima = np.array(poses[-1], dtype=float)
+            self.version += 1
+
+    # ---------- cuadro ----------
+    def geometria(self):
+        """Coordenadas planas (x0, y0, x1, y1, ...) de cada eje, o None sin datos."""
+        with self._candado:
+            n = self._llenas
+            if n == 0:
+                return None
+            ultima = self._col if self._en_col else self._col - 1
+            orden = np.arange(ultima - n + 1, ultima + 1) % self.ancho
+            minimos, maximos = self._min[orden], self._max[orden]
+
+        xs = self.x + self.ancho - n + np.arange(n)
+        carril = self.alto / 3
+        margen = 3
+        bajo, alto = minimos.min(axis=0), maximos.max(axis=0)
+        escala = (carril - 2 * margen) / np.maximum(alto - bajo, RANGO_MIN)
+        lineas = []
+        for k in range(3):
+            base = self.y + (k + 1) * carril - margen
+            puntos = np.empty((2 * n, 2))
+            puntos[0::2, 0] = xs
+            puntos[1::2, 0] = xs
+            puntos[0::2, 1] = base - (minimos[:, k] - bajo[k]) * escala[k]
+            puntos[1::2, 1] = base - (maximos[:, k] - bajo[k]) * escala[k]
+            lineas.append(np.rint(puntos).astype(np.int32).ravel().tolist())
+        return lineas
+
+    def dibujar(self) -> bool:
+        """Mueve las líneas si llegaron muestras desde el cuadro anterior."""
+        version = self.version
+        if version == self._dibujada:
+            return False
+        self._dibujada = version
+        lineas = self.geometria()
+        if lineas is None:
+            return False
+        for item, coords in zip(self._lineas, lineas):
+            self.canvas.coords(item, coords)
+        ultima = self.ultima
+        if ultima is None:
+            return False
+        for k, item in enumerate(self._textos):
+            texto = f"{'XYZ'[k]} {ultima[k] * 1000:8.1f} mm"
+            if texto != self._textos_previos[k]:
+                self.canvas.itemconfigure(item, text=texto)
+                self._textos_previos[k] = texto
+        return True
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 04 Vista proyectada de la ruta
+# ------------------------------------------------------------
+class VistaRuta:
+    """
+    ============================================================
+    CLASE: VistaRuta(canvas, x, y, ancho, alto, ejes, titulo)
+    ------------------------------------------------------------
+    Proyección ortográfica de la ruta sobre dos ejes de la base
+    (misma escala en ambos) con un marcador del TCP.
+
+        Parámetros:
+            ejes (tuple): (horizontal, vertical), p. ej. (0, 1) = X-Y.
+        Métodos:
+            fijar_ruta(puntos): redibuja la polilínea (n, 3).
+            mover_tcp(pose): mueve el marcador.
+    ============================================================
+    """
+
+    def __init__(self, canvas, x: int, y: int, ancho: int, alto: int, ejes: tuple, titulo: str):
+        self.canvas = canvas
+        self.x, self.y, self.ancho, self.alto = x, y, ancho, alto
+        self.ejes = list(ejes)
+        self._centro = None             # (2,) m en el centro del rectángulo
+        self._factor = None             # px por m
+        self._con_ruta = False
+        self._tcp_visible = False
+        canvas.create_rectangle(x, y, x + ancho, y + alto, fill="white", outline=BORDE)
+        canvas.create_text(x + 4, y + 2, anchor="nw", text=titulo, fill=RUTA, font=("Arial", 8, "bold"))
+        self._ruta = canvas.create_line(x, y, x + 1, y, fill=RUTA, state="hidden")
+        self._inicio = canvas.create_oval(x, y, x, y, outline=RUTA, state="hidden")
+        self._tcp = canvas.create_oval(x, y, x, y, fill=COLORES[0], outline="", state="hidden")
+
+    def _escalar(self, plano: np.ndarray) -> None:
+        bajo, alto = plano.min(axis=0), plano.max(axis=0)
+        self._centro = (bajo + alto) / 2
+        rango = np.maximum(alto - bajo, 0.05)        # al menos 5 cm visibles
+        self._factor = 0.85 * min(self.ancho / rango[0], (self.alto - 12) / rango[1])
+
+    def _proyectar(self, plano: np.ndarray) -> np.ndarray:
+        px = np.empty_like(plano)
+        px[:, 0] = self.x + self.ancho / 2 + (plano[:, 0] - self._centro[0]) * self._factor
+        px[:, 1] = self.y + 6 + (self.alto - 6) / 2 - (plano[:, 1] - self._centro[1]) * self._factor
+        return px
+
+    def fijar_ruta(self, puntos: np.ndarray) -> None:
+        if len(puntos) == 0:
+            self.canvas.itemconfigure(self._ruta, state="hidden")
+            self.canvas.itemconfigure(self._inicio, state="hidden")
+            self._con_ruta = False
+            return
+        plano = puntos[:, self.ejes]
+        self._escalar(plano)
+        self._con_ruta = True
+        q = reducir_ruta(self._proyectar(plano))
+        if len(q) >= 2:
+            self.canvas.coords(self._ruta, q.ravel().tolist())
+            self.canvas.itemconfigure(self._ruta, state="normal")
+        else:
+            self.canvas.itemconfigure(self._ruta, state="hidden")
+        x0, y0 = q[0]
+        self.canvas.coords(self._inicio, x0 - 4, y0 - 4, x0 + 4, y0 + 4)
+        self.canvas.itemconfigure(self._inicio, state="normal")
+
+    def mover_tcp(self, pose) -> None:
+        plano = np.asarray(pose, dtype=float)[self.ejes].reshape(1, 2)
+        if not self._con_ruta:
+            self._escalar(plano)             # sin ruta: vista centrada en el TCP
+        px, py = self._proyectar(plano)[0]
+        px = min(max(px, self.x + 3), self.x + self.ancho - 3)
+        py = min(max(py, self.y + 3), self.y + self.alto - 3)
+        self.canvas.coords(self._tcp, px - 3, py - 3, px + 3, py + 3)
+        if not self._tcp_visible:
+            self.canvas.itemconfigure(self._tcp, state="normal")
+            self._tcp_visible = True
+
+# ▲▲========================================================▲▲
+
+
+
+
+
+# ▼▼========================================================▼▼
+#   ⮞ 05 Panel completo
+# ------------------------------------------------------------
+class PanelTCP:
+    """
+    ============================================================
+    CLASE: PanelTCP(canvas, x, y, ancho, alto, muestras=100000)
+    ------------------------------------------------------------
+    Tira temporal (mitad izquierda) + planta X-Y + alzado X-Z.
+
+        Métodos:
+            __call__ / agregar_lote: consumidores RTDE (a la tira).
+            fijar_ruta(pasos): `lista_instrucciones` modificada.
+            limpiar(): nueva historia (cambio de robot activo).
+            cuadro(): un redibujo; animar(ventana, fps) lo agenda.
+        Notas:
+            - Sin muestras nuevas un cuadro no toca el canvas.
+    ============================================================
+    """
+
+    def __init__(self, canvas, x: int, y: int, ancho: int, alto: int, muestras: int = 100_000):
+        ancho_tira = ancho // 2
+        ancho_vista = (ancho - ancho_tira - 2 * SEPARACION) // 2
+        x_vista = x + ancho_tira + SEPARACION
+        self.tira = TiraTCP(canvas, x, y, ancho_tira, alto, muestras)
+        self.vistas = [VistaRuta(canvas, x_vista, y, ancho_vista, alto, (0, 1), "Planta X-Y"),
+                       VistaRuta(canvas, x_vista + ancho_vista + SEPARACION, y, ancho_vista, alto,
+                                 (0, 2), "Alzado X-Z")]
+
+    def __call__(self, estado) -> None:
+        self.tira(estado)
+
+    def agregar_lote(self, lote) -> None:
+        self.tira.agregar_lote(lote)
+
+    def fijar_ruta(self, pasos: list) -> None:
+        puntos = puntos_rutina(pasos)
+        for vista in self.vistas:
+            vista.fijar_ruta(puntos)
+
+    def limpiar(self) -> None:
+        self.tira.limpiar()
+
+    def cuadro(self) -> bool:
+        if not self.tira.dibujar():
+            return False
+        ultima = self.tira.ultima
+        if ultima is not None:
+            for vista in self.vistas:
+                vista.mover_tcp(ultima)
+        return True
+
+    def animar(self, ventana, fps: float = 30) -> None:
+        periodo = max(1, int(1000 / fps))
+
+        def tic():
+            self.cuadro()
+            ventana.after(periodo, tic)
+        tic()
+
+# ▲▲========================================================▲▲